@@ -0,0 +1,116 @@
+"""Load test for ``POST /v1/extract`` against a slow stub chat model.
+
+Patches the pipeline nodes with a stub whose ``invoke``/``ainvoke`` sleep for a
+fixed latency, then fires concurrent requests through the ASGI app. With the
+async execution path one worker overlaps the model waits, so wall time stays
+close to a single request's latency instead of growing with concurrency.
+
+    python benchmarks/async_load.py --requests 32 --latency 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+import httpx
+
+from xtractor.api.app import create_app
+from xtractor.pipeline.nodes import file_understanding, multimodal_extract
+
+SCHEMA_PAYLOAD = {
+    "outputFormat": "json",
+    "schema": {
+        "key": "asset_register",
+        "fields": [{"name": "UNIQUE KKS", "description": "Unique identifier"}],
+    },
+}
+DOCUMENT = b"%PDF-1.4\n% stub document for load testing\n%%EOF"
+
+
+class _StubMessage:
+    def __init__(self, content: str) -> None:
+        self.content = content
+
+
+class SlowStubModel:
+    """Chat model stand-in that answers every prompt after ``latency`` seconds."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def _reply(self, messages: Any) -> _StubMessage:
+        system = getattr(messages[0], "content", "")
+        if "FILE UNDERSTANDING" in str(system):
+            body = {"concise_summary": "Stub summary of an asset register.", "hints": []}
+        else:
+            body = {"key": "asset_register", "rows": [{"UNIQUE KKS": "STUB-0001"}]}
+        return _StubMessage(json.dumps(body))
+
+    def invoke(self, messages: Any, **_: Any) -> _StubMessage:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages: Any, **_: Any) -> _StubMessage:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def _install_stub(latency: float) -> None:
+    stub = SlowStubModel(latency)
+    for module in (file_understanding, multimodal_extract):
+        module.build_multimodal_model = lambda settings=None: stub  # type: ignore[assignment]
+
+
+async def _run(total: int, concurrency: int) -> dict[str, Any]:
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/v1/extract",
+                    files={"file": ("doc.pdf", DOCUMENT, "application/pdf")},
+                    data={"payload": json.dumps(SCHEMA_PAYLOAD)},
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(total / wall, 2),
+        "p50_s": round(latencies[len(latencies) // 2], 3),
+        "max_s": round(latencies[-1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub seconds per LLM call")
+    args = parser.parse_args()
+
+    _install_stub(args.latency)
+    report = asyncio.run(_run(args.requests, args.concurrency))
+    report["serial_estimate_s"] = round(args.requests * 2 * args.latency, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
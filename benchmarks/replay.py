@@ -0,0 +1,101 @@
+"""Replay recorded LLM traffic through ``xtractor-cli batch`` and report wall and node timings.
+
+Record a run once with ``DX_LLM_CASSETTE_MODE=record`` (every model response is
+stored with its latency), then rerun the same documents offline against any
+pipeline version. Replayed calls wait their recorded latency times
+``--time-scale``; requests the cassette has no recording for are counted as
+misses and degrade like a failed model call.
+
+    export DX_LLM_CASSETTE_MODE=record DX_LLM_CASSETTE_PATH=day.sqlite
+    xtractor-cli batch day.jsonl --output day.ndjson
+    python benchmarks/replay.py day.jsonl --cassette day.sqlite --report replay-new.json
+    python benchmarks/replay.py day.jsonl --cassette day.sqlite --baseline replay-old.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def _node_timings(output: Path) -> Dict[str, Dict[str, float]]:
+    from xtractor.cli.batch import percentile
+
+    per_node: Dict[str, List[float]] = {}
+    for line in output.read_text(encoding="utf-8").splitlines():
+        response = json.loads(line).get("response") or {}
+        for node, ms in ((response.get("audit") or {}).get("timings_ms") or {}).items():
+            per_node.setdefault(node, []).append(ms)
+    return {
+        node: {"p50_ms": percentile(values, 0.50), "p95_ms": percentile(values, 0.95)}
+        for node, values in per_node.items()
+    }
+
+
+def _ratios(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    def ratio(now: float, before: float) -> float | None:
+        return round(now / before, 3) if before else None
+
+    return {
+        "wall_ratio": ratio(report["batch"]["wall_s"], baseline["batch"]["wall_s"]),
+        "p95_ratio": ratio(report["batch"]["p95_ms"], baseline["batch"]["p95_ms"]),
+        "nodes_p50_ratio": {
+            node: ratio(timings["p50_ms"], baseline["nodes"][node]["p50_ms"])
+            for node, timings in report["nodes"].items()
+            if node in baseline.get("nodes", {})
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="Directory of documents or JSONL manifest")
+    parser.add_argument("--cassette", type=Path, required=True, help="Recorded cassette file")
+    parser.add_argument("--schema", type=Path, help="Payload JSON for items without their own")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="0 replays instantly")
+    parser.add_argument("--report", type=Path, help="Also write the report to this file")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    os.environ.update(
+        {
+            "DX_LLM_CASSETTE_MODE": "replay",
+            "DX_LLM_CASSETTE_PATH": str(args.cassette),
+            "DX_LLM_CASSETTE_TIME_SCALE": str(args.time_scale),
+        }
+    )
+    from xtractor.adapters.cassette import get_cassette_store
+    from xtractor.cli.batch import build_parser, run_batch
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = Path(workdir) / "results.ndjson"
+        argv = [str(args.source), "--output", str(output)]
+        argv += ["--concurrency", str(args.concurrency)]
+        if args.schema:
+            argv += ["--schema", str(args.schema)]
+        summary = asyncio.run(run_batch(build_parser().parse_args(argv)))
+        nodes = _node_timings(output)
+
+    cassette = get_cassette_store()
+    report: Dict[str, Any] = {
+        "time_scale": args.time_scale,
+        "batch": summary,
+        "cassette": cassette.snapshot() if cassette else None,
+        "nodes": nodes,
+    }
+    if args.baseline:
+        report["vs_baseline"] = _ratios(report, json.loads(args.baseline.read_text()))
+    rendered = json.dumps(report, indent=2)
+    if args.report:
+        args.report.write_text(rendered, encoding="utf-8")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main()
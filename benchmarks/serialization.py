@@ -0,0 +1,102 @@
+"""Serialization time, payload size and peak memory per ``outputFormat`` for a large result.
+
+A synthetic final state (default 20k rows x 12 fields) is serialized the way
+``POST /v1/extract`` does for each format. The ``pydantic`` baseline is the
+previous path: rows validated into ``ExtractResponse`` and then encoded by
+FastAPI's ``jsonable_encoder`` and ``JSONResponse``.
+
+    python benchmarks/serialization.py --rows 20000 --fields 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from xtractor.api.formats import envelope, iter_csv, iter_ndjson, render_json, response_body
+from xtractor.models.responses import ExtractionResultModel, ExtractResponse
+from xtractor.pipeline.state import DXState
+
+
+def _state(rows: int, fields: int) -> DXState:
+    names = ["UNIQUE KKS"] + [f"FIELD {index:02d}" for index in range(1, fields)]
+    schema = {"key": "asset_register", "fields": [{"name": name} for name in names]}
+    result_rows: List[Dict[str, Any]] = []
+    for row in range(rows):
+        values: Dict[str, Any] = {"UNIQUE KKS": f"10LAB{row:05d}AA001"}
+        for column, name in enumerate(names[1:], start=1):
+            values[name] = None if (row + column) % 7 == 0 else f"value {row}-{column}"
+        result_rows.append(values)
+    return {
+        "concise_summary": "Synthetic asset register.",
+        "hints": ["table on every page"],
+        "schema": schema,
+        "extraction_result": {"key": "asset_register", "rows": result_rows},
+        "warnings": [],
+        "audit": {"graph_run_id": "run_benchmark", "nodes_path": [], "timings_ms": {}},
+    }
+
+
+def _pydantic(state: DXState) -> bytes:
+    base = envelope(state)
+    result = state["extraction_result"]
+    response = ExtractResponse(
+        concise_summary=base.concise_summary,
+        result=ExtractionResultModel(key=result["key"], rows=result["rows"]),
+        symbols=base.symbols,
+        audit=base.audit,
+        warnings=base.warnings,
+    )
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+FORMATS: Dict[str, Callable[[DXState], bytes]] = {
+    "pydantic": _pydantic,
+    "json": lambda state: render_json(response_body(state, "json")),
+    "columns": lambda state: render_json(response_body(state, "columns")),
+    "ndjson": lambda state: b"".join(iter_ndjson(state)),
+    "csv": lambda state: b"".join(iter_csv(state)),
+}
+
+
+def _measure(serialize: Callable[[DXState], bytes], state: DXState, repeats: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        payload = serialize(state)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    serialize(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms_p50": round(statistics.median(timings) * 1000, 1),
+        "bytes": len(payload),
+        "peak_alloc_mb": round(peak / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--fields", type=int, default=12)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    state = _state(args.rows, args.fields)
+    report = {name: _measure(serialize, state, args.repeats) for name, serialize in FORMATS.items()}
+    baseline = report["pydantic"]["ms_p50"]
+    for entry in report.values():
+        entry["speedup"] = round(baseline / entry["ms_p50"], 1) if entry["ms_p50"] else None
+    print(json.dumps({"rows": args.rows, "fields": args.fields, "formats": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Compare the two-pass graph with ``pipelineMode=single_pass`` on latency and tokens.
+
+A stub chat model stands in for the provider: every call costs a fixed latency
+plus a per-input-token charge and reports ``usage_metadata`` (tokens estimated
+as characters / 4, base64 file parts included). Summaries are forced through the
+model (``DX_FILE_UNDERSTANDING_MODE=llm``) and caches are disabled, so the
+two-pass graph pays for two document uploads per request and single-pass for one.
+
+    python benchmarks/single_pass.py --documents 8 --document-kb 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+os.environ.update(
+    {
+        "DX_FILE_UNDERSTANDING_MODE": "llm",
+        "DX_SUMMARY_CACHE_ENABLED": "false",
+        "DX_RESULT_CACHE_ENABLED": "false",
+    }
+)
+
+from xtractor.pipeline.nodes import (  # noqa: E402
+    file_understanding,
+    multimodal_extract,
+    single_pass_extract,
+)
+from xtractor.pipeline.runner import run_pipeline_async  # noqa: E402
+
+SCHEMA = {
+    "key": "asset_register",
+    "fields": [
+        {"name": "UNIQUE KKS", "description": "Unique identifier"},
+        {"name": "DESCRIPTION", "description": "Equipment description"},
+    ],
+}
+
+
+def _estimate_tokens(messages: Any) -> int:
+    chars = 0
+    for message in messages:
+        content = getattr(message, "content", "")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content}]
+        for part in parts:
+            chars += len(part.get("text") or part.get("data") or "")
+    return chars // 4
+
+
+class _StubMessage:
+    def __init__(self, content: str, usage: Dict[str, int]) -> None:
+        self.content = content
+        self.usage_metadata = usage
+
+
+class CostedStubModel:
+    """Chat model stand-in whose latency grows with the prompt it is sent."""
+
+    def __init__(self, latency: float, per_1k_tokens: float) -> None:
+        self.latency = latency
+        self.per_1k_tokens = per_1k_tokens
+
+    def _reply(self, messages: Any) -> tuple[_StubMessage, float]:
+        system = str(getattr(messages[0], "content", ""))
+        rows = [{"UNIQUE KKS": "STUB-0001", "DESCRIPTION": "Pump"}]
+        if "FILE UNDERSTANDING" in system:
+            body: Dict[str, Any] = {"concise_summary": "Stub asset register.", "hints": []}
+        elif "concise_summary" in system:
+            body = {"concise_summary": "Stub asset register.", "hints": [], "rows": rows}
+        else:
+            body = {"key": "asset_register", "rows": rows}
+        content = json.dumps(body)
+        usage = {"input_tokens": _estimate_tokens(messages), "output_tokens": len(content) // 4}
+        delay = self.latency + self.per_1k_tokens * usage["input_tokens"] / 1000
+        return _StubMessage(content, usage), delay
+
+    def invoke(self, messages: Any, **_: Any) -> _StubMessage:
+        reply, delay = self._reply(messages)
+        time.sleep(delay)
+        return reply
+
+    async def ainvoke(self, messages: Any, **_: Any) -> _StubMessage:
+        reply, delay = self._reply(messages)
+        await asyncio.sleep(delay)
+        return reply
+
+
+def _install_stub(model: CostedStubModel) -> None:
+    for module in (file_understanding, multimodal_extract, single_pass_extract):
+        module.build_multimodal_model = lambda settings=None: model  # type: ignore[assignment]
+
+
+def _document(index: int, size_kb: int) -> bytes:
+    # Distinct bytes per document so nothing is shared between runs.
+    filler = (f"% filler {index} " * 64).encode("ascii")
+    body = (filler * (size_kb * 1024 // len(filler) + 1))[: size_kb * 1024]
+    return b"%PDF-1.4\n" + body + b"\n%%EOF"
+
+
+async def _run(mode: str, documents: List[bytes]) -> Dict[str, Any]:
+    payload = {"outputFormat": "json", "schema": SCHEMA, "pipelineMode": mode}
+    latencies: List[float] = []
+    input_tokens = output_tokens = 0
+    for index, document in enumerate(documents):
+        started = time.perf_counter()
+        state = await run_pipeline_async(
+            file_bytes=document, filename=f"doc-{index}.pdf", payload=payload
+        )
+        latencies.append(time.perf_counter() - started)
+        for counts in (state.get("audit") or {}).get("tokens", {}).values():
+            input_tokens += counts.get("input") or 0
+            output_tokens += counts.get("output") or 0
+    return {
+        "mode": mode,
+        "documents": len(documents),
+        "p50_s": round(statistics.median(latencies), 3),
+        "mean_s": round(statistics.fmean(latencies), 3),
+        "input_tokens_per_doc": input_tokens // len(documents),
+        "output_tokens_per_doc": output_tokens // len(documents),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--document-kb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.4, help="Stub seconds per LLM call")
+    parser.add_argument(
+        "--per-1k-tokens", type=float, default=0.005, help="Stub seconds per 1k input tokens"
+    )
+    args = parser.parse_args()
+
+    _install_stub(CostedStubModel(args.latency, args.per_1k_tokens))
+    documents = [_document(index, args.document_kb) for index in range(args.documents)]
+    two_pass = asyncio.run(_run("two_pass", documents))
+    single_pass = asyncio.run(_run("single_pass", documents))
+    report = {
+        "two_pass": two_pass,
+        "single_pass": single_pass,
+        "latency_saving": round(1 - single_pass["mean_s"] / two_pass["mean_s"], 3),
+        "input_token_saving": round(
+            1 - single_pass["input_tokens_per_doc"] / two_pass["input_tokens_per_doc"], 3
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Local stub of the OpenAI chat-completions API for deterministic benchmarks.
+
+Answers ``POST /v1/chat/completions`` (plain and ``stream: true``) with JSON the
+pipeline accepts: a summary for file-understanding prompts, otherwise ``rows``
+built from the fields of the request's ``json_schema`` response format. Each
+call waits ``latency`` seconds, then emits output at ``tokens_per_second``;
+``error_rate`` of the calls answer ``500`` instead. Replies, usage and injected
+errors depend only on the request and the call's sequence number, so runs are
+repeatable. Point ``DX_OPENAI_BASE_URL`` at it.
+
+    python benchmarks/stub_llm_server.py --port 8099 --latency 0.3 --rows 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_FIELDS = ["UNIQUE KKS", "DESCRIPTION"]
+
+# Characters per emitted token, for both usage accounting and streaming pace.
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    latency: float = 0.2
+    tokens_per_second: float = 0.0  # 0: the whole reply is ready after ``latency``
+    rows: int = 10
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """The system prompt and the prompt size in characters (file parts included)."""
+
+    system = ""
+    chars = 0
+    for message in messages:
+        content = message.get("content") or ""
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content}]
+        for part in parts:
+            text = part.get("text") or part.get("file", {}).get("file_data") or ""
+            chars += len(text)
+            if message.get("role") == "system":
+                system += text
+    return system, chars
+
+
+def _response_schema(body: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Name and top-level properties of the request's ``json_schema`` response format."""
+
+    spec = (body.get("response_format") or {}).get("json_schema") or {}
+    return spec.get("name") or "stub", (spec.get("schema") or {}).get("properties") or {}
+
+
+def _reply(body: Dict[str, Any], config: StubConfig) -> Tuple[str, Dict[str, int]]:
+    messages = body.get("messages") or []
+    system, prompt_chars = _prompt_text(messages)
+    name, properties = _response_schema(body)
+    summary = {"concise_summary": "Stub asset register with equipment tags.", "hints": []}
+    if "FILE UNDERSTANDING" in system:
+        reply: Dict[str, Any] = summary
+    else:
+        row_spec = properties.get("rows", {}).get("items", {}).get("properties") or {}
+        fields = list(row_spec) or DEFAULT_FIELDS
+        # Row ids follow the prompt, so page windows of one document yield distinct rows.
+        digest = hashlib.sha1(json.dumps(messages[1:], default=str).encode()).hexdigest()[:8]
+        rows = [
+            {field: f"{field[:3].upper()}-{digest}-{index:04d}" for field in fields}
+            for index in range(config.rows)
+        ]
+        reply = {"key": name, "rows": rows}
+        if "concise_summary" in properties:
+            reply = {**summary, **reply}
+    content = json.dumps(reply)
+    usage = {
+        "prompt_tokens": prompt_chars // _CHARS_PER_TOKEN,
+        "completion_tokens": len(content) // _CHARS_PER_TOKEN,
+    }
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    return content, usage
+
+
+def _completion(body: Dict[str, Any], content: str, usage: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or "stub",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {**usage, "prompt_tokens_details": {"cached_tokens": 0}},
+    }
+
+
+def _chunk(body: Dict[str, Any], delta: Dict[str, Any], **extra: Any) -> bytes:
+    event = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model") or "stub",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": extra.pop("finish", None)}],
+        **extra,
+    }
+    if "usage" in extra:
+        event["choices"] = []
+    return f"data: {json.dumps(event)}\n\n".encode()
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="stub-llm")
+    sequence = itertools.count()
+    app.state.stats = {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    async def _stream(
+        body: Dict[str, Any], content: str, usage: Dict[str, int]
+    ) -> AsyncIterator[bytes]:
+        yield _chunk(body, {"role": "assistant", "content": ""})
+        piece = _CHARS_PER_TOKEN * 8
+        for start in range(0, len(content), piece):
+            if config.tokens_per_second:
+                await asyncio.sleep(8 / config.tokens_per_second)
+            yield _chunk(body, {"content": content[start : start + piece]})
+        yield _chunk(body, {}, finish="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield _chunk(body, {}, usage={**usage, "prompt_tokens_details": {"cached_tokens": 0}})
+        yield b"data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        call = next(sequence)
+        stats = app.state.stats
+        stats["calls"] += 1
+        await asyncio.sleep(config.latency)
+        if random.Random(f"{config.seed}:{call}").random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "stub injected error", "type": "server_error"}},
+                status_code=500,
+            )
+        content, usage = _reply(body, config)
+        stats["prompt_tokens"] += usage["prompt_tokens"]
+        stats["completion_tokens"] += usage["completion_tokens"]
+        if body.get("stream"):
+            return StreamingResponse(_stream(body, content, usage), media_type="text/event-stream")
+        if config.tokens_per_second:
+            await asyncio.sleep(usage["completion_tokens"] / config.tokens_per_second)
+        return _completion(body, content, usage)
+
+    return app
+
+
+class StubServer:
+    """The stub app served by uvicorn on a background thread (``with StubServer(...)``)."""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.app = create_stub_app(config)
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self.host, self.port = self._socket.getsockname()[:2]
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, log_level="warning", access_log=False)
+        )
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.app.state.stats)
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self._socket.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each reply")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=0.0, help="Output pace (0: instant)"
+    )
+    parser.add_argument("--rows", type=int, default=10, help="Rows per extraction reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        rows=args.rows,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
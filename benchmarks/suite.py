@@ -0,0 +1,346 @@
+"""Benchmark suite: ``run_pipeline``, the FastAPI app and the batch CLI against a stub LLM.
+
+Starts ``stub_llm_server`` on a free local port and points
+``DX_OPENAI_BASE_URL`` at it, so every model call goes over HTTP through the
+real ``ChatOpenAI`` client with no network access. Every target runs at each
+concurrency level and document size (generated text PDFs, so large ones take
+the chunked branch). Summaries go through the model and the summary/result
+caches are off, so each request pays the full pipeline cost.
+
+Each scenario reports throughput, p50/p95/p99 latency, failed and degraded runs
+(degraded runs finished with warnings, e.g. after injected errors), peak RSS (as
+``audit.peak_rss_bytes`` samples it at node boundaries) and
+per-node p50/p95 timings from ``audit.timings_ms``. The report is written as JSON
+(by default ``benchmarks/results/<commit>.json``). Pass ``--baseline`` with an
+earlier report to add throughput and p95 ratios per scenario.
+
+    python benchmarks/suite.py --targets pipeline,api,cli --concurrency 1,8 --pages 2,60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import StubConfig, StubServer  # noqa: E402
+
+from xtractor.cli.batch import percentile  # noqa: E402
+
+TARGETS = ("pipeline", "api", "cli")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SCHEMA = {
+    "key": "asset_register",
+    "fields": [
+        {"name": "UNIQUE KKS", "description": "Unique identifier"},
+        {"name": "DESCRIPTION", "description": "Equipment description"},
+        {"name": "LOCATION", "description": "Building and room"},
+    ],
+}
+PAYLOAD = {"outputFormat": "json", "schema": SCHEMA}
+
+
+def _pdf(pages: int, tag: str) -> bytes:
+    """A text-layer PDF with ``pages`` pages of register lines, distinct per ``tag``."""
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # the page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [f"Asset register {tag} page {page + 1}"] + [
+            f"10LAB{page:03d}AA{row:03d} Pump motor {row} Building {page % 7} Room {row}"
+            for row in range(30)
+        ]
+        text = " T* ".join(f"({line}) Tj" for line in lines)
+        stream = f"BT /F1 9 Tf 12 TL 40 800 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 3 0 R >> >> >>" % (len(objects))
+        )
+    refs = " ".join(f"{kid} 0 R" for kid in kids)
+    objects[1] = f"<< /Type /Pages /Kids [{refs}] /Count {pages} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def _sample(elapsed_s: float, response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"ms": elapsed_s * 1000, "response": response}
+
+
+def _run_pipeline(documents: List[bytes], concurrency: int) -> List[Dict[str, Any]]:
+    from xtractor.api.formats import response_body
+    from xtractor.pipeline.runner import run_pipeline
+
+    def one(index: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            state = run_pipeline(
+                file_bytes=documents[index], filename=f"doc-{index}.pdf", payload=PAYLOAD
+            )
+        except Exception:
+            return _sample(time.perf_counter() - started, None)
+        return _sample(time.perf_counter() - started, response_body(state, "json"))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(len(documents))))
+
+
+async def _run_api(documents: List[bytes], concurrency: int) -> List[Dict[str, Any]]:
+    from xtractor.adapters.llm import get_model_registry
+    from xtractor.api.app import create_app
+
+    transport = httpx.ASGITransport(app=create_app())
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/v1/extract",
+                    files={"file": (f"doc-{index}.pdf", documents[index], "application/pdf")},
+                    data={"payload": json.dumps(PAYLOAD)},
+                    timeout=None,
+                )
+                body = response.json() if response.status_code == 200 else None
+                return _sample(time.perf_counter() - started, body)
+
+        try:
+            return await asyncio.gather(*(one(index) for index in range(len(documents))))
+        finally:
+            # ASGITransport skips the lifespan; pooled async clients must not outlive this loop.
+            await get_model_registry().aclose()
+
+
+def _run_cli(
+    documents: List[bytes], concurrency: int, workdir: Path, env: Dict[str, str]
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    source = workdir / "documents"
+    source.mkdir(parents=True)
+    for index, document in enumerate(documents):
+        (source / f"doc-{index:04d}.pdf").write_bytes(document)
+    payload_path = workdir / "payload.json"
+    payload_path.write_text(json.dumps(PAYLOAD))
+    output = workdir / "results.ndjson"
+    command = [sys.executable, "-m", "xtractor.cli.main", "batch", str(source)]
+    command += ["--schema", str(payload_path), "--output", str(output)]
+    command += ["--concurrency", str(concurrency)]
+
+    started = time.perf_counter()
+    # The batch summary is the last line the CLI writes to stderr.
+    process = subprocess.run(command, env=env, capture_output=True, text=True)
+    process_s = time.perf_counter() - started
+
+    samples = []
+    if output.exists():
+        for line in output.read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            samples.append({"ms": record["elapsed_ms"], "response": record.get("response")})
+    lines = process.stderr.strip().splitlines()
+    try:
+        summary = json.loads(lines[-1]) if lines else {}
+    except json.JSONDecodeError:
+        summary = {}
+    return samples, {"process_s": round(process_s, 3), "wall_s": summary.get("wall_s")}
+
+
+def _node_timings(responses: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    per_node: Dict[str, List[float]] = {}
+    for response in responses:
+        for node, ms in ((response.get("audit") or {}).get("timings_ms") or {}).items():
+            per_node.setdefault(node, []).append(ms)
+    return {
+        node: {"p50_ms": percentile(values, 0.50), "p95_ms": percentile(values, 0.95)}
+        for node, values in per_node.items()
+    }
+
+
+def _report(samples: List[Dict[str, Any]], wall_s: float) -> Dict[str, Any]:
+    latencies = [sample["ms"] for sample in samples]
+    responses = [sample["response"] for sample in samples if sample["response"]]
+    rss = [(response.get("audit") or {}).get("peak_rss_bytes") or 0 for response in responses]
+    return {
+        "requests": len(samples),
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "failed": len(samples) - len(responses),
+        "degraded": sum(1 for response in responses if response.get("warnings")),
+        "peak_rss_bytes": max(rss, default=0),
+        "nodes": _node_timings(responses),
+    }
+
+
+def _scenario(
+    target: str, concurrency: int, pages: int, requests: int, env: Dict[str, str]
+) -> Dict[str, Any]:
+    documents = [
+        _pdf(pages, f"{target}-{concurrency}-{pages}-{index}") for index in range(requests)
+    ]
+    started = time.perf_counter()
+    extra: Dict[str, Any] = {}
+    if target == "pipeline":
+        samples = _run_pipeline(documents, concurrency)
+    elif target == "api":
+        samples = asyncio.run(_run_api(documents, concurrency))
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            samples, extra = _run_cli(documents, concurrency, Path(workdir), env)
+    wall_s = time.perf_counter() - started
+    report = _report(samples, extra.pop("wall_s", None) or wall_s)
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "pages": pages,
+        "document_bytes": len(documents[0]),
+        **report,
+        **extra,
+    }
+
+
+def _compare(scenarios: List[Dict[str, Any]], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {
+        (entry["target"], entry["concurrency"], entry["pages"]): entry
+        for entry in baseline.get("scenarios", [])
+    }
+    for entry in scenarios:
+        before = previous.get((entry["target"], entry["concurrency"], entry["pages"]))
+        if not before:
+            continue
+        entry["vs_baseline"] = {
+            "commit": baseline.get("commit"),
+            "throughput_ratio": round(entry["throughput_rps"] / before["throughput_rps"], 3)
+            if before["throughput_rps"]
+            else None,
+            "p95_ratio": round(entry["p95_ms"] / before["p95_ms"], 3) if before["p95_ms"] else None,
+        }
+
+
+def _commit() -> Dict[str, Any]:
+    root = Path(__file__).resolve().parent.parent
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                cwd=root,
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+        )
+    except OSError:
+        sha, dirty = "", False
+    return {"commit": sha or "unknown", "dirty": dirty}
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", default=",".join(TARGETS), help="pipeline, api and/or cli")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8])
+    parser.add_argument("--pages", type=_int_list, default=[2, 60], help="Pages per document")
+    parser.add_argument("--requests", type=int, default=16, help="Documents per scenario")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per call")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--rows", type=int, default=10, help="Rows per stub extraction reply")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Report path (default: results/<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        rows=args.rows,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    with StubServer(config) as stub, tempfile.TemporaryDirectory() as temp_dir:
+        settings_env = {
+            "DX_OPENAI_BASE_URL": stub.base_url,
+            "DX_OPENAI_API_KEY": "stub",
+            "DX_TEMP_DIR": temp_dir,
+            "DX_FILE_UNDERSTANDING_MODE": "llm",
+            "DX_SUMMARY_CACHE_ENABLED": "false",
+            "DX_RESULT_CACHE_ENABLED": "false",
+        }
+        os.environ.update(settings_env)
+        from xtractor.config.settings import get_settings
+
+        get_settings.cache_clear()
+        env = dict(os.environ)
+        scenarios = [
+            _scenario(target, concurrency, pages, args.requests, env)
+            for target in targets
+            for pages in args.pages
+            for concurrency in args.concurrency
+        ]
+        stub_stats = stub.stats
+
+    if args.baseline:
+        _compare(scenarios, args.baseline)
+    commit = _commit()
+    report = {
+        **commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "stub": {**asdict(config), **stub_stats},
+        "settings": {key: value for key, value in settings_env.items() if key != "DX_TEMP_DIR"},
+        "scenarios": scenarios,
+    }
+    output = args.output or RESULTS_DIR / f"{commit['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report, indent=2))
+    print(f"report written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
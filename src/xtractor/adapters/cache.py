@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    by_tier: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "by_tier": dict(self.by_tier),
+        }
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with optional per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ByteLRUCache:
+    """Thread-safe LRU bounded by the total serialized size of its values."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, size: int) -> bool:
+        """Store ``value`` accounted as ``size`` bytes; returns False when it can never fit."""
+
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and self._entries:
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk JSON cache tier bounded by entry count and TTL."""
+
+    def __init__(self, path: Path, max_entries: int, ttl_seconds: float | None = None) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.evictions = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def get(self, key: str) -> Any | None:
+        now = time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cursor = conn.execute(
+                "DELETE FROM entries WHERE stored_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+        cursor = conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evictions += max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+class TieredCache:
+    """Memory-first cache that falls through to an optional disk tier.
+
+    Disk hits are promoted into memory. Values must be JSON-serialisable when a
+    disk tier is configured.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def _record(self, tier: str | None) -> None:
+        if tier is None:
+            self.stats.misses += 1
+            return
+        self.stats.hits += 1
+        self.stats.by_tier[tier] = self.stats.by_tier.get(tier, 0) + 1
+
+    def lookup(self, key: str) -> tuple[Any | None, str | None]:
+        """Return ``(value, tier)`` where tier is ``memory``/``disk`` or ``None`` on miss."""
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._record("memory")
+            return value, "memory"
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._record("disk")
+                return value, "disk"
+        self._record(None)
+        return None, None
+
+    def get(self, key: str) -> Any | None:
+        return self.lookup(key)[0]
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    async def alookup(self, key: str) -> tuple[Any | None, str | None]:
+        if self.disk is None:
+            return self.lookup(key)
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        if self.disk is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.stats.as_dict()
+        stats["evictions"] = self.memory.evictions + (self.disk.evictions if self.disk else 0)
+        stats["entries"] = len(self.memory)
+        return stats
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def build_tiered_cache(
+    *,
+    max_entries: int,
+    ttl_seconds: float | None,
+    disk_path: Path | None = None,
+    disk_max_entries: int | None = None,
+) -> TieredCache:
+    memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    disk = None
+    if disk_path is not None:
+        disk = SQLiteCache(
+            disk_path,
+            max_entries=disk_max_entries or max_entries,
+            ttl_seconds=ttl_seconds,
+        )
+    return TieredCache(memory, disk)
+
+
+__all__ = [
+    "ByteLRUCache",
+    "CacheStats",
+    "LRUCache",
+    "SQLiteCache",
+    "TieredCache",
+    "build_tiered_cache",
+]
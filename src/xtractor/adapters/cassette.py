@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from time import time
+from typing import Any, Dict, List, Mapping, Sequence
+
+from langchain_core.messages import AIMessage
+
+from xtractor.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Invocation options that change how a reply is delivered, not what it says.
+_TRANSPORT_OPTIONS = frozenset({"stream_usage"})
+# Content-part keys that differ between runs of the same request (temp upload names).
+_VOLATILE_PART_KEYS = frozenset({"filename"})
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when no recorded response matches a model request."""
+
+
+@dataclass(frozen=True)
+class Interaction:
+    """A recorded response and its delays, already scaled for replay."""
+
+    message: AIMessage
+    latency_s: float
+    first_chunk_s: float | None = None
+
+
+def _content_payload(content: Any) -> Any:
+    if not isinstance(content, list):
+        return content
+    return [
+        {key: value for key, value in part.items() if key not in _VOLATILE_PART_KEYS}
+        if isinstance(part, Mapping)
+        else part
+        for part in content
+    ]
+
+
+def _message_payload(message: Any) -> Any:
+    if isinstance(message, str):
+        return message
+    if isinstance(message, Mapping):
+        return {**message, "content": _content_payload(message.get("content"))}
+    return {
+        "type": getattr(message, "type", ""),
+        "content": _content_payload(getattr(message, "content", "")),
+    }
+
+
+def fingerprint(model: Any, messages: Sequence[Any], options: Mapping[str, Any]) -> str:
+    """Content hash of a model request: model name, messages and reply-shaping options."""
+
+    material = {
+        "model": getattr(model, "model_name", None) or getattr(model, "model", None) or "",
+        "messages": [_message_payload(message) for message in messages],
+        "options": {
+            key: value for key, value in options.items() if key not in _TRANSPORT_OPTIONS
+        },
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _response_payload(raw: Any) -> Dict[str, Any]:
+    return {
+        "content": getattr(raw, "content", raw),
+        "usage_metadata": getattr(raw, "usage_metadata", None),
+        "response_metadata": dict(getattr(raw, "response_metadata", None) or {}),
+    }
+
+
+class CassetteStore:
+    """SQLite store of recorded model responses, replayed by request fingerprint.
+
+    Every recorded call is kept with its observed latency (and time to first
+    chunk when streamed). Replay serves the recordings of a fingerprint in
+    recording order, cycling when a request repeats more often than it was
+    recorded, and scales the recorded delays by ``time_scale``.
+    """
+
+    def __init__(self, path: Path, *, replay: bool, time_scale: float = 1.0) -> None:
+        self.path = path
+        self.replaying = replay
+        self.time_scale = time_scale
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._cursors: Dict[str, int] = {}
+        self._recordings: Dict[str, List[tuple[str, float, float | None]]] = {}
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS interactions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, fingerprint TEXT NOT NULL,"
+                " model TEXT NOT NULL, recorded_at REAL NOT NULL, latency_ms REAL NOT NULL,"
+                " first_chunk_ms REAL, response TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS interactions_fingerprint"
+                " ON interactions (fingerprint, id)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def record(
+        self,
+        key: str,
+        model: Any,
+        raw: Any,
+        latency_s: float,
+        first_chunk_s: float | None = None,
+    ) -> None:
+        name = getattr(model, "model_name", None) or getattr(model, "model", None) or ""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO interactions"
+                " (fingerprint, model, recorded_at, latency_ms, first_chunk_ms, response)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    str(name),
+                    time(),
+                    latency_s * 1000,
+                    first_chunk_s * 1000 if first_chunk_s is not None else None,
+                    json.dumps(_response_payload(raw), ensure_ascii=False, default=str),
+                ),
+            )
+            self.stats["recorded"] += 1
+
+    def replay(self, key: str) -> Interaction:
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if recordings is None:
+                with self._connect() as conn:
+                    recordings = conn.execute(
+                        "SELECT response, latency_ms, first_chunk_ms FROM interactions"
+                        " WHERE fingerprint = ? ORDER BY id",
+                        (key,),
+                    ).fetchall()
+                self._recordings[key] = recordings
+            if not recordings:
+                self.stats["misses"] += 1
+                raise CassetteMissError(f"No recorded model response for request {key[:12]}")
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            self.stats["replayed"] += 1
+        response, latency_ms, first_chunk_ms = recordings[index % len(recordings)]
+        payload = json.loads(response)
+        message = AIMessage(
+            content=payload["content"],
+            usage_metadata=payload.get("usage_metadata"),
+            response_metadata=payload.get("response_metadata") or {},
+        )
+        return Interaction(
+            message=message,
+            latency_s=latency_ms / 1000 * self.time_scale,
+            first_chunk_s=(
+                first_chunk_ms / 1000 * self.time_scale if first_chunk_ms is not None else None
+            ),
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": "replay" if self.replaying else "record", **self.stats}
+
+
+@lru_cache(maxsize=1)
+def get_cassette_store() -> CassetteStore | None:
+    """The process-wide cassette, or ``None`` unless recording or replaying is configured."""
+
+    settings = get_settings()
+    if settings.llm_cassette_mode == "off":
+        return None
+    path = settings.llm_cassette_path or settings.temp_dir / "cassettes" / "cassette.sqlite"
+    logger.info("LLM cassette %s mode using %s", settings.llm_cassette_mode, path)
+    return CassetteStore(
+        path,
+        replay=settings.llm_cassette_mode == "replay",
+        time_scale=settings.llm_cassette_time_scale,
+    )
+
+
+__all__ = [
+    "CassetteMissError",
+    "CassetteStore",
+    "Interaction",
+    "fingerprint",
+    "get_cassette_store",
+]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import codecs
+import mmap
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class DocumentHandle:
+    """Memory-mapped view of a persisted upload shared by every node of a run.
+
+    The file is mapped on first access and base64-encoded at most once, so the
+    summary and extraction calls reuse a single encoded copy instead of each
+    reading and encoding the document again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._handle: BinaryIO | None = None
+        self._mapped: mmap.mmap | None = None
+        self._encoded: str | None = None
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    @property
+    def data(self) -> memoryview:
+        """Zero-copy view over the document bytes; call ``release()`` on it when done."""
+
+        with self._lock:
+            return self._map()
+
+    def _map(self) -> memoryview:
+        if self._closed:
+            raise ValueError(f"Document handle for {self.path.name} already released")
+        if self._mapped is None:
+            handle = self.path.open("rb")
+            try:
+                self._mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mapped
+                handle.close()
+                return memoryview(b"")
+            self._handle = handle
+        return memoryview(self._mapped)
+
+    def base64(self) -> str:
+        """Return the base64 encoding of the document, computing it once per run."""
+
+        with self._lock:
+            if self._encoded is None:
+                view = self._map()
+                try:
+                    self._encoded = base64.b64encode(view).decode("ascii")
+                finally:
+                    view.release()
+            return self._encoded
+
+    async def abase64(self) -> str:
+        if self._encoded is not None:
+            return self._encoded
+        return await asyncio.to_thread(self.base64)
+
+    def derived(self, key: str, factory: Callable[["DocumentHandle"], T]) -> T:
+        """Compute a per-run artefact (e.g. the text layer) once and share it."""
+
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self)
+            return self._derived[key]
+
+    def preview_text(self, limit: int = 600, chunk_size: int = 64 * 1024) -> str:
+        """Decode whitespace-normalized text from the head of the document.
+
+        Reads in chunks and stops once ``limit`` characters are collected, so
+        large binaries never get decoded in full.
+        """
+
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        collected = ""
+        with self._lock:
+            view = self._map()
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    collected += decoder.decode(view[offset : offset + chunk_size])
+                    normalized = " ".join(collected.split())
+                    if len(normalized) >= limit:
+                        return normalized[:limit]
+            finally:
+                view.release()
+        return " ".join(collected.split())[:limit]
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._encoded = None
+            self._derived.clear()
+            if self._mapped is not None:
+                try:
+                    self._mapped.close()
+                except BufferError:  # a caller still holds a view; GC unmaps it later
+                    pass
+                self._mapped = None
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+_HANDLES: Dict[str, DocumentHandle] = {}
+_HANDLES_LOCK = threading.Lock()
+
+
+def open_document(file_ref: str) -> DocumentHandle:
+    """Return the shared handle for ``file_ref``, creating it on first use."""
+
+    with _HANDLES_LOCK:
+        handle = _HANDLES.get(file_ref)
+        if handle is None:
+            handle = DocumentHandle(Path(file_ref))
+            _HANDLES[file_ref] = handle
+        return handle
+
+
+def release_document(file_ref: str | None) -> None:
+    """Drop the mapping and cached encoding for ``file_ref``; safe to call twice."""
+
+    if not file_ref:
+        return
+    with _HANDLES_LOCK:
+        handle = _HANDLES.pop(file_ref, None)
+    if handle is not None:
+        handle.close()
+
+
+__all__ = ["DocumentHandle", "open_document", "release_document"]
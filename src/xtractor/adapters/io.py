@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import mimetypes
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, BinaryIO, Iterable, Protocol
 from uuid import uuid4
 
 
@@ -12,15 +15,116 @@ ALLOWED_MIME_TYPES: set[str] = {
 }
 
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """An upload persisted to the temp directory together with its digest."""
+
+    path: Path
+    sha256: str
+    size: int
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+def _temp_path(original_name: str | None, temp_dir: Path) -> Path:
+    suffix = Path(original_name or "uploaded").suffix
+    return temp_dir / f"dx-{uuid4().hex}{suffix}"
+
+
 def persist_temp_file(data: bytes, original_name: str | None, temp_dir: Path) -> Path:
     """Persist raw bytes into the configured temp directory."""
 
-    suffix = Path(original_name or "uploaded").suffix
-    handle = temp_dir / f"dx-{uuid4().hex}{suffix}"
+    handle = _temp_path(original_name, temp_dir)
     handle.write_bytes(data)
     return handle
 
 
+def _write_chunk(handle: BinaryIO, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+def _check_size(size: int, max_bytes: int | None) -> None:
+    if max_bytes is not None and size > max_bytes:
+        raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+
+
+def persist_stream(
+    chunks: Iterable[bytes],
+    original_name: str | None,
+    temp_dir: Path,
+    max_bytes: int | None = None,
+) -> StoredUpload:
+    """Write ``chunks`` to the temp directory, hashing them in the same pass.
+
+    The partial file is removed when the size limit is exceeded or writing fails.
+    """
+
+    path = _temp_path(original_name, temp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with path.open("wb") as handle:
+            for chunk in chunks:
+                size += len(chunk)
+                _check_size(size, max_bytes)
+                _write_chunk(handle, digest, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return StoredUpload(path=path, sha256=digest.hexdigest(), size=size)
+
+
+async def persist_stream_async(
+    source: AsyncReadable,
+    original_name: str | None,
+    temp_dir: Path,
+    max_bytes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> StoredUpload:
+    """Stream an async reader (e.g. ``UploadFile``) to disk without buffering it whole."""
+
+    path = _temp_path(original_name, temp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    handle = await asyncio.to_thread(path.open, "wb")
+    try:
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            _check_size(size, max_bytes)
+            await asyncio.to_thread(_write_chunk, handle, digest, chunk)
+    except BaseException:
+        handle.close()
+        path.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(handle.close)
+    return StoredUpload(path=path, sha256=digest.hexdigest(), size=size)
+
+
+async def persist_temp_file_async(data: bytes, original_name: str | None, temp_dir: Path) -> Path:
+    """Persist raw bytes without blocking the event loop."""
+
+    return await asyncio.to_thread(persist_temp_file, data, original_name, temp_dir)
+
+
+async def read_bytes_async(path: Path) -> bytes:
+    """Read a file in a worker thread so callers on the event loop stay responsive."""
+
+    return await asyncio.to_thread(path.read_bytes)
+
+
 def sniff_mime(path: Path, fallback: str | None = None) -> str:
     """Best-effort mime detection relying on file extension."""
 
@@ -38,7 +142,7 @@ def ensure_allowed_mime(mime: str) -> None:
         raise ValueError(f"Unsupported mime type '{mime}'. Allowed: {allowed}")
 
 
-def read_chunks(path: Path, chunk_size: int = 1024 * 1024) -> Iterable[bytes]:
+def read_chunks(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterable[bytes]:
     with path.open("rb") as handle:
         while True:
             chunk = handle.read(chunk_size)
@@ -49,7 +153,13 @@ def read_chunks(path: Path, chunk_size: int = 1024 * 1024) -> Iterable[bytes]:
 
 __all__ = [
     "ALLOWED_MIME_TYPES",
+    "StoredUpload",
+    "UploadTooLargeError",
+    "persist_stream",
+    "persist_stream_async",
     "persist_temp_file",
+    "persist_temp_file_async",
+    "read_bytes_async",
     "sniff_mime",
     "ensure_allowed_mime",
     "read_chunks",
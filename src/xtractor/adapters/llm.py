@@ -1,88 +1,628 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import math
+import threading
+import time
+from contextlib import AbstractContextManager
 from dataclasses import dataclass
-from typing import Any, Mapping, Protocol, Sequence
+from typing import Any, AsyncIterator, Callable, Mapping, Protocol, Sequence
 
-from langchain_core.messages import BaseMessage
+import httpx
+from langchain_core.messages import AIMessageChunk, BaseMessage
 from langchain_openai import ChatOpenAI
+from openai import APITimeoutError
 
 
+from xtractor.adapters.cassette import Interaction, fingerprint, get_cassette_store
+from xtractor.adapters.resilience import (
+    CircuitOpenError,
+    acall_with_resilience,
+    astream_with_resilience,
+    call_with_resilience,
+)
 from xtractor.config.settings import Settings, get_settings
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.observability.tracing import LLM, Span, current_span, span
+from xtractor.utils.json_repair import TRUNCATED, parse_json_lenient
+from xtractor.utils.json_stream import RowStreamParser
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+# Failures after which a call is retried on the fallback model.
+FALLBACK_ERRORS = (APITimeoutError, httpx.TimeoutException)
+# The primary's open breaker fails a call before it is made; it switches too.
+SWITCH_ERRORS = FALLBACK_ERRORS + (CircuitOpenError,)
+
 class JSONChatModel(Protocol):
     """Protocol implemented by LangChain chat models we rely on."""
 
     def invoke(self, messages: Sequence[BaseMessage | Mapping[str, Any] | str], **kwargs: Any) -> Any: ...
 
+    async def ainvoke(
+        self, messages: Sequence[BaseMessage | Mapping[str, Any] | str], **kwargs: Any
+    ) -> Any: ...
+
+
+@dataclass
+class TokenUsage:
+    """Provider-reported token counts of one model call (``None`` where not reported).
+
+    ``cached`` prompt tokens are part of ``input``; ``reasoning`` tokens are
+    part of ``output``, as providers bill them.
+    """
+
+    model: str | None = None
+    input: int | None = None
+    output: int | None = None
+    cached: int | None = None
+    reasoning: int | None = None
+
+    @classmethod
+    def from_message(cls, raw: Any) -> TokenUsage | None:
+        usage = getattr(raw, "usage_metadata", None)
+        if not isinstance(usage, Mapping):
+            return None
+        input_details = usage.get("input_token_details") or {}
+        output_details = usage.get("output_token_details") or {}
+        metadata = getattr(raw, "response_metadata", None) or {}
+        return cls(
+            model=metadata.get("model_name") or metadata.get("model"),
+            input=usage.get("input_tokens"),
+            output=usage.get("output_tokens"),
+            cached=input_details.get("cache_read"),
+            reasoning=output_details.get("reasoning"),
+        )
+
+    def cost(self, prices: Mapping[str, Mapping[str, float]]) -> float | None:
+        """USD cost from per-million-token ``prices``, or ``None`` for unpriced models."""
+
+        price = model_price(self.model, prices)
+        if price is None or self.input is None:
+            return None
+        cached = min(self.cached or 0, self.input)
+        input_price = price.get("input", 0.0)
+        total = (
+            (self.input - cached) * input_price
+            + cached * price.get("cached_input", input_price)
+            + (self.output or 0) * price.get("output", 0.0)
+        )
+        return total / 1_000_000
+
+
+def model_price(
+    model: str | None, prices: Mapping[str, Mapping[str, float]]
+) -> Mapping[str, float] | None:
+    """Prices for ``model``: an exact entry, else the longest entry it starts with.
+
+    Providers report dated snapshots (``gpt-4o-mini-2024-07-18``), so an entry
+    for the family name covers them.
+    """
+
+    if not model:
+        return None
+    if model in prices:
+        return prices[model]
+    matches = [name for name in prices if model.startswith(name)]
+    return prices[max(matches, key=len)] if matches else None
+
 
 @dataclass
 class ModelInvocationResult:
     raw: Any
     parsed: Mapping[str, Any]
+    # "repaired" or "truncated" when the JSON had to be fixed up locally.
+    repair: str | None = None
+    usage: TokenUsage | None = None
 
 
 class MissingLLMProviderError(RuntimeError):
     """Raised when required multimodal provider packages are missing."""
 
 
-def build_multimodal_model(settings: Settings | None = None) -> JSONChatModel:
-    """Instantiate the default multimodal model based on configuration."""
+def _pool_key(settings: Settings) -> tuple[Any, ...]:
+    return (
+        settings.llm_timeout_seconds,
+        settings.llm_connect_timeout_seconds,
+        settings.llm_max_connections,
+        settings.llm_max_keepalive_connections,
+        settings.llm_keepalive_expiry_seconds,
+    )
+
+
+def _registry_key(settings: Settings) -> tuple[Any, ...]:
+    return (
+        settings.mm_model,
+        settings.reasoning_effort,
+        settings.fallback_model,
+        settings.fallback_reasoning_effort,
+        settings.openai_api_key,
+        settings.openai_base_url,
+    ) + _pool_key(settings)
+
+
+def _model_name(model: Any) -> str:
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or ""
+
+
+class FallbackChatModel:
+    """Chat model that repeats a call on ``fallback`` when ``primary`` times out.
+
+    Each model is called under its own deadline, retry policy and breaker: a
+    primary timeout is charged to the primary's breaker and handed over
+    without a retry, the fallback gets whatever is left of the deadline, and
+    while the primary's breaker is open calls go straight to the fallback.
+    A stream falls back only if the primary fails before its first chunk;
+    rows already handed on cannot be taken back. The switch is noted on the
+    current ``llm`` span and counted in ``dx_llm_fallbacks_total``.
+    """
+
+    def __init__(self, primary: JSONChatModel, fallback: JSONChatModel) -> None:
+        self.primary = primary
+        self.fallback = fallback
+
+    @property
+    def model_name(self) -> str:
+        return _model_name(self.primary)
+
+    def _switch(self, exc: BaseException) -> None:
+        name = _model_name(self.fallback)
+        logger.warning("%s failed (%s); retrying on %s", self.model_name, exc, name)
+        active = current_span()
+        if active is not None:
+            active.set("fallback_model", name)
+        get_metrics_registry().inc(
+            "dx_llm_fallbacks_total",
+            help="Model calls repeated on the fallback model after a timeout or open breaker",
+            model=self.model_name,
+        )
+
+    def invoke(self, messages: Sequence[Any], **kwargs: Any) -> Any:
+        try:
+            return _invoke(self.primary, messages, kwargs, hand_off=FALLBACK_ERRORS)
+        except SWITCH_ERRORS as exc:
+            self._switch(exc)
+        return _invoke(self.fallback, messages, kwargs)
+
+    async def ainvoke(self, messages: Sequence[Any], **kwargs: Any) -> Any:
+        try:
+            return await _ainvoke(self.primary, messages, kwargs, hand_off=FALLBACK_ERRORS)
+        except SWITCH_ERRORS as exc:
+            self._switch(exc)
+        return await _ainvoke(self.fallback, messages, kwargs)
+
+    async def astream(self, messages: Sequence[Any], **kwargs: Any) -> AsyncIterator[Any]:
+        started = False
+        try:
+            async for chunk in _astream(self.primary, messages, kwargs, hand_off=FALLBACK_ERRORS):
+                started = True
+                yield chunk
+            return
+        except SWITCH_ERRORS as exc:
+            if started:
+                raise
+            self._switch(exc)
+        async for chunk in _astream(self.fallback, messages, kwargs):
+            yield chunk
 
-    settings = settings or get_settings()
 
-    client = ChatOpenAI(
-        model=settings.mm_model,
-        temperature=0,
-        api_key=settings.openai_api_key,
-        base_url=settings.openai_base_url,
-        extra_body={
-            "reasoning": {
-                "effort": "low"  # bisa 'low', 'medium', atau 'high'
-            }
+class ModelRegistry:
+    """Process-wide cache of chat models sharing keep-alive HTTP connection pools.
+
+    Models are keyed by the settings that shape them, so every node call with the
+    same configuration reuses one client (and its warm TLS connections) instead
+    of building a new ``ChatOpenAI`` per invocation.
+    """
+
+    def __init__(self) -> None:
+        self._models: dict[tuple[Any, ...], JSONChatModel] = {}
+        self._http_clients: dict[tuple[Any, ...], httpx.Client] = {}
+        self._async_http_clients: dict[tuple[Any, ...], httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pool_options(settings: Settings) -> dict[str, Any]:
+        return {
+            "limits": httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+            ),
+            "timeout": httpx.Timeout(
+                settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds
+            ),
         }
-    )
-    return client
 
-def invoke_json(
-    model: JSONChatModel,
-    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
-    response_format: Mapping[str, Any] | None = None,
-    **kwargs: Any,
-) -> ModelInvocationResult:
-    """Invoke a chat model expecting JSON output and parse the response."""
+    def _chat(self, settings: Settings, model: str, reasoning_effort: str) -> JSONChatModel:
+        pool_key = _pool_key(settings)
+        http_client = self._http_clients.get(pool_key)
+        if http_client is None:
+            http_client = httpx.Client(**self._pool_options(settings))
+            self._http_clients[pool_key] = http_client
+        async_http_client = self._async_http_clients.get(pool_key)
+        if async_http_client is None:
+            async_http_client = httpx.AsyncClient(**self._pool_options(settings))
+            self._async_http_clients[pool_key] = async_http_client
+
+        return ChatOpenAI(
+            model=model,
+            temperature=0,
+            # Replayed runs never reach the provider, so they need no credentials.
+            api_key=settings.openai_api_key
+            or ("replay" if settings.llm_cassette_mode == "replay" else None),
+            base_url=settings.openai_base_url,
+            timeout=settings.llm_timeout_seconds,
+            # Retries are made by the resilience layer, within the request deadline.
+            max_retries=0,
+            http_client=http_client,
+            http_async_client=async_http_client,
+            extra_body={"reasoning": {"effort": reasoning_effort}} if reasoning_effort else None,
+        )
+
+    def _build(self, settings: Settings) -> JSONChatModel:
+        model = self._chat(settings, settings.mm_model, settings.reasoning_effort)
+        fallback = settings.fallback_model
+        if not fallback or fallback == settings.mm_model:
+            return model
+        effort = settings.fallback_reasoning_effort
+        if effort is None:
+            effort = settings.reasoning_effort
+        return FallbackChatModel(model, self._chat(settings, fallback, effort))
+
+    def get(self, settings: Settings) -> JSONChatModel:
+        key = _registry_key(settings)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._build(settings)
+                self._models[key] = model
+            return model
+
+    def close(self) -> None:
+        """Close pooled sync connections and forget cached models."""
+
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            self._http_clients.clear()
+            self._models.clear()
+
+    async def aclose(self) -> None:
+        """Close every pooled connection; call from the app shutdown hook."""
 
+        with self._lock:
+            async_clients = list(self._async_http_clients.values())
+            self._async_http_clients.clear()
+        for client in async_clients:
+            await client.aclose()
+        self.close()
+
+
+_REGISTRY = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _REGISTRY
+
+
+def build_multimodal_model(settings: Settings | None = None) -> JSONChatModel:
+    """Return the pooled multimodal model for the current configuration."""
+
+    settings = settings or get_settings()
+    return _REGISTRY.get(settings)
+
+
+def _invocation_kwargs(
+    response_format: Mapping[str, Any] | None, kwargs: Mapping[str, Any]
+) -> dict[str, Any]:
     invocation_kwargs = dict(kwargs)
     if response_format:
         invocation_kwargs.setdefault("response_format", response_format)
-    raw = model.invoke(messages, **invocation_kwargs)
+    return invocation_kwargs
+
 
+def _parse_response(raw: Any) -> ModelInvocationResult:
     if hasattr(raw, "content"):
         payload = raw.content  # type: ignore[assignment]
     else:
         payload = raw
 
+    repair = None
     if isinstance(payload, str):
         try:
-            parsed = json.loads(payload)
-        except json.JSONDecodeError as exc:  # pragma: no cover - defensive branch
-            raise ValueError(f"Model returned invalid JSON: {payload}") from exc
+            parsed, repair = parse_json_lenient(payload)
+        except ValueError as exc:
+            raise ValueError(f"Model returned invalid JSON: {payload[:200]}") from exc
     elif isinstance(payload, Mapping):
         parsed = payload  # already JSON-like
     else:  # pragma: no cover - defensive branch
         raise TypeError(f"Unsupported model response type: {type(payload)}")
+    if not isinstance(parsed, Mapping):
+        raise ValueError("Model returned JSON that is not an object")
+
+    return ModelInvocationResult(
+        raw=raw, parsed=parsed, repair=repair, usage=TokenUsage.from_message(raw)
+    )
+
+
+def _content_bytes(messages: Sequence[BaseMessage | Mapping[str, Any] | str]) -> int:
+    size = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            size += len(content.encode("utf-8"))
+        else:
+            size += len(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8"))
+    return size
 
-    return ModelInvocationResult(raw=raw, parsed=parsed)
+
+def _llm_span(model: JSONChatModel) -> AbstractContextManager[Span | None]:
+    return span("llm", LLM, model=_model_name(model), cassette=get_settings().llm_cassette_mode)
+
+
+def _annotate(
+    active: Span | None, messages: Sequence[Any], result: ModelInvocationResult
+) -> None:
+    """Attach request size and provider token counts to the model-call span."""
+
+    if active is None:
+        return
+    active.set("request_bytes", _content_bytes(messages))
+    usage = result.usage
+    if usage is not None:
+        active.set("tokens_input", usage.input)
+        active.set("tokens_output", usage.output)
+        active.set("tokens_cached", usage.cached)
+        active.set("tokens_reasoning", usage.reasoning)
+        active.set("cost_usd", usage.cost(get_settings().model_prices))
+    if getattr(result, "repair", None):
+        active.set("repair", result.repair)
+
+
+def _invoke(
+    model: JSONChatModel,
+    messages: Sequence[Any],
+    options: Mapping[str, Any],
+    hand_off: tuple[type[BaseException], ...] = (),
+) -> Any:
+    """One provider call, under the request deadline, retry policy and breaker.
+
+    A :class:`FallbackChatModel` applies these to each of its models itself.
+    """
+
+    if isinstance(model, FallbackChatModel):
+        return model.invoke(messages, **options)
+    return call_with_resilience(
+        _model_name(model),
+        lambda **timeout: model.invoke(messages, **options, **timeout),
+        hand_off,
+    )
+
+
+async def _ainvoke(
+    model: JSONChatModel,
+    messages: Sequence[Any],
+    options: Mapping[str, Any],
+    hand_off: tuple[type[BaseException], ...] = (),
+) -> Any:
+    if isinstance(model, FallbackChatModel):
+        return await model.ainvoke(messages, **options)
+    return await acall_with_resilience(
+        _model_name(model),
+        lambda **timeout: model.ainvoke(messages, **options, **timeout),
+        hand_off,
+    )
+
+
+def _astream(
+    model: JSONChatModel,
+    messages: Sequence[Any],
+    options: Mapping[str, Any],
+    hand_off: tuple[type[BaseException], ...] = (),
+) -> AsyncIterator[Any]:
+    if isinstance(model, FallbackChatModel):
+        return model.astream(messages, **options)
+    return astream_with_resilience(
+        _model_name(model),
+        lambda **timeout: model.astream(  # type: ignore[attr-defined]
+            messages, **options, **timeout
+        ),
+        hand_off,
+    )
+
+
+def invoke_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    response_format: Mapping[str, Any] | None = None,
+    **kwargs: Any,
+) -> ModelInvocationResult:
+    """Invoke a chat model expecting JSON output and parse the response.
+
+    With ``DX_LLM_CASSETTE_MODE`` set, the raw response is recorded to the
+    cassette, or served from it instead of calling the model. Provider calls
+    are bounded by the request deadline, retried and guarded by the model's
+    circuit breaker (see :mod:`xtractor.adapters.resilience`). Each call is
+    recorded as an ``llm`` span.
+    """
+
+    with _llm_span(model) as active:
+        result = _invoke_json(model, messages, _invocation_kwargs(response_format, kwargs))
+        _annotate(active, messages, result)
+        return result
+
+
+def _invoke_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    options: Mapping[str, Any],
+) -> ModelInvocationResult:
+    cassette = get_cassette_store()
+    if cassette is None:
+        return _parse_response(_invoke(model, messages, options))
+    key = fingerprint(model, messages, options)
+    if cassette.replaying:
+        interaction = cassette.replay(key)
+        time.sleep(interaction.latency_s)
+        return _parse_response(interaction.message)
+    started = time.perf_counter()
+    raw = _invoke(model, messages, options)
+    cassette.record(key, model, raw, time.perf_counter() - started)
+    return _parse_response(raw)
+
+
+async def ainvoke_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    response_format: Mapping[str, Any] | None = None,
+    **kwargs: Any,
+) -> ModelInvocationResult:
+    """Async counterpart of :func:`invoke_json` using the model's ``ainvoke``."""
+
+    with _llm_span(model) as active:
+        options = _invocation_kwargs(response_format, kwargs)
+        result = await _ainvoke_json(model, messages, options)
+        _annotate(active, messages, result)
+        return result
+
+
+async def _ainvoke_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    options: Mapping[str, Any],
+) -> ModelInvocationResult:
+    cassette = get_cassette_store()
+    if cassette is None:
+        return _parse_response(await _ainvoke(model, messages, options))
+    key = fingerprint(model, messages, options)
+    if cassette.replaying:
+        interaction = await asyncio.to_thread(cassette.replay, key)
+        await asyncio.sleep(interaction.latency_s)
+        return _parse_response(interaction.message)
+    started = time.perf_counter()
+    raw = await _ainvoke(model, messages, options)
+    await asyncio.to_thread(cassette.record, key, model, raw, time.perf_counter() - started)
+    return _parse_response(raw)
+
+
+async def _replayed_chunks(
+    interaction: Interaction, pieces: int = 8
+) -> AsyncIterator[AIMessageChunk]:
+    """A recorded response re-streamed: first chunk, then the rest spread over its latency."""
+
+    message = interaction.message
+    content = message.content if isinstance(message.content, str) else ""
+    first = interaction.first_chunk_s
+    first = interaction.latency_s if first is None else min(first, interaction.latency_s)
+    await asyncio.sleep(first)
+    step = max(1, math.ceil(len(content) / pieces))
+    gap = (interaction.latency_s - first) / pieces
+    for start in range(0, len(content), step):
+        if start:
+            await asyncio.sleep(gap)
+        yield AIMessageChunk(content=content[start : start + step])
+    yield AIMessageChunk(
+        content="" if content else message.content,
+        usage_metadata=message.usage_metadata,
+        response_metadata=message.response_metadata,
+    )
+
+
+async def astream_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    on_row: Callable[[Any], None],
+    response_format: Mapping[str, Any] | None = None,
+    **kwargs: Any,
+) -> ModelInvocationResult:
+    """Like :func:`ainvoke_json`, but streams tokens and hands each completed row to ``on_row``.
+
+    Rows are parsed incrementally from ``{"rows": [...]}`` while the model is
+    still generating. If the finished text cannot be parsed, the rows already
+    streamed are returned as a truncated result. Models without ``astream``
+    are invoked normally and their rows handed over at the end.
+    """
+
+    with _llm_span(model) as active:
+        options = _invocation_kwargs(response_format, kwargs)
+        if hasattr(model, "astream"):
+            result = await _astream_json(model, messages, on_row, options)
+        else:
+            result = await _ainvoke_json(model, messages, options)
+            for row in result.parsed.get("rows") or []:
+                on_row(row)
+        _annotate(active, messages, result)
+        return result
+
+
+async def _astream_json(
+    model: JSONChatModel,
+    messages: Sequence[BaseMessage | Mapping[str, Any] | str],
+    on_row: Callable[[Any], None],
+    options: dict[str, Any],
+) -> ModelInvocationResult:
+    parser = RowStreamParser()
+    streamed: list[Any] = []
+    message: Any = None
+    options.setdefault("stream_usage", True)
+    cassette = get_cassette_store()
+    key = fingerprint(model, messages, options) if cassette is not None else ""
+    if cassette is not None and cassette.replaying:
+        chunks = _replayed_chunks(await asyncio.to_thread(cassette.replay, key))
+    else:
+        chunks = _astream(model, messages, options)
+    started = time.perf_counter()
+    first_chunk_s: float | None = None
+    async for chunk in chunks:
+        if first_chunk_s is None:
+            first_chunk_s = time.perf_counter() - started
+            active = current_span()
+            if active is not None:
+                active.set("first_chunk_ms", round(first_chunk_s * 1000, 3))
+        # Chunks add up to the final message, usage metadata included.
+        message = chunk if message is None else message + chunk
+        if isinstance(chunk.content, str):
+            for row in parser.feed(chunk.content):
+                streamed.append(row)
+                on_row(row)
+    if message is None:
+        raise ValueError("Model returned an empty stream")
+    if cassette is not None and not cassette.replaying:
+        elapsed = time.perf_counter() - started
+        await asyncio.to_thread(cassette.record, key, model, message, elapsed, first_chunk_s)
+    try:
+        return _parse_response(message)
+    except ValueError:
+        if not streamed:
+            raise
+        return ModelInvocationResult(
+            raw=message,
+            parsed={"rows": streamed},
+            repair=TRUNCATED,
+            usage=TokenUsage.from_message(message),
+        )
 
 
 __all__ = [
+    "FALLBACK_ERRORS",
+    "FallbackChatModel",
     "JSONChatModel",
     "ModelInvocationResult",
     "MissingLLMProviderError",
+    "ModelRegistry",
+    "TokenUsage",
+    "ainvoke_json",
+    "astream_json",
     "build_multimodal_model",
+    "get_model_registry",
     "invoke_json",
+    "model_price",
 ]
@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from xtractor.config.settings import Settings, get_settings
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.observability.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+ErrorTypes = Tuple[Type[BaseException], ...]
+
+# Provider-side failures worth another attempt (timeouts are connection errors);
+# any other error is the request's own and is raised at once.
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError, httpx.TransportError)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_DEADLINE: ContextVar[float | None] = ContextVar("xtractor_deadline", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the model while its circuit breaker is open."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the request deadline leaves no time for a model call, or cuts one off."""
+
+
+@contextmanager
+def request_deadline(seconds: float | None) -> Iterator[None]:
+    """Bound the model calls made in the enclosed block to ``seconds`` from now.
+
+    The deadline travels with the context into node threads and tasks; a
+    nested deadline can only shorten the enclosing one.
+    """
+
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _DEADLINE.get()
+    token = _DEADLINE.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining_seconds() -> float | None:
+    """Seconds left before the request deadline (``None`` without a deadline)."""
+
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class RetryBudget:
+    """Token bucket capping retries at a share of all model calls, process-wide.
+
+    Every call earns ``ratio`` of a retry, up to ``burst`` banked; a retry
+    spends one. During an outage retries stop once the bank is empty instead
+    of multiplying the load on the provider.
+    """
+
+    def __init__(self, ratio: float, burst: int) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(float(self.burst), self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for the calls to one model.
+
+    After ``threshold`` failed attempts in a row (retries count) the breaker
+    opens and calls fail at once with :class:`CircuitOpenError`. After
+    ``reset_seconds`` a single probe call is let through: success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, model: str, threshold: int, reset_seconds: float) -> None:
+        self.model = model
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self) -> None:
+        get_metrics_registry().set(
+            "dx_llm_breaker_state",
+            _STATE_VALUES[self.state],
+            help="Circuit breaker state per model (0 closed, 1 half open, 2 open)",
+            model=self.model,
+        )
+
+    def _move(self, state: str) -> None:
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            get_metrics_registry().inc(
+                "dx_llm_breaker_trips_total", help="Circuit breaker openings", model=self.model
+            )
+            logger.warning(
+                "Circuit breaker for %s opened after %d failures", self.model, self._failures
+            )
+        self.state = state
+        self._publish()
+
+    def allow(self) -> bool:
+        """Claim a call: ``True`` lets it through, ``False`` means fail fast."""
+
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._move(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._move(CLOSED)
+
+    def failed(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.threshold:
+                self._move(OPEN)
+
+    def release(self) -> None:
+        """End a call that told nothing about the model's health (e.g. a rejected request)."""
+
+        with self._lock:
+            self._probing = False
+
+
+def _deadline_exceeded(model: str, when: str) -> DeadlineExceededError:
+    get_metrics_registry().inc(
+        "dx_llm_deadline_exceeded_total",
+        help="Model calls cut off by the request deadline",
+        model=model,
+    )
+    return DeadlineExceededError(f"request deadline passed {when} to {model}")
+
+
+class Resilience:
+    """Retry policy, retry budget and per-model breakers for model calls."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.budget = RetryBudget(settings.llm_retry_budget_ratio, settings.llm_retry_budget_burst)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker | None:
+        if not self.settings.llm_breaker_enabled:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(
+                    model,
+                    self.settings.llm_breaker_failure_threshold,
+                    self.settings.llm_breaker_reset_seconds,
+                )
+            return breaker
+
+    def retry_delay(self, model: str, attempt: int) -> float | None:
+        """Full-jitter backoff before retry ``attempt + 1``, or ``None`` to give up.
+
+        Gives up after ``llm_max_retries``, when the delay would run past the
+        deadline, or when the retry budget is spent.
+        """
+
+        settings = self.settings
+        if attempt >= settings.llm_max_retries:
+            return None
+        ceiling = settings.llm_retry_backoff_seconds * 2**attempt
+        delay = random.uniform(0, min(settings.llm_retry_backoff_max_seconds, ceiling))
+        remaining = remaining_seconds()
+        if remaining is not None and delay >= remaining:
+            return None
+        if not self.budget.withdraw():
+            get_metrics_registry().inc(
+                "dx_llm_retry_budget_exhausted_total",
+                help="Retries skipped because the retry budget was spent",
+                model=model,
+            )
+            return None
+        return delay
+
+    def admit(self, model: str) -> CircuitBreaker | None:
+        """Start an attempt: check the deadline and the breaker, or raise."""
+
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            raise _deadline_exceeded(model, "before the call")
+        breaker = self.breaker(model)
+        if breaker is not None and not breaker.allow():
+            get_metrics_registry().inc(
+                "dx_llm_breaker_rejections_total",
+                help="Model calls failed fast by an open breaker",
+                model=model,
+            )
+            raise CircuitOpenError(f"circuit breaker open for {model}")
+        return breaker
+
+    def call_timeout(self) -> float | None:
+        """Client timeout for the next attempt when the deadline is nearer than the usual one."""
+
+        remaining = remaining_seconds()
+        if remaining is None or remaining >= self.settings.llm_timeout_seconds:
+            return None
+        return max(remaining, 0.001)
+
+
+@lru_cache(maxsize=1)
+def get_resilience() -> Resilience:
+    return Resilience(get_settings())
+
+
+def _error_kind(exc: BaseException) -> str:
+    if isinstance(exc, (APITimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    if isinstance(exc, RateLimitError):
+        return "rate_limit"
+    if isinstance(exc, InternalServerError):
+        return "server_error"
+    return "connection"
+
+
+def _note_retry(model: str, exc: BaseException, delay: float) -> None:
+    kind = _error_kind(exc)
+    logger.info("Retrying %s in %.2fs after %s: %s", model, delay, kind, exc)
+    active = current_span()
+    if active is not None:
+        active.add("retries", 1)
+    get_metrics_registry().inc(
+        "dx_llm_retries_total", help="Model call retries", model=model, error=kind
+    )
+
+
+def _retry_delay(
+    resilience: Resilience, model: str, attempt: int, exc: BaseException, hand_off: ErrorTypes
+) -> float | None:
+    return None if isinstance(exc, hand_off) else resilience.retry_delay(model, attempt)
+
+
+def _timeout_kwargs(timeout: float | None) -> Dict[str, Any]:
+    return {} if timeout is None else {"timeout": timeout}
+
+
+def call_with_resilience(
+    model: str, call: Callable[..., T], hand_off: ErrorTypes = ()
+) -> T:
+    """Run ``call(**timeout_kwargs)`` under the request deadline, retries and breaker of ``model``.
+
+    ``call`` receives a ``timeout`` keyword only when the deadline is nearer
+    than ``DX_LLM_TIMEOUT_SECONDS``. Errors in ``hand_off`` count against the
+    breaker but are raised without a retry, for a caller with another model
+    to hand the call to.
+    """
+
+    resilience = get_resilience()
+    resilience.budget.deposit()
+    attempt = 0
+    while True:
+        breaker = resilience.admit(model)
+        try:
+            result = call(**_timeout_kwargs(resilience.call_timeout()))
+        except RETRYABLE_ERRORS as exc:
+            if breaker is not None:
+                breaker.failed()
+            delay = _retry_delay(resilience, model, attempt, exc, hand_off)
+            if delay is None:
+                raise
+            _note_retry(model, exc, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.succeeded()
+        return result
+
+
+async def _within_deadline(model: str, awaitable: Awaitable[T]) -> T:
+    remaining = remaining_seconds()
+    if remaining is None:
+        return await awaitable
+    try:
+        async with asyncio.timeout(remaining):
+            return await awaitable
+    except TimeoutError as exc:
+        raise _deadline_exceeded(model, "during the call") from exc
+
+
+async def acall_with_resilience(
+    model: str, call: Callable[..., Awaitable[T]], hand_off: ErrorTypes = ()
+) -> T:
+    """Async counterpart of :func:`call_with_resilience`.
+
+    The deadline is enforced on the awaited call itself, not only through the
+    client timeout.
+    """
+
+    resilience = get_resilience()
+    resilience.budget.deposit()
+    attempt = 0
+    while True:
+        breaker = resilience.admit(model)
+        try:
+            timeout = resilience.call_timeout()
+            result = await _within_deadline(model, call(**_timeout_kwargs(timeout)))
+        except RETRYABLE_ERRORS as exc:
+            if breaker is not None:
+                breaker.failed()
+            delay = _retry_delay(resilience, model, attempt, exc, hand_off)
+            if delay is None:
+                raise
+            _note_retry(model, exc, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except DeadlineExceededError:
+            # The model hung until the deadline cut it off: count it against the breaker.
+            if breaker is not None:
+                breaker.failed()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.succeeded()
+        return result
+
+
+async def astream_with_resilience(
+    model: str, open_stream: Callable[..., AsyncIterator[T]], hand_off: ErrorTypes = ()
+) -> AsyncIterator[T]:
+    """Chunks of ``open_stream(**timeout_kwargs)`` under the deadline, retries and breaker.
+
+    A stream is retried only if it fails before its first chunk; once chunks
+    have been handed on, a failure is raised to the caller.
+    """
+
+    resilience = get_resilience()
+    resilience.budget.deposit()
+    attempt = 0
+    while True:
+        breaker = resilience.admit(model)
+        started = False
+        try:
+            stream = open_stream(**_timeout_kwargs(resilience.call_timeout()))
+            iterator = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await _within_deadline(model, iterator.__anext__())
+                except StopAsyncIteration:
+                    break
+                started = True
+                yield chunk
+        except RETRYABLE_ERRORS as exc:
+            if breaker is not None:
+                breaker.failed()
+            delay = None if started else _retry_delay(resilience, model, attempt, exc, hand_off)
+            if delay is None:
+                raise
+            _note_retry(model, exc, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except DeadlineExceededError:
+            # The model hung until the deadline cut it off: count it against the breaker.
+            if breaker is not None:
+                breaker.failed()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.succeeded()
+        return
+
+
+__all__ = [
+    "CLOSED",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "HALF_OPEN",
+    "OPEN",
+    "RETRYABLE_ERRORS",
+    "Resilience",
+    "RetryBudget",
+    "acall_with_resilience",
+    "astream_with_resilience",
+    "call_with_resilience",
+    "get_resilience",
+    "remaining_seconds",
+    "request_deadline",
+]
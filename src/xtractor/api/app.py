@@ -1,17 +1,56 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from xtractor.adapters.llm import get_model_registry
+from xtractor.api.middleware import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
 from xtractor.api.routers.extract import router as extract_router
+from xtractor.api.routers.jobs import build_job_pool
+from xtractor.api.routers.jobs import router as jobs_router
+from xtractor.api.routers.metrics import router as metrics_router
+from xtractor.api.routers.profiles import router as profiles_router
+from xtractor.api.routers.schemas import router as schemas_router
+from xtractor.api.routers.stream import router as stream_router
 from xtractor.config.settings import get_settings
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    job_pool = None
+    if get_settings().jobs_enabled:
+        # Requeues jobs whose lease expired (their process died) before workers start.
+        job_pool = build_job_pool()
+        await job_pool.start()
+        app.state.job_pool = job_pool
+    try:
+        yield
+    finally:
+        if job_pool is not None:
+            await job_pool.stop()
+        await get_model_registry().aclose()
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title="Document Xtractor", version="1.2.5")
+    app = FastAPI(title="Document Xtractor", version="1.2.5", lifespan=lifespan)
     app.include_router(extract_router)
+    app.include_router(stream_router)
+    app.include_router(schemas_router)
+    if settings.jobs_enabled:
+        app.include_router(jobs_router)
+    if settings.metrics_enabled:
+        app.include_router(metrics_router)
+    if settings.profiling_enabled or settings.profiling_allow_header:
+        app.include_router(profiles_router)
 
     # Add middleware
+    app.add_middleware(
+        UploadLimitMiddleware,
+        max_body_bytes=settings.max_upload_bytes + MULTIPART_OVERHEAD_BYTES,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
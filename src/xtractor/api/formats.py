@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+from xtractor.models.responses import (
+    AuditModel,
+    ExtractResponse,
+    SymbolLegendItemModel,
+    SymbolSectionModel,
+)
+from xtractor.pipeline.schema_registry import get_schema_registry
+from xtractor.pipeline.state import DXState
+
+# Formats answered as one JSON document, and those streamed line by line.
+DOCUMENT_FORMATS = ("json", "columns")
+STREAMED_FORMATS = ("ndjson", "csv")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Rows per chunk handed to the ASGI server when streaming.
+_LINES_PER_CHUNK = 500
+
+
+def symbols_section(state: DXState) -> SymbolSectionModel:
+    context = state.get("symbol_context") or {}
+    legend_raw = context.get("legend") or []
+    legend: List[SymbolLegendItemModel] = []
+    for item in legend_raw:
+        legend.append(
+            SymbolLegendItemModel(
+                symbol=item.get("symbol", ""),
+                meaning=item.get("meaning", ""),
+                pages=item.get("pages", []),
+                bbox=item.get("bbox"),
+            )
+        )
+    used = context.get("used") if isinstance(context, dict) else False
+    return SymbolSectionModel(used=bool(used and legend), legend=legend)
+
+
+def audit_section(state: DXState) -> AuditModel:
+    audit_raw = state.get("audit") or {}
+    timings_raw = audit_raw.get("timings_ms") or {}
+    timings = dict(timings_raw) if isinstance(timings_raw, dict) else {}
+    latency = sum(timings.values()) if timings else None
+    cache_raw = audit_raw.get("cache")
+    return AuditModel(
+        graph_run_id=audit_raw.get("graph_run_id", ""),
+        nodes_path=audit_raw.get("nodes_path", []),
+        timings_ms=timings or None,
+        latency_ms=latency,
+        cache=dict(cache_raw) if isinstance(cache_raw, dict) and cache_raw else None,
+        peak_rss_bytes=audit_raw.get("peak_rss_bytes"),
+        extract_input=audit_raw.get("extract_input"),
+        chunks=audit_raw.get("chunks"),
+        tokens=audit_raw.get("tokens"),
+        usage=audit_raw.get("usage"),
+        token_budget=audit_raw.get("token_budget"),
+        model_tiers=audit_raw.get("model_tiers"),
+        schemas=audit_raw.get("schemas"),
+        prompt_cache=audit_raw.get("prompt_cache"),
+        output_recovery=audit_raw.get("output_recovery"),
+    )
+
+
+def envelope(state: DXState) -> ExtractResponse:
+    """Everything of the response but the rows (``result``/``results`` left empty)."""
+
+    return ExtractResponse(
+        concise_summary=state.get("concise_summary") or "",
+        symbols=symbols_section(state),
+        audit=audit_section(state),
+        warnings=list(state.get("warnings") or []),
+    )
+
+
+def _field_names(state: DXState) -> List[Sequence[str]]:
+    registry = get_schema_registry()
+    schemas = state.get("schemas") or [state.get("schema")]
+    return [registry.compiled(schema).field_names if schema else () for schema in schemas]
+
+
+def _results(state: DXState) -> List[Dict[str, Any]]:
+    return list(state.get("extraction_results") or [state.get("extraction_result") or {}])
+
+
+def _columns(result: Mapping[str, Any], field_names: Sequence[str]) -> Dict[str, Any]:
+    rows = result.get("rows") or []
+    return {
+        "key": result.get("key", ""),
+        "fields": list(field_names),
+        "columns": [[row.get(name) for row in rows] for name in field_names],
+        "row_count": len(rows),
+    }
+
+
+def response_body(state: DXState, output_format: str) -> Dict[str, Any]:
+    """The ``ExtractResponse`` body for ``json`` or ``columns`` output, rows left unvalidated.
+
+    Only the envelope goes through Pydantic; rows were normalized by
+    ``postprocess`` and are inserted as they are (or transposed into one
+    array per field for ``columns``).
+    """
+
+    body = envelope(state).model_dump(mode="json")
+    blocks: List[Dict[str, Any]] = _results(state)
+    if output_format == "columns":
+        names = _field_names(state)
+        blocks = [_columns(result, fields) for result, fields in zip(blocks, names, strict=True)]
+    else:
+        blocks = [
+            {"key": block.get("key", ""), "rows": block.get("rows") or []} for block in blocks
+        ]
+    if state.get("extraction_results"):
+        body["results"] = blocks
+    else:
+        body["result"] = blocks[0]
+    return body
+
+
+def render_json(body: Any) -> bytes:
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+
+
+def summary_event(state: DXState) -> Dict[str, Any]:
+    return {
+        "event": "summary",
+        "concise_summary": state.get("concise_summary") or "",
+        "hints": list(state.get("hints") or []),
+    }
+
+
+def row_events(
+    state: DXState, sent: Mapping[str, Sequence[Any]] | None = None
+) -> Iterator[Dict[str, Any]]:
+    """One ``row`` event per result row, leaving out the rows of each block already ``sent``.
+
+    A block whose final rows do not start with what was sent gets a ``reset``
+    event, telling the client to drop that block's rows, followed by all of them.
+    """
+
+    for result in _results(state):
+        key = result.get("key", "")
+        rows = result.get("rows") or []
+        already = (sent or {}).get(key) or []
+        if rows[: len(already)] == already:
+            rows = rows[len(already) :]
+        else:
+            yield {"event": "reset", "key": key}
+        for row in rows:
+            yield {"event": "row", "key": key, "row": row}
+
+
+def done_event(state: DXState, audit: AuditModel) -> Dict[str, Any]:
+    return {
+        "event": "done",
+        "symbols": symbols_section(state).model_dump(mode="json"),
+        "warnings": list(state.get("warnings") or []),
+        "audit": audit.model_dump(mode="json"),
+    }
+
+
+def _ndjson_line(event: Mapping[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+
+
+def iter_ndjson(state: DXState) -> Iterator[bytes]:
+    """``summary``, ``row`` and ``done`` events (as on ``/v1/extract/stream``), one per line."""
+
+    yield _ndjson_line(summary_event(state)).encode("utf-8")
+    lines: List[str] = []
+    for event in row_events(state):
+        lines.append(_ndjson_line(event))
+        if len(lines) >= _LINES_PER_CHUNK:
+            yield "".join(lines).encode("utf-8")
+            lines.clear()
+    lines.append(_ndjson_line(done_event(state, audit_section(state))))
+    yield "".join(lines).encode("utf-8")
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_csv(state: DXState) -> Iterator[bytes]:
+    """The single result as CSV: a header of field names, then one line per row."""
+
+    field_names = _field_names(state)[0]
+    rows = _results(state)[0].get("rows") or []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(field_names)
+    for start in range(0, len(rows), _LINES_PER_CHUNK):
+        writer.writerows(
+            [_cell(row.get(name)) for name in field_names]
+            for row in rows[start : start + _LINES_PER_CHUNK]
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+__all__ = [
+    "CSV_MEDIA_TYPE",
+    "DOCUMENT_FORMATS",
+    "NDJSON_MEDIA_TYPE",
+    "STREAMED_FORMATS",
+    "audit_section",
+    "done_event",
+    "envelope",
+    "iter_csv",
+    "iter_ndjson",
+    "render_json",
+    "response_body",
+    "row_events",
+    "summary_event",
+    "symbols_section",
+]
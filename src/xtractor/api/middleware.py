@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Awaitable, Callable, MutableMapping
+
+from xtractor.models.responses import ErrorResponse
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# Room for the multipart boundaries and the JSON ``payload`` form field.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class UploadLimitMiddleware:
+    """Reject request bodies over the upload limit before they are parsed.
+
+    A declared ``Content-Length`` above the limit is refused without reading
+    the body at all; chunked bodies are counted as they arrive and cut off as
+    soon as they cross it. After rejecting, the app sees a client disconnect
+    and anything it tries to send is dropped.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope.get("headers") or []).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_body_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes and not started:
+                    rejected = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, tracking_send)
+
+    async def _reject(self, send: Send) -> None:
+        error = ErrorResponse(
+            code="FILE_TOO_LARGE",
+            message=f"Request body exceeds the {self.max_body_bytes} byte limit",
+        )
+        body = json.dumps({"detail": error.model_dump()}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+__all__ = ["MULTIPART_OVERHEAD_BYTES", "UploadLimitMiddleware"]
@@ -1,26 +1,36 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, File, Form, Header, HTTPException, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 
-from xtractor.models.payload import ExtractPayload
-from xtractor.models.responses import (
-    AuditModel,
-    ErrorResponse,
-    ExtractResponse,
-    ExtractionResultModel,
-    SymbolLegendItemModel,
-    SymbolSectionModel,
+from xtractor.adapters.io import StoredUpload, UploadTooLargeError, persist_stream_async
+from xtractor.api.formats import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    iter_csv,
+    iter_ndjson,
+    render_json,
+    response_body,
 )
-from xtractor.pipeline.runner import run_pipeline
+from xtractor.config.settings import get_settings
+from xtractor.models.payload import ExtractPayload
+from xtractor.models.responses import ErrorResponse, ExtractResponse
+from xtractor.observability.profiling import PROFILE_HEADER, profile_request, profile_section
+from xtractor.pipeline.runner import run_stored_pipeline_async
 from xtractor.pipeline.state import DXState
 from xtractor.utils.validators import PayloadValidationError, SchemaValidationError
 
 router = APIRouter(prefix="/v1", tags=["extract"])
 
+CACHE_HEADER = "X-DX-Cache"
+# starlette renamed this status constant in 0.48 and deprecated the old name;
+# the literal works with every version fastapi>=0.115 allows.
+HTTP_413_CONTENT_TOO_LARGE = 413
+
 
 def _parse_payload(payload_raw: str) -> Dict[str, Any]:
     try:
@@ -41,93 +51,97 @@ def _parse_payload(payload_raw: str) -> Dict[str, Any]:
     return payload_model.model_dump(by_alias=True)
 
 
-def _build_symbols_section(state: DXState) -> SymbolSectionModel:
-    context = state.get("symbol_context") or {}
-    legend_raw = context.get("legend") or []
-    legend: List[SymbolLegendItemModel] = []
-    for item in legend_raw:
-        legend.append(
-            SymbolLegendItemModel(
-                symbol=item.get("symbol", ""),
-                meaning=item.get("meaning", ""),
-                pages=item.get("pages", []),
-                bbox=item.get("bbox"),
-            )
+async def _store_upload(file: UploadFile, filename: str) -> StoredUpload:
+    """Stream the multipart file to ``temp_dir``, hashing it on the way."""
+
+    settings = get_settings()
+    try:
+        upload = await persist_stream_async(
+            file,
+            filename,
+            settings.temp_dir,
+            max_bytes=settings.max_upload_bytes,
+            chunk_size=settings.upload_chunk_bytes,
         )
-    used = context.get("used") if isinstance(context, dict) else False
-    return SymbolSectionModel(used=bool(used and legend), legend=legend)
-
-
-def _build_audit_section(state: DXState) -> AuditModel:
-    audit_raw = state.get("audit") or {}
-    timings_raw = audit_raw.get("timings_ms") or {}
-    timings = dict(timings_raw) if isinstance(timings_raw, dict) else {}
-    latency = sum(timings.values()) if timings else None
-    return AuditModel(
-        graph_run_id=audit_raw.get("graph_run_id", ""),
-        nodes_path=audit_raw.get("nodes_path", []),
-        timings_ms=timings or None,
-        latency_ms=latency,
-    )
-
-
-def _build_success_response(state: DXState) -> ExtractResponse:
-    result = state.get("extraction_result") or {}
-    extraction = ExtractionResultModel(
-        key=result.get("key", ""),
-        rows=result.get("rows", []),
-    )
-    summary = state.get("concise_summary") or ""
-    warnings = state.get("warnings") or []
-    symbols = _build_symbols_section(state)
-    audit = _build_audit_section(state)
-    return ExtractResponse(
-        concise_summary=summary,
-        result=extraction,
-        symbols=symbols,
-        audit=audit,
-        warnings=list(warnings),
-    )
+    except UploadTooLargeError as exc:
+        raise HTTPException(
+            status_code=HTTP_413_CONTENT_TOO_LARGE,
+            detail=ErrorResponse(code="FILE_TOO_LARGE", message=str(exc)).model_dump(),
+        ) from exc
+    if not upload.size:
+        upload.path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(code="FILE_INVALID", message="Uploaded file is empty").model_dump(),
+        )
+    return upload
+
+
+def _response_headers(state: DXState) -> Dict[str, str]:
+    cache_outcome = ((state.get("audit") or {}).get("cache") or {}).get("result")
+    return {CACHE_HEADER: cache_outcome} if cache_outcome else {}
+
+
+def render_response(state: DXState, output_format: str) -> Response:
+    """Serialize the final state in the requested ``outputFormat``, bypassing row validation."""
+
+    headers = _response_headers(state)
+    if output_format == "ndjson":
+        return StreamingResponse(iter_ndjson(state), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    if output_format == "csv":
+        key = (state.get("schema") or {}).get("key") or "result"
+        headers["Content-Disposition"] = f'attachment; filename="{key}.csv"'
+        return StreamingResponse(iter_csv(state), media_type=CSV_MEDIA_TYPE, headers=headers)
+    body = render_json(response_body(state, output_format))
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post(
     "/extract",
     response_model=ExtractResponse,
     responses={
+        status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}}},
         status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse},
+        HTTP_413_CONTENT_TOO_LARGE: {"model": ErrorResponse},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse},
     },
 )
 async def extract_endpoint(
     file: UploadFile = File(...),
     payload: str = Form(...),
-) -> ExtractResponse:
-    payload_dict = _parse_payload(payload)
-    file_bytes = await file.read()
-    if not file_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ErrorResponse(code="FILE_INVALID", message="Uploaded file is empty").model_dump(),
-        )
-
-    try:
-        state = run_pipeline(
-            file_bytes=file_bytes,
-            filename=file.filename or "upload.bin",
-            payload=payload_dict,
-        )
-    except (PayloadValidationError, SchemaValidationError) as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump(),
-        ) from exc
-    except Exception as exc:  # pragma: no cover - pipeline failure fallback
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(code="PIPELINE_FAILED", message=str(exc)).model_dump(),
-        ) from exc
-
-    return _build_success_response(state)
-
-
-__all__ = ["router"]
+    profile: str | None = Header(default=None, alias=PROFILE_HEADER),
+) -> Response:
+    # With DX_PROFILING_ALLOW_HEADER, any X-DX-Profile value but "0"/"false"
+    # profiles this request; the response then names the stored profile.
+    requested = profile is not None and profile.lower() not in ("", "0", "false")
+    with profile_request(requested) as session:
+        payload_dict = _parse_payload(payload)
+        filename = file.filename or "upload.bin"
+        with profile_section("upload"):
+            upload = await _store_upload(file, filename)
+
+        try:
+            state = await run_stored_pipeline_async(
+                upload=upload,
+                filename=filename,
+                payload=payload_dict,
+            )
+        except (PayloadValidationError, SchemaValidationError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump(),
+            ) from exc
+        except Exception as exc:  # pragma: no cover - pipeline failure fallback
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=ErrorResponse(code="PIPELINE_FAILED", message=str(exc)).model_dump(),
+            ) from exc
+
+        with profile_section("response"):
+            response = render_response(state, payload_dict["outputFormat"])
+        if session is not None:
+            response.headers[PROFILE_HEADER] = session.profile_id
+        return response
+
+
+__all__ = ["render_response", "router"]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, Response, UploadFile, status
+
+from xtractor.adapters.io import StoredUpload
+from xtractor.api.formats import STREAMED_FORMATS, response_body
+from xtractor.api.routers.extract import (
+    HTTP_413_CONTENT_TOO_LARGE,
+    _parse_payload,
+    _store_upload,
+)
+from xtractor.config.settings import get_settings
+from xtractor.jobs import Job, JobFailedError, JobWorkerPool, QueueFullError, get_job_store
+from xtractor.models.responses import ErrorResponse, ExtractResponse, JobResponse
+from xtractor.pipeline.runner import run_stored_pipeline_async, validate_stored_upload
+from xtractor.utils.validators import PayloadValidationError, SchemaValidationError
+
+router = APIRouter(prefix="/v1", tags=["jobs"])
+
+
+def _upload(job: Job) -> StoredUpload:
+    return StoredUpload(path=job.upload_path, sha256=job.sha256, size=job.size)
+
+
+async def execute_job(job: Job) -> Dict[str, Any]:
+    """Run one queued extraction and return its ``ExtractResponse`` body."""
+
+    try:
+        state = await run_stored_pipeline_async(
+            upload=_upload(job), filename=job.filename, payload=job.payload
+        )
+    except (PayloadValidationError, SchemaValidationError) as exc:
+        raise JobFailedError(
+            ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump()
+        ) from exc
+    except Exception as exc:  # pragma: no cover - pipeline failure fallback
+        raise JobFailedError(
+            ErrorResponse(code="PIPELINE_FAILED", message=str(exc)).model_dump()
+        ) from exc
+    return response_body(state, str(job.payload.get("outputFormat") or "json"))
+
+
+def discard_job_upload(job: Job) -> None:
+    job.upload_path.unlink(missing_ok=True)
+
+
+def build_job_pool() -> JobWorkerPool:
+    settings = get_settings()
+    return JobWorkerPool(
+        get_job_store(),
+        execute_job,
+        workers=settings.jobs_workers,
+        poll_interval=settings.jobs_poll_interval_seconds,
+        retention_seconds=settings.jobs_retention_seconds,
+        on_finished=discard_job_upload,
+    )
+
+
+def _timestamp(value: float | None) -> datetime | None:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def _job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        created_at=_timestamp(job.created_at),
+        started_at=_timestamp(job.started_at),
+        finished_at=_timestamp(job.finished_at),
+        attempts=job.attempts,
+        result=ExtractResponse.model_validate(job.result) if job.result else None,
+        error=ErrorResponse.model_validate(job.error) if job.error else None,
+    )
+
+
+@router.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse},
+        HTTP_413_CONTENT_TOO_LARGE: {"model": ErrorResponse},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": ErrorResponse},
+    },
+)
+async def create_job_endpoint(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    payload: str = Form(...),
+) -> JobResponse:
+    payload_dict = _parse_payload(payload)
+    if payload_dict["outputFormat"] in STREAMED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(
+                code="PAYLOAD_INVALID",
+                message="Job results are JSON documents; use outputFormat 'json' or 'columns'",
+            ).model_dump(),
+        )
+    filename = file.filename or "upload.bin"
+    upload = await _store_upload(file, filename)
+    try:
+        await asyncio.to_thread(
+            validate_stored_upload, upload=upload, filename=filename, payload=payload_dict
+        )
+    except (PayloadValidationError, SchemaValidationError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump(),
+        ) from exc
+
+    pool: JobWorkerPool | None = getattr(request.app.state, "job_pool", None)
+    workers = pool.workers if pool is not None else 1
+    try:
+        job = await asyncio.to_thread(
+            get_job_store().enqueue,
+            filename=filename,
+            upload_path=upload.path,
+            sha256=upload.sha256,
+            size=upload.size,
+            payload=payload_dict,
+            workers=workers,
+        )
+    except QueueFullError as exc:
+        upload.path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ErrorResponse(code="QUEUE_FULL", message=str(exc)).model_dump(),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    if pool is not None:
+        pool.notify()
+    response.headers["Location"] = f"/v1/jobs/{job.id}"
+    return _job_response(job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={status.HTTP_404_NOT_FOUND: {"model": ErrorResponse}},
+)
+async def get_job_endpoint(job_id: str) -> JobResponse:
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorResponse(
+                code="JOB_NOT_FOUND", message=f"Unknown job {job_id}"
+            ).model_dump(),
+        )
+    return _job_response(job)
+
+
+__all__ = ["build_job_pool", "execute_job", "router"]
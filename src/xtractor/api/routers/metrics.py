@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from xtractor.observability.metrics import get_metrics_registry
+
+router = APIRouter(tags=["observability"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    """Node, model-call, cache and pipeline metrics in the Prometheus text format."""
+
+    return PlainTextResponse(
+        get_metrics_registry().render_prometheus(), media_type=PROMETHEUS_MEDIA_TYPE
+    )
+
+
+__all__ = ["PROMETHEUS_MEDIA_TYPE", "router"]
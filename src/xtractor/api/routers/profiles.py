@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from xtractor.models.responses import ErrorResponse, ProfileListResponse, ProfileResponse
+from xtractor.observability.profiling import get_profile_store
+
+router = APIRouter(prefix="/v1/admin", tags=["admin"])
+
+
+def _not_found(profile_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=ErrorResponse(
+            code="PROFILE_NOT_FOUND", message=f"Unknown profile {profile_id}"
+        ).model_dump(),
+    )
+
+
+@router.get("/profiles", response_model=ProfileListResponse)
+async def list_profiles_endpoint() -> ProfileListResponse:
+    """Stored request profiles, newest first, with their per-section timings."""
+
+    summaries = await asyncio.to_thread(get_profile_store().summaries)
+    return ProfileListResponse.model_validate({"profiles": summaries})
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_model=ProfileResponse,
+    responses={status.HTTP_404_NOT_FOUND: {"model": ErrorResponse}},
+)
+async def get_profile_endpoint(profile_id: str) -> ProfileResponse:
+    """One profile, including its hottest functions and largest allocation sites."""
+
+    summary = await asyncio.to_thread(get_profile_store().get, profile_id)
+    if summary is None:
+        raise _not_found(profile_id)
+    return ProfileResponse.model_validate(summary)
+
+
+@router.get(
+    "/profiles/{profile_id}/pstats",
+    response_class=FileResponse,
+    responses={status.HTTP_404_NOT_FOUND: {"model": ErrorResponse}},
+)
+async def download_profile_endpoint(profile_id: str) -> FileResponse:
+    """The raw cProfile dump, for ``python -m pstats`` or snakeviz."""
+
+    path = get_profile_store().stats_path(profile_id)
+    if path is None:
+        raise _not_found(profile_id)
+    return FileResponse(
+        path, media_type="application/octet-stream", filename=f"{profile_id}.prof"
+    )
+
+
+__all__ = ["router"]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict
+
+from fastapi import APIRouter, Body, HTTPException, status
+from pydantic import ValidationError
+
+from xtractor.models.payload import SchemaModel
+from xtractor.models.responses import ErrorResponse, SchemaResponse
+from xtractor.pipeline.schema_registry import CompiledSchema, get_schema_registry
+from xtractor.utils.validators import SchemaValidationError, validate_schema
+
+router = APIRouter(prefix="/v1", tags=["schemas"])
+
+
+def _schema_response(compiled: CompiledSchema) -> SchemaResponse:
+    return SchemaResponse(
+        schema_id=compiled.id,
+        key=compiled.schema["key"],
+        field_names=list(compiled.field_names),
+        response_format=compiled.response_format,
+    )
+
+
+@router.post(
+    "/schemas",
+    response_model=SchemaResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse}},
+)
+async def register_schema_endpoint(schema: Dict[str, Any] = Body(...)) -> SchemaResponse:
+    """Validate and compile a schema once; pass the returned id as ``payload.schemaId``."""
+
+    try:
+        SchemaModel.model_validate(schema)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(
+                code="PAYLOAD_INVALID", message=json.dumps(exc.errors())
+            ).model_dump(),
+        ) from exc
+    try:
+        validated = validate_schema(schema)
+    except SchemaValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump(),
+        ) from exc
+    compiled = await asyncio.to_thread(get_schema_registry().register, validated)
+    return _schema_response(compiled)
+
+
+@router.get(
+    "/schemas/{schema_id}",
+    response_model=SchemaResponse,
+    responses={status.HTTP_404_NOT_FOUND: {"model": ErrorResponse}},
+)
+async def get_schema_endpoint(schema_id: str) -> SchemaResponse:
+    compiled = await asyncio.to_thread(get_schema_registry().get, schema_id)
+    if compiled is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorResponse(
+                code="SCHEMA_NOT_FOUND", message=f"Unknown schema {schema_id}"
+            ).model_dump(),
+        )
+    return _schema_response(compiled)
+
+
+__all__ = ["router"]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Dict, List, Set
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from xtractor.api.formats import (
+    NDJSON_MEDIA_TYPE,
+    audit_section,
+    done_event,
+    row_events,
+    summary_event,
+)
+from xtractor.api.routers.extract import (
+    HTTP_413_CONTENT_TOO_LARGE,
+    _parse_payload,
+    _store_upload,
+)
+from xtractor.models.responses import ErrorResponse
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.pipeline.runner import run_stored_pipeline_async, validate_stored_upload
+from xtractor.pipeline.streaming import RowStream, run_streamed
+from xtractor.utils.validators import PayloadValidationError, SchemaValidationError
+
+router = APIRouter(prefix="/v1", tags=["extract"])
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Runs outlive a client that disconnects; keep them referenced until they finish.
+_RUNS: Set[asyncio.Task] = set()
+
+
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _sse(event: Dict[str, Any]) -> bytes:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _error_event(exc: Exception) -> Dict[str, Any]:
+    code = (
+        "SCHEMA_INVALID"
+        if isinstance(exc, (PayloadValidationError, SchemaValidationError))
+        else "PIPELINE_FAILED"
+    )
+    return {"event": "error", **ErrorResponse(code=code, message=str(exc)).model_dump()}
+
+
+async def _event_stream(
+    stream: RowStream,
+    run: asyncio.Task,
+    encode: Callable[[Dict[str, Any]], bytes],
+    started: float,
+) -> AsyncIterator[bytes]:
+    sent: Dict[str, List[Any]] = {}
+    summary_sent = False
+    first_row_ms: int | None = None
+
+    def track(event: Dict[str, Any]) -> bytes:
+        nonlocal summary_sent, first_row_ms
+        if event["event"] == "summary":
+            summary_sent = True
+        elif event["event"] == "reset":
+            sent.pop(event["key"], None)
+        elif event["event"] == "row":
+            sent.setdefault(event["key"], []).append(event["row"])
+            if first_row_ms is None:
+                elapsed = perf_counter() - started
+                first_row_ms = int(elapsed * 1000)
+                get_metrics_registry().observe(
+                    "dx_time_to_first_row_seconds",
+                    elapsed,
+                    help="Time from request to the first streamed row",
+                )
+        return encode(event)
+
+    async for event in stream.events():
+        yield track(event)
+    try:
+        state = await run
+    except Exception as exc:  # pragma: no cover - pipeline failure after the stream opened
+        yield encode(_error_event(exc))
+        return
+    # Whatever the final state holds beyond the streamed events (all of it on a cache hit).
+    if not summary_sent:
+        yield track(summary_event(state))
+    for event in row_events(state, sent):
+        yield track(event)
+    audit = audit_section(state)
+    audit.time_to_first_row_ms = first_row_ms
+    yield encode(done_event(state, audit))
+
+
+@router.post(
+    "/extract/stream",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}, SSE_MEDIA_TYPE: {}}},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse},
+        HTTP_413_CONTENT_TOO_LARGE: {"model": ErrorResponse},
+    },
+)
+async def extract_stream_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    payload: str = Form(...),
+) -> StreamingResponse:
+    """Stream the extraction as events: ``summary``, one ``row`` per row, then ``done``.
+
+    Rows of the single-call extraction are sent as the model generates them;
+    chunked and cached results follow once known. Responds with SSE when the
+    client accepts ``text/event-stream``, NDJSON otherwise.
+    """
+
+    started = perf_counter()
+    payload_dict = _parse_payload(payload)
+    # The summary must lead the stream, so single-pass requests run two passes here.
+    payload_dict["pipelineMode"] = "two_pass"
+    filename = file.filename or "upload.bin"
+    upload = await _store_upload(file, filename)
+    try:
+        await asyncio.to_thread(
+            validate_stored_upload, upload=upload, filename=filename, payload=payload_dict
+        )
+    except (PayloadValidationError, SchemaValidationError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ErrorResponse(code="SCHEMA_INVALID", message=str(exc)).model_dump(),
+        ) from exc
+
+    stream = RowStream()
+    run = asyncio.create_task(
+        run_streamed(
+            stream,
+            run_stored_pipeline_async,
+            upload=upload,
+            filename=filename,
+            payload=payload_dict,
+        )
+    )
+    _RUNS.add(run)
+    run.add_done_callback(_RUNS.discard)
+    sse = SSE_MEDIA_TYPE in request.headers.get("accept", "")
+    return StreamingResponse(
+        _event_stream(stream, run, _sse if sse else _ndjson, started),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+    )
+
+
+__all__ = ["router"]
@@ -0,0 +1,230 @@
+"""``xtractor-cli batch``: many documents per process with a resumable checkpoint.
+
+Documents come from a directory (one shared ``--schema``) or a JSONL manifest
+whose lines look like::
+
+    {"id": "drawing-0001", "file": "drawings/0001.pdf", "payload": {...}}
+
+``file`` is resolved against the manifest's directory; ``payload`` may be an
+inline object or a path to a payload JSON file, and falls back to ``--schema``.
+All documents share one compiled graph and one pooled LLM client.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO
+
+from xtractor.adapters.io import persist_stream, read_chunks
+from xtractor.cli.main import _format_response, _load_payload
+from xtractor.config.settings import get_settings
+from xtractor.models.responses import ErrorResponse
+from xtractor.pipeline.runner import run_stored_pipeline_async
+from xtractor.utils.validators import PayloadValidationError, SchemaValidationError
+
+DOCUMENT_SUFFIXES = {".pdf", ".docx"}
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    id: str
+    file: Path
+    payload: Dict[str, Any]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="xtractor-cli batch", description="Extract many documents concurrently"
+    )
+    parser.add_argument("source", type=Path, help="Directory of documents or JSONL manifest")
+    parser.add_argument("--schema", type=Path, help="Payload JSON for items without their own")
+    parser.add_argument("--output", type=Path, required=True, help="NDJSON results file")
+    parser.add_argument(
+        "--checkpoint", type=Path, help="Completed-item log (default: <output>.checkpoint)"
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents in flight")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Re-run items that failed in a previous run"
+    )
+    return parser
+
+
+def _directory_items(root: Path, payload: Optional[Dict[str, Any]]) -> Iterator[BatchItem]:
+    if payload is None:
+        raise SystemExit("--schema is required when the source is a directory")
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in DOCUMENT_SUFFIXES:
+            yield BatchItem(id=str(path.relative_to(root)), file=path, payload=payload)
+
+
+def _manifest_items(manifest: Path, default: Optional[Dict[str, Any]]) -> Iterator[BatchItem]:
+    base = manifest.parent
+    with manifest.open(encoding="utf-8") as handle:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                file = base / entry["file"]
+            except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                raise SystemExit(f"{manifest}:{number}: invalid manifest line ({exc})") from exc
+            payload = entry.get("payload", default)
+            if isinstance(payload, str):
+                payload = _load_payload(base / payload)
+            if payload is None:
+                raise SystemExit(f"{manifest}:{number}: no payload and no --schema given")
+            item_id = str(entry.get("id") or entry.get("request_id") or entry["file"])
+            yield BatchItem(id=item_id, file=file, payload=payload)
+
+
+def iter_items(source: Path, schema: Optional[Path]) -> Iterator[BatchItem]:
+    default = _load_payload(schema) if schema else None
+    if source.is_dir():
+        return _directory_items(source, default)
+    if source.is_file():
+        return _manifest_items(source, default)
+    raise SystemExit(f"Batch source not found: {source}")
+
+
+def _read_checkpoint(path: Path, retry_failed: bool) -> Set[str]:
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn final line from an interrupted run
+            if entry.get("status") == "ok" or not retry_failed:
+                done.add(entry["id"])
+    return done
+
+
+def _trim_partial_line(path: Path) -> None:
+    """Drop a trailing line cut short by an interrupted run so the NDJSON stays valid."""
+
+    if not path.exists() or not path.stat().st_size:
+        return
+    with path.open("rb+") as handle:
+        data = handle.read()
+        if data.endswith(b"\n"):
+            return
+        handle.truncate(data.rfind(b"\n") + 1)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def _process(item: BatchItem) -> Dict[str, Any]:
+    settings = get_settings()
+    record: Dict[str, Any] = {"id": item.id, "file": str(item.file)}
+    started = time.perf_counter()
+    try:
+        upload = await asyncio.to_thread(
+            persist_stream, read_chunks(item.file), item.file.name, settings.temp_dir
+        )
+        try:
+            state = await run_stored_pipeline_async(
+                upload=upload, filename=item.file.name, payload=item.payload
+            )
+        finally:
+            upload.path.unlink(missing_ok=True)
+        output_format = str(item.payload.get("outputFormat") or "json")
+        record.update(status="ok", response=_format_response(state, output_format))
+    except (PayloadValidationError, SchemaValidationError) as exc:
+        error = ErrorResponse(code="SCHEMA_INVALID", message=str(exc))
+        record.update(status="error", error=error.model_dump())
+    except OSError as exc:
+        error = ErrorResponse(code="FILE_INVALID", message=str(exc))
+        record.update(status="error", error=error.model_dump())
+    except Exception as exc:  # pragma: no cover - pipeline failure fallback
+        error = ErrorResponse(code="PIPELINE_FAILED", message=str(exc))
+        record.update(status="error", error=error.model_dump())
+    record["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+    return record
+
+
+def _append(handle: TextIO, entry: Dict[str, Any]) -> None:
+    handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    handle.flush()
+
+
+async def run_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    checkpoint_path: Path = args.checkpoint or args.output.with_name(
+        args.output.name + ".checkpoint"
+    )
+    done = _read_checkpoint(checkpoint_path, args.retry_failed)
+    _trim_partial_line(args.output)
+    _trim_partial_line(checkpoint_path)
+
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    latencies: List[float] = []
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    with args.output.open("a", encoding="utf-8") as output, checkpoint_path.open(
+        "a", encoding="utf-8"
+    ) as checkpoint:
+
+        async def one(item: BatchItem) -> None:
+            try:
+                record = await _process(item)
+            finally:
+                semaphore.release()
+            # Results first, checkpoint second: a crash in between re-runs the
+            # item rather than losing it, and consumers key results on ``id``.
+            _append(output, record)
+            _append(checkpoint, {"id": item.id, "status": record["status"]})
+            counts[record["status"]] += 1
+            latencies.append(record["elapsed_ms"])
+
+        tasks: List[asyncio.Task[None]] = []
+        for item in iter_items(args.source, args.schema):
+            if item.id in done:
+                counts["skipped"] += 1
+                continue
+            # Acquire before creating the task so huge manifests are read lazily
+            # instead of spawning one task per line up front.
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(one(item)))
+            tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+
+    wall = time.perf_counter() - started
+    processed = counts["ok"] + counts["error"]
+    return {
+        "processed": processed,
+        "succeeded": counts["ok"],
+        "failed": counts["error"],
+        "skipped": counts["skipped"],
+        "wall_s": round(wall, 3),
+        "docs_per_s": round(processed / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+    }
+
+
+def main(argv: List[str]) -> None:
+    args = build_parser().parse_args(argv)
+    summary = asyncio.run(run_batch(args))
+    print(json.dumps(summary), file=sys.stderr)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+__all__ = ["BatchItem", "build_parser", "iter_items", "main", "percentile", "run_batch"]
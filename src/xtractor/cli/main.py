@@ -2,22 +2,30 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from pydantic import ValidationError
 
+from xtractor.adapters.io import persist_stream, read_chunks
+from xtractor.config.settings import get_settings
 from xtractor.models.payload import ExtractPayload
-from xtractor.models.responses import ExtractResponse
-from xtractor.pipeline.runner import run_pipeline
+from xtractor.pipeline.runner import run_stored_pipeline
 from xtractor.pipeline.state import DXState
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Run the Document Xtractor pipeline")
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the Document Xtractor pipeline",
+        epilog="Use 'xtractor-cli batch --help' to process many documents in one run.",
+    )
     parser.add_argument("file", type=Path, help="Path to PDF/DOCX input file")
     parser.add_argument("schema", type=Path, help="Path to schema JSON payload")
-    parser.add_argument("--output", type=Path, help="Where to store JSON result")
-    return parser.parse_args()
+    parser.add_argument(
+        "--output", type=Path, help="Where to store the result (in the payload's outputFormat)"
+    )
+    return parser.parse_args(argv)
 
 
 def _load_payload(path: Path) -> dict:
@@ -29,26 +37,42 @@ def _load_payload(path: Path) -> dict:
     return payload.model_dump(by_alias=True)
 
 
-def _format_response(state: DXState) -> ExtractResponse:
-    from xtractor.api.routers.extract import _build_success_response  # lazy import to reuse logic
+def _format_response(state: DXState, output_format: str = "json") -> Dict[str, Any]:
+    """Response body for ``json``/``columns``; streamed formats fall back to ``json``."""
 
-    return _build_success_response(state)
+    from xtractor.api.formats import DOCUMENT_FORMATS, response_body  # lazy: pulls in FastAPI
 
+    return response_body(state, output_format if output_format in DOCUMENT_FORMATS else "json")
 
-def main() -> None:
-    args = parse_args()
+
+def _render_output(state: DXState, output_format: str) -> str:
+    from xtractor.api.formats import iter_csv, iter_ndjson
+
+    if output_format in ("ndjson", "csv"):
+        chunks = iter_ndjson(state) if output_format == "ndjson" else iter_csv(state)
+        return b"".join(chunks).decode("utf-8")
+    return json.dumps(_format_response(state, output_format), ensure_ascii=False, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        from xtractor.cli import batch
+
+        batch.main(argv[1:])
+        return
+    args = parse_args(argv)
     if not args.file.exists():
         raise SystemExit(f"Input file not found: {args.file}")
     payload = _load_payload(args.schema)
-    file_bytes = args.file.read_bytes()
-    state = run_pipeline(file_bytes=file_bytes, filename=args.file.name, payload=payload)
-    response = _format_response(state)
-    output_json = response.model_dump_json(indent=2)
+    upload = persist_stream(read_chunks(args.file), args.file.name, get_settings().temp_dir)
+    state = run_stored_pipeline(upload=upload, filename=args.file.name, payload=payload)
+    output = _render_output(state, payload["outputFormat"])
 
     if args.output:
-        args.output.write_text(output_json)
+        args.output.write_text(output)
     else:
-        print(output_json)
+        print(output)
 
 
 if __name__ == "__main__":
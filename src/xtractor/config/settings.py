@@ -2,12 +2,22 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Dict, List, Literal
 
-from pydantic import AliasChoices, Field
+from pydantic import AliasChoices, BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class ModelTier(BaseModel):
+    """Extraction model for documents within ``max_pages`` and ``max_bytes`` (unset: no bound)."""
+
+    name: str
+    model: str
+    max_pages: int | None = Field(default=None, ge=1)
+    max_bytes: int | None = Field(default=None, ge=1)
+    reasoning_effort: str | None = None
+
+
 class Settings(BaseSettings):
     """Central configuration for the extraction service."""
 
@@ -20,10 +30,167 @@ class Settings(BaseSettings):
 
     environment: Literal["local", "dev", "prod"] = Field(default="local")
     mm_model: str = Field(default="gpt-4o-mini", description="Identifier for multimodal LLM")
+    reasoning_effort: str = Field(
+        default="low", description="reasoning.effort sent with model calls (empty: omitted)"
+    )
+    summary_model: str | None = Field(
+        default=None, description="Model for file_understanding (defaults to mm_model)"
+    )
+    summary_reasoning_effort: str | None = Field(
+        default=None,
+        description="reasoning.effort for summary calls (defaults to reasoning_effort)",
+    )
+    extract_model_tiers: List[ModelTier] = Field(
+        default_factory=list,
+        description="Extraction models by document size; the first tier the document fits in"
+        " wins, documents fitting none use mm_model",
+    )
+    fallback_model: str | None = Field(
+        default=None,
+        description="Model a call is retried on when the primary model times out or its"
+        " circuit breaker is open",
+    )
+    fallback_reasoning_effort: str | None = Field(
+        default=None,
+        description="reasoning.effort for fallback calls (defaults to reasoning_effort)",
+    )
     summary_max_tokens: int = Field(default=600, ge=50, description="Upper bound for summary tokens")
     enable_symbol_agent: bool = Field(default=True, description="Toggle symbol agent execution")
     temp_dir: Path = Field(default=Path("./.tmp"), description="Workspace for temporary files")
+    max_upload_bytes: int = Field(
+        default=200 * 1024 * 1024, ge=1, description="Largest accepted document upload"
+    )
+    upload_chunk_bytes: int = Field(
+        default=1024 * 1024, ge=4096, description="Chunk size used when streaming uploads to disk"
+    )
+    pipeline_mode: Literal["two_pass", "single_pass"] = Field(
+        default="two_pass",
+        description="two_pass: summarize, then extract; single_pass: one model call returns the"
+        " summary, hints and rows (payload.pipelineMode overrides per request)",
+    )
+    file_understanding_mode: Literal["auto", "llm", "local"] = Field(
+        default="auto",
+        description="auto: summarize locally when the text layer is good enough; llm: always"
+        " call the model; local: never call the model",
+    )
+    local_text_min_chars_per_page: int = Field(
+        default=200, ge=0, description="Average text-layer characters per page required in auto"
+    )
+    local_text_min_page_coverage: float = Field(
+        default=0.8, ge=0, le=1, description="Share of pages that must carry text in auto mode"
+    )
+    local_text_min_printable_ratio: float = Field(
+        default=0.95, ge=0, le=1, description="Minimum printable share to trust the text layer"
+    )
+    extract_input_mode: Literal["auto", "file", "text", "hybrid"] = Field(
+        default="auto",
+        description="What multimodal_extract sends: the file, its text layer, or text plus"
+        " drawing pages; auto picks text/hybrid when the text layer is good enough",
+    )
+    extract_response_format: Literal["json_schema", "json_object"] = Field(
+        default="json_schema",
+        description="Structured output mode for extraction calls: strict json_schema built from"
+        " the request schema, or plain json_object for servers without strict support",
+    )
+    extract_output_retries: int = Field(
+        default=1,
+        ge=0,
+        description="Extra calls per extraction to re-ask for unusable or truncated output",
+    )
+    chunked_extract_enabled: bool = Field(
+        default=True, description="Route large documents to page-chunked parallel extraction"
+    )
+    extract_chunk_min_pages: int = Field(
+        default=40, ge=1, description="Page count from which extraction is chunked"
+    )
+    extract_chunk_min_bytes: int = Field(
+        default=20 * 1024 * 1024, ge=1, description="File size from which extraction is chunked"
+    )
+    extract_chunk_pages: int = Field(default=20, ge=1, description="Pages per extraction window")
+    extract_chunk_overlap_pages: int = Field(
+        default=0, ge=0, description="Pages shared by neighbouring windows (rows split by breaks)"
+    )
+    extract_chunk_concurrency: int = Field(
+        default=4, ge=1, description="Extraction windows in flight per request"
+    )
+    extract_dedupe_fields: List[str] = Field(
+        default_factory=lambda: ["UNIQUE KKS"],
+        description="Schema fields identifying a row when merging chunk results",
+    )
+    schema_registry_persist: bool = Field(
+        default=True, description="Keep schemas registered via POST /v1/schemas across restarts"
+    )
+    schema_registry_path: Path | None = Field(
+        default=None, description="SQLite schema store (default temp_dir/schemas/schemas.sqlite)"
+    )
+    schema_registry_max_entries: int = Field(
+        default=10_000, ge=1, description="Compiled schemas kept in memory and in the store"
+    )
+    max_schemas_per_request: int = Field(
+        default=8, ge=1, description="Upper bound on payload.schemas (extracted concurrently)"
+    )
+    summary_cache_enabled: bool = Field(
+        default=True, description="Reuse file_understanding results for identical documents"
+    )
+    summary_cache_max_entries: int = Field(
+        default=512, ge=0, description="In-process LRU capacity for cached summaries"
+    )
+    summary_cache_ttl_seconds: int = Field(
+        default=7 * 24 * 3600, ge=0, description="Expiry for cached summaries (0 disables TTL)"
+    )
+    summary_cache_disk: bool = Field(
+        default=False, description="Persist cached summaries to SQLite under temp_dir"
+    )
+    summary_cache_disk_max_entries: int = Field(
+        default=10_000, ge=1, description="Entry bound for the on-disk summary cache"
+    )
+    result_cache_enabled: bool = Field(
+        default=True, description="Serve repeated (document, schema, model) requests from cache"
+    )
+    result_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, ge=0, description="Memory bound for cached extraction results"
+    )
+    jobs_enabled: bool = Field(default=True, description="Serve the asynchronous /v1/jobs API")
+    jobs_workers: int = Field(default=2, ge=1, description="Concurrent job workers per process")
+    jobs_max_pending: int = Field(
+        default=100, ge=1, description="Queued plus running jobs before POST /v1/jobs returns 429"
+    )
+    jobs_max_attempts: int = Field(
+        default=3, ge=1, description="Runs allowed per job before an interrupted job is failed"
+    )
+    jobs_lease_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        description="Lease on a running job, renewed while it runs; expired jobs are requeued",
+    )
+    jobs_retention_seconds: int = Field(
+        default=24 * 3600, ge=0, description="How long finished jobs and results are kept"
+    )
+    jobs_poll_interval_seconds: float = Field(
+        default=1.0, gt=0, description="Idle worker poll interval for the job queue"
+    )
+    jobs_db_path: Path | None = Field(
+        default=None, description="SQLite job queue file (defaults to temp_dir/jobs/jobs.sqlite)"
+    )
     log_level: str = Field(default="INFO", description="Root log level")
+    metrics_enabled: bool = Field(
+        default=True, description="Record node and LLM-call spans and serve /metrics"
+    )
+    trace_export_path: Path | None = Field(
+        default=None, description="Append finished spans to this NDJSON file (unset: no export)"
+    )
+    profiling_enabled: bool = Field(
+        default=False, description="Profile a sample of pipeline runs (CPU and allocations)"
+    )
+    profiling_sample_rate: float = Field(
+        default=0.01, ge=0, le=1, description="Share of runs profiled when profiling_enabled"
+    )
+    profiling_allow_header: bool = Field(
+        default=False, description="Profile /v1/extract requests sending the X-DX-Profile header"
+    )
+    profiling_max_profiles: int = Field(
+        default=100, ge=1, description="Profiles kept under temp_dir/profiles (oldest removed)"
+    )
     openai_api_key: str | None = Field(
         default=None,
         validation_alias=AliasChoices("DX_OPENAI_API_KEY", "OPENAI_API_KEY"),
@@ -33,6 +200,79 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("DX_OPENAI_BASE_URL", "OPENAI_BASE_URL"),
         description="Optional custom base URL for OpenAI-compatible endpoints (e.g., LiteLLM)",
     )
+    llm_timeout_seconds: float = Field(
+        default=120.0, gt=0, description="Read/write timeout for a single LLM HTTP request"
+    )
+    llm_connect_timeout_seconds: float = Field(
+        default=10.0, gt=0, description="TCP/TLS connect timeout for LLM requests"
+    )
+    llm_max_connections: int = Field(
+        default=100, ge=1, description="Upper bound of concurrent LLM connections per pool"
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=20, ge=0, description="Idle keep-alive connections retained per pool"
+    )
+    llm_keepalive_expiry_seconds: float = Field(
+        default=60.0, ge=0, description="How long idle LLM connections stay open"
+    )
+    request_deadline_seconds: float | None = Field(
+        default=600.0,
+        gt=0,
+        description="Wall time a pipeline run may spend before its model calls fail to the"
+        " fallbacks (unset: no deadline)",
+    )
+    llm_max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Retries per model call on timeouts, 429, 5xx and connection errors",
+    )
+    llm_retry_backoff_seconds: float = Field(
+        default=0.5, gt=0, description="Base of the jittered exponential backoff between retries"
+    )
+    llm_retry_backoff_max_seconds: float = Field(
+        default=8.0, gt=0, description="Upper bound of a single backoff delay"
+    )
+    llm_retry_budget_ratio: float = Field(
+        default=0.2, ge=0, description="Retries earned per model call, process-wide"
+    )
+    llm_retry_budget_burst: int = Field(
+        default=20, ge=0, description="Most retries the retry budget can bank"
+    )
+    llm_breaker_enabled: bool = Field(
+        default=True, description="Fail model calls at once while their model keeps failing"
+    )
+    llm_breaker_failure_threshold: int = Field(
+        default=5, ge=1, description="Consecutive failed calls that open a model's breaker"
+    )
+    llm_breaker_reset_seconds: float = Field(
+        default=30.0, gt=0, description="Time an open breaker waits before letting a probe through"
+    )
+    model_prices: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="USD per million tokens by model name or prefix, e.g."
+        ' {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6}}',
+    )
+    token_budget: int | None = Field(
+        default=None,
+        ge=1,
+        description="Default input-token budget per request (payload.tokenBudget overrides)",
+    )
+    token_budget_model: str | None = Field(
+        default=None,
+        description="Cheaper extraction model used when the text path still exceeds the budget"
+        " (overrides the extraction tier)",
+    )
+    llm_cassette_mode: Literal["off", "record", "replay"] = Field(
+        default="off",
+        description="Record model responses to the cassette, or replay them instead of calling",
+    )
+    llm_cassette_path: Path | None = Field(
+        default=None,
+        description="SQLite cassette file (defaults to temp_dir/cassettes/cassette.sqlite)",
+    )
+    llm_cassette_time_scale: float = Field(
+        default=1.0, ge=0, description="Multiplier on recorded latencies when replaying (0: none)"
+    )
 
 
 @lru_cache(maxsize=1)
@@ -43,4 +283,4 @@ def get_settings() -> Settings:
     settings.temp_dir.mkdir(parents=True, exist_ok=True)
     return settings
 
-__all__ = ["Settings", "get_settings"]
+__all__ = ["ModelTier", "Settings", "get_settings"]
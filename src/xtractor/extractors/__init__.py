@@ -0,0 +1,24 @@
+"""Local (non-LLM) text-layer extraction for PDF and DOCX documents."""
+
+from xtractor.extractors.pdf import PdfDocument, parse_pdf, write_pdf_subset
+from xtractor.extractors.summary import summarize_text_layer, text_layer_sufficient
+from xtractor.extractors.text_layer import (
+    DOCX_MIME,
+    PDF_MIME,
+    TextLayer,
+    extract_text_layer,
+    get_text_layer,
+)
+
+__all__ = [
+    "DOCX_MIME",
+    "PDF_MIME",
+    "PdfDocument",
+    "TextLayer",
+    "extract_text_layer",
+    "get_text_layer",
+    "parse_pdf",
+    "summarize_text_layer",
+    "text_layer_sufficient",
+    "write_pdf_subset",
+]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+from typing import List
+from xml.etree.ElementTree import iterparse
+
+from xtractor.extractors.text_layer import TextLayer
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY_PART = "word/document.xml"
+_DRAWING_TAGS = frozenset({f"{_W}drawing", f"{_W}pict", f"{_W}object"})
+
+
+def extract_docx_text(path: Path) -> TextLayer:
+    """Stream ``word/document.xml`` and split paragraphs into pages.
+
+    DOCX has no fixed pagination, so pages follow explicit page breaks and the
+    ``lastRenderedPageBreak`` markers Word writes on save. Elements are cleared
+    as soon as they are consumed so memory stays flat for large documents.
+    """
+
+    pages: List[str] = []
+    current: List[str] = []
+    paragraph: List[str] = []
+    table_pages: List[int] = []
+    drawing_pages: List[int] = []
+    table_depth = 0
+    cell: List[str] = []
+    row: List[str] = []
+
+    def break_page() -> None:
+        pages.append("\n".join(current).strip())
+        current.clear()
+
+    with zipfile.ZipFile(path) as archive, archive.open(_BODY_PART) as body:
+        for event, element in iterparse(body, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == f"{_W}tbl":
+                    if table_depth == 0:
+                        page_number = len(pages) + 1
+                        if page_number not in table_pages:
+                            table_pages.append(page_number)
+                    table_depth += 1
+                elif tag in _DRAWING_TAGS:
+                    page_number = len(pages) + 1
+                    if page_number not in drawing_pages:
+                        drawing_pages.append(page_number)
+                continue
+
+            if tag == f"{_W}t":
+                paragraph.append(element.text or "")
+            elif tag == f"{_W}tab":
+                paragraph.append("\t")
+            elif tag == f"{_W}lastRenderedPageBreak":
+                if paragraph or current:
+                    current.append("".join(paragraph))
+                    paragraph.clear()
+                    break_page()
+            elif tag == f"{_W}br" and element.get(f"{_W}type") == "page":
+                current.append("".join(paragraph))
+                paragraph.clear()
+                break_page()
+            elif tag == f"{_W}p":
+                text = "".join(paragraph).strip()
+                if text:
+                    (cell if table_depth else current).append(text)
+                paragraph.clear()
+                element.clear()
+            elif tag == f"{_W}tc":
+                row.append(" ".join(cell))
+                cell.clear()
+            elif tag == f"{_W}tr":
+                if any(row):
+                    current.append(" | ".join(row))
+                row.clear()
+                element.clear()
+            elif tag == f"{_W}tbl":
+                table_depth -= 1
+                element.clear()
+
+    if current or not pages:
+        break_page()
+    if len(pages) > 1 and not pages[-1]:
+        pages.pop()
+    return TextLayer(
+        source="docx", pages=pages, table_pages=table_pages, drawing_pages=drawing_pages
+    )
+
+
+__all__ = ["extract_docx_text"]
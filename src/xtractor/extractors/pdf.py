@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import io
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional
+
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.errors import DependencyError, PyPdfError
+
+from xtractor.extractors.text_layer import TextLayer
+
+# Text layers and page subsets come from pypdf. Anything it cannot decode yields
+# no text (with a warning), which routes the document to the LLM.
+
+_TEXT_BLOCK_RE = re.compile(rb"\bBT\b(.*?)\bET\b", re.S)
+# Path-construction operators outside text objects; CAD sheets and diagrams run
+# to thousands of these while ruled tables stay well below the threshold.
+_PATH_OP_RE = re.compile(rb"(?<![^\s])(?:re|[mlcvy])(?![^\s])")
+DRAWING_MIN_PATH_OPS = 400
+DRAWING_MIN_IMAGE_PIXELS = 250_000
+# Malformed pages surface as pypdf errors or as plain lookup/type errors.
+_PAGE_ERRORS = (PyPdfError, ValueError, KeyError, IndexError, TypeError, RecursionError)
+# An object whose dictionary declares the document catalog, for files cut short
+# before their cross-reference table and trailer.
+_CATALOG_RE = re.compile(
+    rb"(?<![0-9])(\d+)\s+(\d+)\s+obj\s*<<(?:(?!endobj).)*?/Type\s*/Catalog\b", re.S
+)
+
+
+@dataclass
+class PdfDocument:
+    """A parsed PDF, shareable between the text-layer and subset paths.
+
+    ``readable`` is ``False`` for encrypted files that do not open with an empty
+    password. pypdf readers are not thread-safe, so concurrent page windows take
+    ``lock`` while they read pages.
+    """
+
+    reader: PdfReader
+    readable: bool = True
+    warnings: List[str] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.reader.pages) if self.readable else 0
+
+
+def _with_trailer(data: bytes) -> bytes | None:
+    """``data`` with a trailer pointing at its catalog; pypdf rebuilds the xref from it."""
+
+    match = _CATALOG_RE.search(data)
+    if match is None:
+        return None
+    return data + b"\ntrailer\n<< /Root %s %s R >>\nstartxref\n0\n%%%%EOF\n" % (
+        match[1],
+        match[2],
+    )
+
+
+def _open_reader(data: bytes) -> tuple[PdfReader, List[str]]:
+    try:
+        return PdfReader(io.BytesIO(data), strict=False), []
+    except PyPdfError:
+        repaired = _with_trailer(data)
+        if repaired is None:
+            raise
+    return PdfReader(io.BytesIO(repaired), strict=False), ["truncated PDF: trailer rebuilt"]
+
+
+def parse_pdf(path: Path) -> Optional[PdfDocument]:
+    """Open ``path`` with pypdf; ``None`` for an empty file.
+
+    Truncated files are read as far as their objects go. Encrypted files are
+    decrypted with the empty user password (permission-only encryption); other
+    passwords leave the document unreadable.
+    """
+
+    data = path.read_bytes()
+    if not data:
+        return None
+    reader, warnings = _open_reader(data)
+    readable = True
+    if reader.is_encrypted:
+        try:
+            readable = bool(reader.decrypt(""))
+        except (DependencyError, PyPdfError, NotImplementedError):
+            readable = False
+    return PdfDocument(reader, readable, warnings)
+
+
+def _page_text(page: PageObject) -> str:
+    lines = (" ".join(line.split()) for line in (page.extract_text() or "").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _image_pixels(xobject: Any) -> int:
+    info = xobject.get_object()
+    if info.get("/Subtype") != "/Image":
+        return 0
+    width, height = info.get("/Width"), info.get("/Height")
+    if isinstance(width, int) and isinstance(height, int):
+        return width * height
+    return 0
+
+
+def _has_drawing(page: PageObject) -> bool:
+    """Whether a page carries graphics worth showing the model: large images or vector art."""
+
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is not None:
+        for xobject in xobjects.get_object().values():
+            if _image_pixels(xobject) >= DRAWING_MIN_IMAGE_PIXELS:
+                return True
+    contents = page.get_contents()
+    if contents is None:
+        return False
+    graphics = _TEXT_BLOCK_RE.sub(b" ", contents.get_data())
+    count = 0
+    for _ in _PATH_OP_RE.finditer(graphics):
+        count += 1
+        if count >= DRAWING_MIN_PATH_OPS:
+            return True
+    return False
+
+
+def extract_pdf_text(path: Path) -> TextLayer:
+    """Recover per-page text and drawing pages from the PDF text layer."""
+
+    try:
+        document = parse_pdf(path)
+    except _PAGE_ERRORS as exc:
+        return TextLayer(source="pdf", pages=[], warnings=[f"unreadable PDF: {exc}"])
+    if document is None:
+        return TextLayer(source="pdf", pages=[])
+    if not document.readable:
+        return TextLayer(source="pdf", pages=[], warnings=["encrypted PDF"])
+    pages: List[str] = []
+    drawing_pages: List[int] = []
+    warnings = list(document.warnings)
+    try:
+        reader_pages = list(document.reader.pages)
+    except _PAGE_ERRORS as exc:
+        return TextLayer(source="pdf", pages=[], warnings=[f"unreadable page tree: {exc}"])
+    for number, page in enumerate(reader_pages, start=1):
+        try:
+            text = _page_text(page)
+            drawing = _has_drawing(page)
+        except _PAGE_ERRORS as exc:
+            warnings.append(f"page {number}: {exc}")
+            text, drawing = "", False
+        pages.append(text)
+        if drawing:
+            drawing_pages.append(number)
+    return TextLayer(
+        source="pdf", pages=pages, drawing_pages=drawing_pages, warnings=warnings
+    )
+
+
+def write_pdf_subset(source: Path | PdfDocument, page_numbers: List[int]) -> bytes:
+    """Write a standalone PDF holding only ``page_numbers`` (1-based) of ``source``.
+
+    ``source`` may be a path or an already parsed document, so callers cutting
+    several subsets from one file parse it once. Encrypted files that do not
+    open with the empty password are rejected; the others are written
+    unencrypted.
+    """
+
+    document = parse_pdf(source) if isinstance(source, Path) else source
+    if document is None:
+        raise ValueError("empty PDF")
+    if not document.readable:
+        raise ValueError("encrypted PDF")
+    with document.lock:
+        pages = document.reader.pages
+        wanted = sorted({number for number in page_numbers if 1 <= number <= len(pages)})
+        if not wanted:
+            raise ValueError("no pages selected")
+        writer = PdfWriter()
+        for number in wanted:
+            writer.add_page(pages[number - 1])
+        out = io.BytesIO()
+        writer.write(out)
+    return out.getvalue()
+
+
+__all__ = ["PdfDocument", "extract_pdf_text", "parse_pdf", "write_pdf_subset"]
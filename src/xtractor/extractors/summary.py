@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+from xtractor.extractors.text_layer import TextLayer
+
+IDENTIFIER_RE = re.compile(
+    r"\b(?=[A-Z0-9./-]*\d)(?=[A-Z0-9./-]*[A-Z])[A-Z0-9]+(?:[-/.][A-Z0-9]+)+\b"
+)
+LEGEND_RE = re.compile(r"\b(legend|symbols?|abbreviations)\b", re.IGNORECASE)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+TABLE_ROW_MIN_LINES = 5
+
+
+def _tabular_pages(layer: TextLayer) -> List[int]:
+    """Pages carrying a table per the extractor, or enough identifier rows to look like one."""
+
+    pages = set(layer.table_pages)
+    for number, text in enumerate(layer.pages, start=1):
+        rows = sum(1 for line in text.splitlines() if IDENTIFIER_RE.search(line))
+        if rows >= TABLE_ROW_MIN_LINES:
+            pages.add(number)
+    return sorted(pages)
+
+
+def _page_span(pages: List[int], limit: int = 5) -> str:
+    shown = ", ".join(str(page) for page in pages[:limit])
+    return shown + (" and more" if len(pages) > limit else "")
+
+
+def _identifiers(layer: TextLayer, limit: int = 5) -> List[str]:
+    seen: List[str] = []
+    for match in IDENTIFIER_RE.finditer(layer.text):
+        candidate = match.group(0)
+        if candidate not in seen:
+            seen.append(candidate)
+        if len(seen) >= limit:
+            break
+    return seen
+
+
+def _opening_sentences(layer: TextLayer, max_chars: int) -> str:
+    collected: List[str] = []
+    length = 0
+    for sentence in SENTENCE_RE.split(layer.text):
+        sentence = " ".join(sentence.split())
+        if len(sentence) < 3:
+            continue
+        if length + len(sentence) > max_chars and collected:
+            break
+        collected.append(sentence[:max_chars])
+        length += len(sentence) + 1
+        if len(collected) >= 4:
+            break
+    return " ".join(collected)
+
+
+def summarize_text_layer(layer: TextLayer, max_chars: int = 400) -> tuple[str, List[str]]:
+    """Build a ``(concise_summary, hints)`` pair from the text layer alone.
+
+    The output mirrors what the file-understanding prompt asks the model for:
+    a short description, whether tables or legends exist and where, and a few
+    salient identifiers.
+    """
+
+    words = len(layer.text.split())
+    noun = "page" if layer.page_count == 1 else "pages"
+    sentences = [
+        f"{layer.source.upper()} document with {layer.page_count} {noun} and a text layer"
+        f" of about {words} words.",
+    ]
+    opening = _opening_sentences(layer, max_chars)
+    if opening:
+        sentences.append(f"It opens with: {opening}")
+
+    hints: List[str] = []
+    table_pages = _tabular_pages(layer)
+    if table_pages:
+        sentences.append(f"Tables appear around page {_page_span(table_pages)}.")
+        hints.extend(f"table around page {page}" for page in table_pages[:3])
+    legend_pages = [
+        number for number, text in enumerate(layer.pages, start=1) if LEGEND_RE.search(text)
+    ]
+    if legend_pages:
+        sentences.append(f"A symbol legend appears around page {_page_span(legend_pages)}.")
+        hints.append(f"symbol legend around page {legend_pages[0]}")
+    identifiers = _identifiers(layer)
+    if identifiers:
+        hints.append("identifiers: " + ", ".join(identifiers))
+    return " ".join(sentences), hints
+
+
+def text_layer_sufficient(
+    layer: TextLayer | None,
+    *,
+    min_chars_per_page: int,
+    min_page_coverage: float,
+    min_printable_ratio: float,
+) -> bool:
+    """Decide whether the text layer is rich enough to skip the multimodal summary call."""
+
+    if layer is None or not layer.page_count:
+        return False
+    if layer.char_count / layer.page_count < min_chars_per_page:
+        return False
+    if layer.page_coverage(min_chars=20) < min_page_coverage:
+        return False
+    return layer.printable_ratio() >= min_printable_ratio
+
+
+__all__ = ["summarize_text_layer", "text_layer_sufficient"]
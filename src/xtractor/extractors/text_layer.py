@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Literal
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from xtractor.adapters.document import DocumentHandle
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PDF_MIME = "application/pdf"
+
+
+@dataclass
+class TextLayer:
+    """Text recovered locally from a document, one entry per page."""
+
+    source: Literal["pdf", "docx"]
+    pages: List[str]
+    table_pages: List[int] = field(default_factory=list)
+    drawing_pages: List[int] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def char_count(self) -> int:
+        return sum(len(page) for page in self.pages)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.pages)
+
+    def page_coverage(self, min_chars: int = 1) -> float:
+        """Fraction of pages carrying at least ``min_chars`` characters of text."""
+
+        if not self.pages:
+            return 0.0
+        covered = sum(1 for page in self.pages if len(page.strip()) >= min_chars)
+        return covered / len(self.pages)
+
+    def printable_ratio(self) -> float:
+        """Share of non-whitespace characters that are printable, a proxy for bad encodings."""
+
+        total = 0
+        printable = 0
+        for page in self.pages:
+            for char in page:
+                if char.isspace():
+                    continue
+                total += 1
+                if char.isprintable() and char != "�":
+                    printable += 1
+        return printable / total if total else 0.0
+
+
+def extract_text_layer(path: Path, mime: str) -> TextLayer | None:
+    """Extract the text layer for supported mime types; ``None`` when unsupported."""
+
+    if mime == DOCX_MIME:
+        from xtractor.extractors.docx import extract_docx_text
+
+        return extract_docx_text(path)
+    if mime == PDF_MIME:
+        from xtractor.extractors.pdf import extract_pdf_text
+
+        return extract_pdf_text(path)
+    return None
+
+
+def _safe_extract(document: "DocumentHandle", mime: str) -> TextLayer | None:
+    try:
+        return extract_text_layer(document.path, mime)
+    except Exception:  # pragma: no cover - malformed documents degrade to the LLM path
+        return None
+
+
+def get_text_layer(document: "DocumentHandle", mime: str) -> TextLayer | None:
+    """Return the run-scoped text layer, extracting it at most once per document."""
+
+    return document.derived(f"text_layer:{mime}", lambda handle: _safe_extract(handle, mime))
+
+
+__all__ = ["DOCX_MIME", "PDF_MIME", "TextLayer", "extract_text_layer", "get_text_layer"]
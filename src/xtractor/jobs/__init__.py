@@ -0,0 +1,13 @@
+"""Persistent job queue and worker pool behind the asynchronous ``/v1/jobs`` API."""
+
+from xtractor.jobs.store import Job, JobStore, QueueFullError, get_job_store
+from xtractor.jobs.worker import JobFailedError, JobWorkerPool
+
+__all__ = [
+    "Job",
+    "JobFailedError",
+    "JobStore",
+    "JobWorkerPool",
+    "QueueFullError",
+    "get_job_store",
+]
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterator, Literal, Mapping, Optional
+from uuid import uuid4
+
+from xtractor.config.settings import get_settings
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+QUEUED: JobStatus = "queued"
+RUNNING: JobStatus = "running"
+SUCCEEDED: JobStatus = "succeeded"
+FAILED: JobStatus = "failed"
+
+# Assumed duration of a job before any has finished, for Retry-After estimates.
+DEFAULT_JOB_SECONDS = 60.0
+
+
+class QueueFullError(RuntimeError):
+    """Raised by :meth:`JobStore.enqueue` when the backlog bound is reached."""
+
+    def __init__(self, pending: int, retry_after: int) -> None:
+        super().__init__(f"Job queue is full ({pending} pending); retry in {retry_after}s")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    status: JobStatus
+    filename: str
+    upload_path: Path
+    sha256: str
+    size: int
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, Any]] = None
+    owner: Optional[str] = None
+    lease_until: Optional[float] = None
+
+
+_COLUMNS = (
+    "id, status, filename, upload_path, sha256, size, payload, attempts,"
+    " created_at, started_at, finished_at, result, error, owner, lease_until"
+)
+# Columns added after the first release, created on open when missing.
+_ADDED_COLUMNS = (("owner", "TEXT"), ("lease_until", "REAL"))
+
+
+def _row_to_job(row: tuple) -> Job:
+    (
+        job_id,
+        status,
+        filename,
+        upload_path,
+        sha256,
+        size,
+        payload,
+        attempts,
+        created_at,
+        started_at,
+        finished_at,
+        result,
+        error,
+        owner,
+        lease_until,
+    ) = row
+    return Job(
+        id=job_id,
+        status=status,
+        filename=filename,
+        upload_path=Path(upload_path),
+        sha256=sha256,
+        size=size,
+        payload=json.loads(payload),
+        attempts=attempts,
+        created_at=created_at,
+        started_at=started_at,
+        finished_at=finished_at,
+        result=json.loads(result) if result else None,
+        error=json.loads(error) if error else None,
+        owner=owner,
+        lease_until=lease_until,
+    )
+
+
+class JobStore:
+    """Persistent SQLite job queue with a bounded backlog.
+
+    Every state change is a single transaction, so a process restart loses at
+    most the work in flight. A claimed job is leased to this store's ``owner``
+    for ``lease_seconds`` and the lease is renewed while the job runs; once a
+    lease expires (its process died), :meth:`recover` puts the job back in the
+    queue. Several processes can share one file without taking over each
+    other's live jobs.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_pending: int,
+        max_attempts: int = 3,
+        lease_seconds: float = 60.0,
+        owner: str | None = None,
+    ) -> None:
+        self.path = path
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL,"
+                " upload_path TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL,"
+                " payload TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL,"
+                " result TEXT, error TEXT, owner TEXT, lease_until REAL)"
+            )
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in _ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so a claim's SELECT and
+        # UPDATE cannot interleave with another process sharing the file.
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def _read(self, sql: str, params: tuple = ()) -> list[tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _pending(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+        ).fetchone()[0]
+
+    def retry_after(self, pending: int, workers: int) -> int:
+        """Estimate when a slot frees up from recent job durations and the backlog."""
+
+        average = self._read(
+            "SELECT AVG(finished_at - started_at) FROM ("
+            " SELECT finished_at, started_at FROM jobs"
+            " WHERE status = ? AND started_at IS NOT NULL"
+            " ORDER BY finished_at DESC LIMIT 50)",
+            (SUCCEEDED,),
+        )[0][0]
+        per_job = float(average) if average else DEFAULT_JOB_SECONDS
+        # The oldest pending job frees a slot after about one job per worker.
+        overflow = max(1, pending - self.max_pending + 1)
+        return max(1, int(per_job * overflow / max(1, workers) + 0.5))
+
+    def enqueue(
+        self,
+        *,
+        filename: str,
+        upload_path: Path,
+        sha256: str,
+        size: int,
+        payload: Mapping[str, Any],
+        workers: int = 1,
+    ) -> Job:
+        now = time()
+        job = Job(
+            id=uuid4().hex,
+            status=QUEUED,
+            filename=filename,
+            upload_path=upload_path,
+            sha256=sha256,
+            size=size,
+            payload=dict(payload),
+            attempts=0,
+            created_at=now,
+        )
+        with self._transaction() as conn:
+            pending = self._pending(conn)
+            if pending >= self.max_pending:
+                full = pending
+            else:
+                full = None
+                conn.execute(
+                    f"INSERT INTO jobs ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, NULL,"
+                    " NULL, NULL, NULL, NULL, NULL)",
+                    (
+                        job.id,
+                        job.status,
+                        job.filename,
+                        str(job.upload_path),
+                        job.sha256,
+                        job.size,
+                        json.dumps(job.payload, ensure_ascii=False),
+                        job.created_at,
+                    ),
+                )
+        if full is not None:
+            raise QueueFullError(full, self.retry_after(full, workers))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        rows = self._read(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+        return _row_to_job(rows[0]) if rows else None
+
+    def claim(self) -> Optional[Job]:
+        """Atomically move the oldest queued job to ``running``, leased to this store."""
+
+        now = time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1,"
+                " owner = ?, lease_until = ? WHERE id = ?",
+                (RUNNING, now, self.owner, now + self.lease_seconds, row[0]),
+            )
+        return self.get(row[0])
+
+    def renew(self, job_id: str) -> bool:
+        """Extend the lease on a running job; ``False`` once the job is no longer ours."""
+
+        with self._transaction() as conn:
+            return (
+                conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND owner = ?",
+                    (time() + self.lease_seconds, job_id, RUNNING, self.owner),
+                ).rowcount
+                > 0
+            )
+
+    def complete(self, job_id: str, result: Mapping[str, Any]) -> bool:
+        return self._finish(job_id, SUCCEEDED, "result", result)
+
+    def fail(self, job_id: str, error: Mapping[str, Any]) -> bool:
+        return self._finish(job_id, FAILED, "error", error)
+
+    def _finish(
+        self, job_id: str, status: JobStatus, column: str, body: Mapping[str, Any]
+    ) -> bool:
+        """Record the outcome of a job this store still holds; ``False`` if it lost the lease."""
+
+        with self._transaction() as conn:
+            return (
+                conn.execute(
+                    f"UPDATE jobs SET status = ?, finished_at = ?, {column} = ?,"
+                    " lease_until = NULL WHERE id = ? AND status = ? AND owner = ?",
+                    (
+                        status,
+                        time(),
+                        json.dumps(dict(body), ensure_ascii=False, default=str),
+                        job_id,
+                        RUNNING,
+                        self.owner,
+                    ),
+                ).rowcount
+                > 0
+            )
+
+    def recover(self) -> tuple[int, list[Job]]:
+        """Requeue running jobs whose lease expired because their process stopped renewing it.
+
+        Jobs that already used ``max_attempts`` are failed instead, so a document
+        that crashes the worker cannot loop forever. Returns the number requeued
+        and the jobs that were failed (their uploads can be removed).
+        """
+
+        now = time()
+        expired = "status = ? AND (lease_until IS NULL OR lease_until < ?)"
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE {expired}", (RUNNING, now)
+            ).fetchall()
+            running = [_row_to_job(row) for row in rows]
+            exhausted = [job for job in running if job.attempts >= self.max_attempts]
+            for job in exhausted:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = ?, lease_until = NULL"
+                    " WHERE id = ?",
+                    (
+                        FAILED,
+                        now,
+                        json.dumps(
+                            {
+                                "status": "error",
+                                "code": "JOB_ABANDONED",
+                                "message": f"Job interrupted {job.attempts} times",
+                            }
+                        ),
+                        job.id,
+                    ),
+                )
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL"
+                f" WHERE {expired}",
+                (QUEUED, RUNNING, now),
+            ).rowcount
+        return requeued, exhausted
+
+    def release(self) -> int:
+        """Requeue this store's running jobs on shutdown, without counting the attempt."""
+
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL,"
+                " attempts = MAX(attempts - 1, 0) WHERE status = ? AND owner = ?",
+                (QUEUED, RUNNING, self.owner),
+            ).rowcount
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Drop finished jobs whose results are older than the retention window."""
+
+        with self._transaction() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, time() - older_than_seconds),
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._read("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return {status: count for status, count in rows}
+
+
+@lru_cache(maxsize=1)
+def get_job_store() -> JobStore:
+    settings = get_settings()
+    path = settings.jobs_db_path or settings.temp_dir / "jobs" / "jobs.sqlite"
+    return JobStore(
+        path,
+        settings.jobs_max_pending,
+        settings.jobs_max_attempts,
+        lease_seconds=settings.jobs_lease_seconds,
+    )
+
+
+__all__ = [
+    "FAILED",
+    "Job",
+    "JobStatus",
+    "JobStore",
+    "QUEUED",
+    "QueueFullError",
+    "RUNNING",
+    "SUCCEEDED",
+    "get_job_store",
+]
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from xtractor.jobs.store import Job, JobStore
+
+logger = logging.getLogger(__name__)
+
+JobExecutor = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobFailedError(Exception):
+    """Raised by a :data:`JobExecutor` to fail a job with a structured error body."""
+
+    def __init__(self, error: Dict[str, Any]) -> None:
+        super().__init__(error.get("message", "job failed"))
+        self.error = error
+
+
+class JobWorkerPool:
+    """Fixed number of asyncio workers draining a :class:`JobStore`.
+
+    Workers sleep until :meth:`notify` is called or ``poll_interval`` elapses, so
+    jobs enqueued by another process are still picked up. A running job's lease
+    is renewed every third of ``store.lease_seconds``. Once per lease period a
+    worker requeues jobs whose lease expired (their process died) and purges
+    finished jobs past ``retention_seconds``. Jobs interrupted by :meth:`stop`
+    are put back in the queue.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        execute: JobExecutor,
+        *,
+        workers: int,
+        poll_interval: float = 1.0,
+        retention_seconds: float = 24 * 3600,
+        on_finished: Optional[Callable[[Job], None]] = None,
+    ) -> None:
+        self.store = store
+        self.execute = execute
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.on_finished = on_finished
+        self._wake = asyncio.Event()
+        self._tasks: List[asyncio.Task[None]] = []
+        self._next_housekeeping = 0.0
+
+    async def start(self) -> None:
+        await self._housekeeping()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"dx-job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        released = await asyncio.to_thread(self.store.release)
+        if released:
+            logger.info("Requeued %d job(s) interrupted by shutdown", released)
+
+    def notify(self) -> None:
+        """Wake idle workers after an enqueue."""
+
+        self._wake.set()
+
+    async def _housekeeping(self) -> None:
+        """Requeue jobs with expired leases and purge finished jobs past retention."""
+
+        self._next_housekeeping = time.monotonic() + self.store.lease_seconds
+        requeued, abandoned = await asyncio.to_thread(self.store.recover)
+        for job in abandoned:
+            self._finished(job)
+        if requeued:
+            logger.info("Requeued %d interrupted job(s)", requeued)
+        purged = await asyncio.to_thread(self.store.purge, self.retention_seconds)
+        if purged:
+            logger.info("Purged %d finished job(s)", purged)
+
+    async def _worker(self) -> None:
+        while True:
+            if time.monotonic() >= self._next_housekeeping:
+                await self._housekeeping()
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self._run(job)
+
+    async def _keep_lease(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            if not await asyncio.to_thread(self.store.renew, job.id):
+                logger.warning("Lost the lease on job %s", job.id)
+                return
+
+    async def _run(self, job: Job) -> None:
+        lease = asyncio.create_task(self._keep_lease(job), name=f"dx-job-lease-{job.id}")
+        try:
+            result = await self.execute(job)
+        except asyncio.CancelledError:
+            raise
+        except JobFailedError as exc:
+            recorded = await asyncio.to_thread(self.store.fail, job.id, exc.error)
+        except Exception as exc:  # pragma: no cover - executor bug; keep the worker alive
+            logger.exception("Job %s failed", job.id)
+            error = {"status": "error", "code": "PIPELINE_FAILED", "message": str(exc)}
+            recorded = await asyncio.to_thread(self.store.fail, job.id, error)
+        else:
+            recorded = await asyncio.to_thread(self.store.complete, job.id, result)
+        finally:
+            lease.cancel()
+        if not recorded:
+            # The lease expired and the job was requeued; its new run owns the upload.
+            logger.warning("Job %s was taken over after its lease expired; outcome dropped", job.id)
+            return
+        self._finished(job)
+
+    def _finished(self, job: Job) -> None:
+        if self.on_finished is not None:
+            self.on_finished(job)
+
+
+__all__ = ["JobExecutor", "JobFailedError", "JobWorkerPool"]
@@ -23,8 +23,20 @@ class SchemaModel(BaseModel):
 class ExtractPayload(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra="forbid")
 
-    output_format: Literal["json"] = Field(alias="outputFormat", default="json")
-    schema: SchemaModel
+    output_format: Literal["json", "columns", "ndjson", "csv"] = Field(
+        alias="outputFormat", default="json"
+    )
+    schema: SchemaModel | None = None
+    # Id returned by POST /v1/schemas; replaces an inline ``schema``.
+    schema_id: str | None = Field(alias="schemaId", default=None)
+    # Several schemas over the same document: ingested and summarized once.
+    schemas: List[SchemaModel] | None = Field(default=None, min_length=1)
+    # Overrides DX_PIPELINE_MODE for this request.
+    pipeline_mode: Literal["two_pass", "single_pass"] | None = Field(
+        alias="pipelineMode", default=None
+    )
+    # Input tokens this request may spend; over it, extraction takes a cheaper path.
+    token_budget: int | None = Field(alias="tokenBudget", default=None, ge=1)
 
 
 __all__ = ["SchemaFieldModel", "SchemaModel", "ExtractPayload"]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any, Dict, List, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -18,6 +19,17 @@ class ExtractionResultModel(BaseModel):
     rows: List[Dict[str, Any]]
 
 
+class ColumnarResultModel(BaseModel):
+    """``outputFormat: "columns"``: field names once, then one value array per field."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    key: str
+    fields: List[str]
+    columns: List[List[Any]]
+    row_count: int
+
+
 class SymbolLegendItemModel(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -41,6 +53,23 @@ class AuditModel(BaseModel):
     nodes_path: List[str]
     latency_ms: int | None = None
     timings_ms: Dict[str, int] | None = None
+    cache: Dict[str, str] | None = None
+    peak_rss_bytes: int | None = None
+    extract_input: Dict[str, Any] | None = None
+    chunks: List[Dict[str, Any]] | None = None
+    # Per node: input, output, cached and reasoning tokens, and cost_usd when priced.
+    tokens: Dict[str, Dict[str, int | float | None]] | None = None
+    # The same counts totalled over every model call of the request.
+    usage: Dict[str, int | float | None] | None = None
+    # Set when a token budget applied: estimate, spent, actions taken.
+    token_budget: Dict[str, Any] | None = None
+    # Per node that called a model: tier name, model and reasoning effort.
+    model_tiers: Dict[str, Dict[str, Any]] | None = None
+    schemas: Dict[str, Dict[str, Any]] | None = None
+    prompt_cache: Dict[str, int | float] | None = None
+    output_recovery: Dict[str, int] | None = None
+    # Set on /v1/extract/stream: request start to the first row event.
+    time_to_first_row_ms: int | None = None
 
 
 class ExtractResponse(BaseModel):
@@ -48,7 +77,11 @@ class ExtractResponse(BaseModel):
 
     status: Literal["ok"] = "ok"
     concise_summary: str
-    result: ExtractionResultModel
+    # ``result`` answers a single ``schema``; ``results`` holds one block per
+    # entry of ``schemas``, in request order. Blocks are columnar for
+    # ``outputFormat: "columns"``.
+    result: ExtractionResultModel | ColumnarResultModel | None = None
+    results: List[ExtractionResultModel | ColumnarResultModel] | None = None
     symbols: SymbolSectionModel
     audit: AuditModel
     warnings: List[str] = Field(default_factory=list)
@@ -62,11 +95,68 @@ class ErrorResponse(BaseModel):
     message: str
 
 
+class SchemaResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    schema_id: str
+    key: str
+    field_names: List[str]
+    response_format: Dict[str, Any]
+
+
+class JobResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    attempts: int = 0
+    result: ExtractResponse | None = None
+    error: ErrorResponse | None = None
+
+
+class ProfileSummaryModel(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    profile_id: str
+    trigger: Literal["header", "sampled"]
+    created_at: datetime
+    wall_ms: float
+    process_cpu_ms: float
+    graph_run_id: str | None = None
+    filename: str | None = None
+    file_size: int | None = None
+    pipeline_mode: str | None = None
+    result_cache: str | None = None
+    # Per node (plus ``ingress``, ``upload`` and ``response``): calls, wall_ms,
+    # cpu_ms and alloc_peak_bytes.
+    sections: Dict[str, Dict[str, int | float]] = Field(default_factory=dict)
+
+
+class ProfileResponse(ProfileSummaryModel):
+    top_functions: List[Dict[str, Any]] = Field(default_factory=list)
+    top_allocations: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class ProfileListResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    profiles: List[ProfileSummaryModel]
+
+
 __all__ = [
     "AuditModel",
+    "ColumnarResultModel",
     "ErrorResponse",
     "ExtractResponse",
     "ExtractionResultModel",
+    "JobResponse",
+    "ProfileListResponse",
+    "ProfileResponse",
+    "ProfileSummaryModel",
+    "SchemaResponse",
     "SymbolLegendItemModel",
     "SymbolSectionModel",
 ]
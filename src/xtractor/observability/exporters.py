@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+from xtractor.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class FileSpanExporter:
+    """Appends finished traces to a local NDJSON file, one span per line.
+
+    A trace is written in a single append when its root span ends, so lines
+    of concurrent runs never interleave within a trace.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: Sequence[Mapping[str, Any]]) -> None:
+        if not spans:
+            return
+        text = "".join(
+            json.dumps(span, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+            for span in spans
+        )
+        try:
+            with self._lock, self.path.open("a", encoding="utf-8") as handle:
+                handle.write(text)
+        except OSError:  # pragma: no cover - exporting must never fail a run
+            logger.warning("Could not write spans to %s", self.path, exc_info=True)
+
+
+@lru_cache(maxsize=1)
+def get_span_exporter() -> FileSpanExporter | None:
+    """The configured span exporter, or ``None`` when ``DX_TRACE_EXPORT_PATH`` is unset."""
+
+    path = get_settings().trace_export_path
+    return FileSpanExporter(path) if path is not None else None
+
+
+__all__ = ["FileSpanExporter", "get_span_exporter"]
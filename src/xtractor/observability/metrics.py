@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterable, List, Tuple
+
+from xtractor.config.settings import get_settings
+
+# Seconds; spans from sub-millisecond routing nodes up to multi-minute chunked runs.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent observations per series kept for the quantile estimates.
+_WINDOW = 1024
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative bucket counts plus a sliding window of recent values for quantiles."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.window: Deque[float] = deque(maxlen=_WINDOW)
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.window.append(value)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Nearest-rank quantile of the recent window (``None`` before any observation)."""
+
+        if not self.window:
+            return None
+        ordered = sorted(self.window)
+        return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms, rendered in the Prometheus text format.
+
+    Series are keyed by metric name and label set. Histograms also keep a
+    window of recent observations, exported as ``<name>_window`` summaries with
+    p50/p95/p99 so percentiles are readable without a Prometheus server.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1, *, help: str = "", **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            self._help.setdefault(name, ("counter", help))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, *, help: str = "", **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            self._help.setdefault(name, ("gauge", help))
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, *, help: str = "", **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help))
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def quantiles(self, name: str) -> List[Dict[str, Any]]:
+        """p50/p95/p99 and count per label set of histogram ``name``."""
+
+        with self._lock:
+            series = dict(self._histograms.get(name, {}))
+            return [
+                {
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+                }
+                for labels, histogram in series.items()
+            ]
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                _, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_render_labels(labels)} {_number(value)}")
+            for name in sorted(self._gauges):
+                _, help_text = self._help[name]
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                for labels, value in sorted(self._gauges[name].items()):
+                    lines.append(f"{name}{_render_labels(labels)} {_number(value)}")
+            for name in sorted(self._histograms):
+                _, help_text = self._help[name]
+                series = sorted(self._histograms[name].items())
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in series:
+                    for bound, count in zip(histogram.buckets, histogram.counts, strict=True):
+                        le = _render_labels(labels, le=_number(bound))
+                        lines.append(f"{name}_bucket{le} {count}")
+                    le = _render_labels(labels, le="+Inf")
+                    lines.append(f"{name}_bucket{le} {histogram.count}")
+                    lines.append(f"{name}_sum{_render_labels(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_render_labels(labels)} {histogram.count}")
+                window = f"{name}_window"
+                lines += [
+                    f"# HELP {window} {help_text} (last {_WINDOW} observations)",
+                    f"# TYPE {window} summary",
+                ]
+                for labels, histogram in series:
+                    for q in QUANTILES:
+                        value = histogram.quantile(q)
+                        if value is not None:
+                            quantile = _render_labels(labels, quantile=str(q))
+                            lines.append(f"{window}{quantile} {_number(value)}")
+                    values = list(histogram.window)
+                    lines.append(f"{window}_sum{_render_labels(labels)} {_number(sum(values))}")
+                    lines.append(f"{window}_count{_render_labels(labels)} {len(values)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._help.clear()
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+@lru_cache(maxsize=1)
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry configured from settings."""
+
+    return MetricsRegistry(enabled=get_settings().metrics_enabled)
+
+
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "Histogram",
+    "MetricsRegistry",
+    "QUANTILES",
+    "get_metrics_registry",
+]
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from uuid import uuid4
+
+from xtractor.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-DX-Profile"
+# Entries kept in the stored summary; the full profile is in the ``.prof`` file.
+_TOP_FUNCTIONS = 40
+_TOP_ALLOCATIONS = 25
+
+_UNDECIDED = object()
+_SESSION: ContextVar[Any] = ContextVar("xtractor_profile", default=_UNDECIDED)
+# The cProfile profiler currently enabled on each thread, whichever session owns it.
+_ACTIVE = threading.local()
+
+_TRACEMALLOC_LOCK = threading.Lock()
+_TRACEMALLOC_USERS = 0
+_TRACEMALLOC_OWNED = False
+
+
+def _start_tracemalloc() -> None:
+    global _TRACEMALLOC_USERS, _TRACEMALLOC_OWNED
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USERS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _TRACEMALLOC_OWNED = True
+        _TRACEMALLOC_USERS += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _TRACEMALLOC_USERS, _TRACEMALLOC_OWNED
+    with _TRACEMALLOC_LOCK:
+        _TRACEMALLOC_USERS -= 1
+        if _TRACEMALLOC_USERS == 0 and _TRACEMALLOC_OWNED:
+            tracemalloc.stop()
+            _TRACEMALLOC_OWNED = False
+
+
+@dataclass
+class _ThreadProfile:
+    profiler: cProfile.Profile = field(default_factory=cProfile.Profile)
+    depth: int = 0
+    # Whether the profiler was ever enabled, i.e. holds statistics to merge.
+    used: bool = False
+
+
+def _enable(profiler: cProfile.Profile) -> bool:
+    """Enable ``profiler``, or return ``False`` if another profiler holds the process.
+
+    From Python 3.12 cProfile uses ``sys.monitoring``, which admits one
+    profiler per process, so a second one enabled concurrently (a worker
+    thread, another request) raises ``ValueError``.
+    """
+
+    try:
+        profiler.enable()
+    except ValueError:
+        logger.debug("cProfile is busy elsewhere; timing the section only")
+        return False
+    return True
+
+
+class ProfileSession:
+    """CPU and allocation profile of one request, filled in section by section.
+
+    Each section (a graph node, or response rendering) enables this session's
+    cProfile profiler on the thread it runs on, so nodes executed on worker
+    threads are captured too. Async sections run on the event loop and also
+    capture whatever else the loop interleaves. Where another profiler is
+    already enabled (Python 3.12+ allows one per process), the section is
+    timed but not CPU-profiled. Per-section allocation peaks come from the
+    process-wide tracemalloc peak, so sections running concurrently report
+    overlapping peaks.
+    """
+
+    def __init__(self, trigger: str) -> None:
+        self.profile_id = uuid4().hex[:12]
+        self.trigger = trigger
+        self.created_at = time.time()
+        self.meta: Dict[str, Any] = {}
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        self._threads: Dict[int, _ThreadProfile] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+
+    def _thread_profile(self) -> _ThreadProfile:
+        with self._lock:
+            return self._threads.setdefault(threading.get_ident(), _ThreadProfile())
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        entry = self._thread_profile()
+        owner = getattr(_ACTIVE, "profiler", None)
+        # A thread runs one profiler at a time; sections of another session
+        # sharing the thread (concurrent requests on the event loop) are timed
+        # but not CPU-profiled.
+        profiling = owner is None or owner is entry.profiler
+        if profiling and entry.depth == 0:
+            profiling = _enable(entry.profiler)
+            if profiling:
+                _ACTIVE.profiler = entry.profiler
+                entry.used = True
+        if profiling:
+            entry.depth += 1
+        traced_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall_ms = (time.perf_counter() - started) * 1000
+            cpu_ms = (time.thread_time() - cpu_started) * 1000
+            alloc_peak = max(0, tracemalloc.get_traced_memory()[1] - traced_before)
+            if profiling:
+                entry.depth -= 1
+                if entry.depth == 0:
+                    entry.profiler.disable()
+                    _ACTIVE.profiler = None
+            with self._lock:
+                stats = self.sections.setdefault(
+                    name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "alloc_peak_bytes": 0}
+                )
+                stats["calls"] += 1
+                stats["wall_ms"] = round(stats["wall_ms"] + wall_ms, 3)
+                stats["cpu_ms"] = round(stats["cpu_ms"] + cpu_ms, 3)
+                stats["alloc_peak_bytes"] = max(stats["alloc_peak_bytes"], alloc_peak)
+
+    def stats(self) -> pstats.Stats | None:
+        """The merged cProfile statistics of every thread this session ran on."""
+
+        profilers = [entry.profiler for entry in self._threads.values() if entry.used]
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def summary(self, stats: pstats.Stats | None, snapshot: Any) -> Dict[str, Any]:
+        entries = getattr(stats, "stats", {}) if stats is not None else {}
+        # Ordered by cumulative time: (_, calls, tottime, cumtime, callers).
+        rows = sorted(entries.items(), key=lambda item: item[1][3], reverse=True)
+        functions = [
+            {
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+            for (filename, line, function), (_, calls, tottime, cumtime, _) in rows[
+                :_TOP_FUNCTIONS
+            ]
+        ]
+        allocations = [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in (snapshot.statistics("lineno")[:_TOP_ALLOCATIONS] if snapshot else [])
+        ]
+        return {
+            "profile_id": self.profile_id,
+            "trigger": self.trigger,
+            "created_at": self.created_at,
+            "wall_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "process_cpu_ms": round((time.process_time() - self._cpu_started) * 1000, 3),
+            **self.meta,
+            "sections": self.sections,
+            "top_functions": functions,
+            "top_allocations": allocations,
+        }
+
+
+class ProfileStore:
+    """Profiles under ``temp_dir/profiles``: a JSON summary and a ``.prof`` file per request.
+
+    The ``.prof`` file loads with ``pstats`` or snakeviz; the oldest profiles
+    are removed once more than ``max_profiles`` are stored.
+    """
+
+    def __init__(self, directory: Path, max_profiles: int) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, summary: Dict[str, Any], stats: pstats.Stats | None) -> None:
+        profile_id = summary["profile_id"]
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if stats is not None:
+                stats.dump_stats(str(self.directory / f"{profile_id}.prof"))
+            path = self.directory / f"{profile_id}.json"
+            path.write_text(json.dumps(summary, default=str), encoding="utf-8")
+            self._prune()
+
+    def _prune(self) -> None:
+        summaries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in summaries[: max(0, len(summaries) - self.max_profiles)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first, without their function and allocation tables."""
+
+        entries = []
+        for path in self.directory.glob("*.json"):
+            summary = self._read(path)
+            if summary is not None:
+                summary.pop("top_functions", None)
+                summary.pop("top_allocations", None)
+                entries.append(summary)
+        return sorted(entries, key=lambda entry: entry.get("created_at", 0), reverse=True)
+
+    def get(self, profile_id: str) -> Dict[str, Any] | None:
+        if not profile_id.isalnum():
+            return None
+        return self._read(self.directory / f"{profile_id}.json")
+
+    def stats_path(self, profile_id: str) -> Path | None:
+        path = self.directory / f"{profile_id}.prof"
+        return path if profile_id.isalnum() and path.is_file() else None
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any] | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+
+@lru_cache(maxsize=1)
+def get_profile_store() -> ProfileStore:
+    settings = get_settings()
+    return ProfileStore(settings.temp_dir / "profiles", settings.profiling_max_profiles)
+
+
+def current_profile() -> ProfileSession | None:
+    session = _SESSION.get()
+    return session if isinstance(session, ProfileSession) else None
+
+
+def _trigger(requested: bool) -> str | None:
+    settings = get_settings()
+    if requested and settings.profiling_allow_header:
+        return "header"
+    if settings.profiling_enabled and random.random() < settings.profiling_sample_rate:
+        return "sampled"
+    return None
+
+
+@contextmanager
+def profile_request(requested: bool = False) -> Iterator[ProfileSession | None]:
+    """Profile the enclosed request if asked via header or picked by sampling.
+
+    The outermost call decides once per request; nested calls (the API around
+    the runner) join its session, or stay unprofiled alongside it.
+    """
+
+    if _SESSION.get() is not _UNDECIDED:
+        yield current_profile()
+        return
+    trigger = _trigger(requested)
+    session = ProfileSession(trigger) if trigger else None
+    token = _SESSION.set(session)
+    if session is None:
+        try:
+            yield None
+        finally:
+            _SESSION.reset(token)
+        return
+    _start_tracemalloc()
+    try:
+        yield session
+    finally:
+        _SESSION.reset(token)
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        _stop_tracemalloc()
+        try:
+            stats = session.stats()
+            get_profile_store().save(session.summary(stats, snapshot), stats)
+        except Exception:  # pragma: no cover - profiling must never fail a request
+            logger.warning("Could not store profile %s", session.profile_id, exc_info=True)
+
+
+@contextmanager
+def profile_section(name: str) -> Iterator[None]:
+    """Attribute the enclosed block to section ``name`` of the current profile, if any."""
+
+    session = _SESSION.get()
+    if not isinstance(session, ProfileSession):
+        yield
+        return
+    with session.section(name):
+        yield
+
+
+__all__ = [
+    "PROFILE_HEADER",
+    "ProfileSession",
+    "ProfileStore",
+    "current_profile",
+    "get_profile_store",
+    "profile_request",
+    "profile_section",
+]
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now.
+
+    Uses ``/proc/self/statm`` where available; elsewhere falls back to the
+    process high-water mark, which over-reports but never under-reports.
+    """
+
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+__all__ = ["current_rss_bytes"]
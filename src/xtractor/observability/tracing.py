@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List
+from uuid import uuid4
+
+from xtractor.observability.exporters import get_span_exporter
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.observability.profiling import profile_section
+
+# Span kinds; metrics are derived per kind when a span ends.
+PIPELINE = "pipeline"
+NODE = "node"
+LLM = "llm"
+
+
+@dataclass
+class Span:
+    """One timed unit of work: a pipeline run, a graph node or a model call.
+
+    ``cpu_ms`` is the CPU time of the thread that ran the span; for async nodes
+    that is the event loop, so it includes work interleaved from other runs.
+    """
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: uuid4().hex[:16])
+    parent_id: str | None = None
+    parent_node: str | None = None
+    start_unix: float = field(default_factory=time.time)
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix": round(self.start_unix, 6),
+            "wall_ms": round(self.wall_ms, 3),
+            "cpu_ms": round(self.cpu_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _Trace:
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+_CURRENT: ContextVar[Span | None] = ContextVar("xtractor_span", default=None)
+_TRACE: ContextVar[_Trace | None] = ContextVar("xtractor_trace", default=None)
+
+
+def current_span() -> Span | None:
+    return _CURRENT.get()
+
+
+def _observe(span: Span) -> None:
+    metrics = get_metrics_registry()
+    seconds = span.wall_ms / 1000
+    attributes = span.attributes
+    if span.kind == NODE:
+        metrics.observe(
+            "dx_node_duration_seconds", seconds, help="Graph node wall time", node=span.name
+        )
+        metrics.observe(
+            "dx_node_cpu_seconds", span.cpu_ms / 1000, help="Graph node CPU time", node=span.name
+        )
+    elif span.kind == LLM:
+        node = span.parent_node or "none"
+        metrics.observe(
+            "dx_llm_call_duration_seconds", seconds, help="Model call wall time", node=node
+        )
+        metrics.inc("dx_llm_calls_total", help="Model calls", node=node, status=span.status)
+        metrics.inc(
+            "dx_llm_request_bytes_total",
+            attributes.get("request_bytes", 0),
+            help="Message content bytes sent to the model",
+            node=node,
+        )
+        for direction in ("input", "output", "cached", "reasoning"):
+            count = attributes.get(f"tokens_{direction}")
+            if count:
+                metrics.inc(
+                    "dx_llm_tokens_total",
+                    count,
+                    help="Provider-reported tokens",
+                    node=node,
+                    direction=direction,
+                )
+        cost = attributes.get("cost_usd")
+        if cost:
+            metrics.inc(
+                "dx_llm_cost_usd_total",
+                cost,
+                help="Model cost from DX_MODEL_PRICES",
+                node=node,
+                model=attributes.get("model", ""),
+            )
+    elif span.kind == PIPELINE:
+        metrics.observe(
+            "dx_pipeline_duration_seconds",
+            seconds,
+            help="Pipeline run wall time",
+            mode=attributes.get("pipeline_mode", "unknown"),
+        )
+        metrics.inc(
+            "dx_pipeline_runs_total",
+            help="Pipeline runs",
+            status=span.status,
+            result_cache=attributes.get("result_cache", "off"),
+        )
+
+
+@contextmanager
+def span(name: str, kind: str = NODE, **attributes: Any) -> Iterator[Span | None]:
+    """Time the enclosed block as a child of the current span (``None`` when disabled)."""
+
+    if not get_metrics_registry().enabled:
+        yield None
+        return
+    parent = _CURRENT.get()
+    trace = _TRACE.get()
+    current = Span(
+        name=name,
+        kind=kind,
+        trace_id=trace.trace_id if trace else "",
+        parent_id=parent.span_id if parent else None,
+        parent_node=_enclosing_node(parent),
+        attributes=dict(attributes),
+    )
+    token = _CURRENT.set(current)
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        yield current
+    except BaseException as exc:
+        current.status, current.error = "error", f"{type(exc).__name__}: {exc}"[:300]
+        raise
+    finally:
+        current.wall_ms = (time.perf_counter() - started) * 1000
+        current.cpu_ms = (time.thread_time() - cpu_started) * 1000
+        _CURRENT.reset(token)
+        if trace is not None:
+            trace.add(current)
+        _observe(current)
+
+
+def _enclosing_node(parent: Span | None) -> str | None:
+    if parent is None:
+        return None
+    return parent.name if parent.kind == NODE else parent.parent_node
+
+
+@contextmanager
+def trace(name: str, trace_id: str, **attributes: Any) -> Iterator[Span | None]:
+    """Root span of a pipeline run; its spans are exported together when it ends."""
+
+    if not get_metrics_registry().enabled:
+        yield None
+        return
+    collected = _Trace(trace_id)
+    token = _TRACE.set(collected)
+    try:
+        with span(name, PIPELINE, **attributes) as root:
+            yield root
+    finally:
+        _TRACE.reset(token)
+        exporter = get_span_exporter()
+        if exporter is not None:
+            exporter.export([item.as_dict() for item in collected.spans])
+
+
+def traced_node(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a graph node (sync or async) so each execution is recorded as a ``node`` span.
+
+    On profiled runs the node is also a section of the request's profile.
+    """
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_node(*args: Any, **kwargs: Any) -> Any:
+            with span(name, NODE), profile_section(name):
+                return await func(*args, **kwargs)
+
+        return async_node
+
+    @functools.wraps(func)
+    def node(*args: Any, **kwargs: Any) -> Any:
+        with span(name, NODE), profile_section(name):
+            return func(*args, **kwargs)
+
+    return node
+
+
+__all__ = [
+    "LLM",
+    "NODE",
+    "PIPELINE",
+    "Span",
+    "current_span",
+    "span",
+    "trace",
+    "traced_node",
+]
@@ -1,28 +1,88 @@
 from __future__ import annotations
 
+import functools
+import inspect
+from typing import Any
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
-from xtractor.pipeline.nodes.file_understanding import file_understanding
-from xtractor.pipeline.nodes.multimodal_extract import multimodal_extract
+from xtractor.observability.tracing import traced_node
+from xtractor.pipeline.nodes.chunked_extract import achunked_extract, chunked_extract
+from xtractor.pipeline.nodes.common import record_node
+from xtractor.pipeline.nodes.extract_router import extract_router
+from xtractor.pipeline.nodes.file_understanding import afile_understanding, file_understanding
+from xtractor.pipeline.nodes.multimodal_extract import amultimodal_extract, multimodal_extract
 from xtractor.pipeline.nodes.postprocess import postprocess
 from xtractor.pipeline.nodes.prompt_builder import prompt_builder
 from xtractor.pipeline.nodes.prompt_merge import prompt_merge
+from xtractor.pipeline.nodes.schema_fanout import build_schema_fanout, schema_router
+from xtractor.pipeline.nodes.single_pass_extract import (
+    asingle_pass_extract,
+    pass_router,
+    single_pass_extract,
+)
 from xtractor.pipeline.nodes.symbol_agent import symbol_agent
 from xtractor.pipeline.nodes.symbol_router import symbol_router
 from xtractor.pipeline.state import DXState
 
 
-def build_graph() -> StateGraph[DXState]:
-    builder: StateGraph[DXState] = StateGraph(DXState)
-    builder.add_node("file_understanding", file_understanding)
-    builder.add_node("prompt_builder", prompt_builder)
-    builder.add_node("symbol_agent", symbol_agent)
-    builder.add_node("prompt_merge", prompt_merge)
-    builder.add_node("multimodal_extract", multimodal_extract)
-    builder.add_node("postprocess", postprocess)
-
-    builder.set_entry_point("file_understanding")
-    builder.add_edge("file_understanding", "prompt_builder")
+def _recorded(name: str, func: Any) -> Any:
+    """``func`` appending ``name`` to ``metrics.nodes_path`` each time it starts."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_node(state: DXState, *args: Any, **kwargs: Any) -> Any:
+            record_node(state, name)
+            return await func(state, *args, **kwargs)
+
+        return async_node
+
+    @functools.wraps(func)
+    def node(state: DXState, *args: Any, **kwargs: Any) -> Any:
+        record_node(state, name)
+        return func(state, *args, **kwargs)
+
+    return node
+
+
+def _node(name: str, node: Any) -> Any:
+    """``node`` with every execution recorded in the run's path and as a tracing span."""
+
+    if isinstance(node, RunnableLambda):
+        afunc = getattr(node, "afunc", None)
+        return RunnableLambda(
+            traced_node(name, _recorded(name, node.func)),
+            afunc=traced_node(name, _recorded(name, afunc)) if afunc is not None else None,
+            name=name,
+        )
+    return traced_node(name, _recorded(name, node))
+
+
+def _add_schema_stages(builder: StateGraph[DXState], end: str) -> None:
+    """Add the per-schema stages (prompt_builder .. extraction), finishing at ``end``."""
+
+    builder.add_node("prompt_builder", _node("prompt_builder", prompt_builder))
+    builder.add_node("symbol_agent", _node("symbol_agent", symbol_agent))
+    builder.add_node("prompt_merge", _node("prompt_merge", prompt_merge))
+    builder.add_node(
+        "multimodal_extract",
+        _node(
+            "multimodal_extract",
+            RunnableLambda(
+                multimodal_extract, afunc=amultimodal_extract, name="multimodal_extract"
+            ),
+        ),
+    )
+    builder.add_node(
+        "chunked_extract",
+        _node(
+            "chunked_extract",
+            RunnableLambda(chunked_extract, afunc=achunked_extract, name="chunked_extract"),
+        ),
+    )
+
     builder.add_conditional_edges(
         "prompt_builder",
         symbol_router,
@@ -32,8 +92,84 @@ def build_graph() -> StateGraph[DXState]:
         },
     )
     builder.add_edge("symbol_agent", "prompt_merge")
-    builder.add_edge("prompt_merge", "multimodal_extract")
-    builder.add_edge("multimodal_extract", "postprocess")
+    builder.add_conditional_edges(
+        "prompt_merge",
+        extract_router,
+        {
+            "single": "multimodal_extract",
+            "chunked": "chunked_extract",
+        },
+    )
+    builder.add_edge("multimodal_extract", end)
+    builder.add_edge("chunked_extract", end)
+
+
+def build_schema_graph() -> StateGraph[DXState]:
+    """Per-schema subgraph run by ``schema_fanout`` for multi-schema payloads."""
+
+    builder: StateGraph[DXState] = StateGraph(DXState)
+    _add_schema_stages(builder, END)
+    builder.set_entry_point("prompt_builder")
+    return builder
+
+
+def build_graph() -> StateGraph[DXState]:
+    builder: StateGraph[DXState] = StateGraph(DXState)
+    # LLM-bound nodes carry both implementations so the same compiled graph
+    # serves ``invoke`` (CLI) and ``ainvoke`` (API) without blocking the loop.
+    builder.add_node(
+        "file_understanding",
+        _node(
+            "file_understanding",
+            RunnableLambda(
+                file_understanding, afunc=afile_understanding, name="file_understanding"
+            ),
+        ),
+    )
+    builder.add_node(
+        "schema_fanout",
+        _node("schema_fanout", build_schema_fanout(build_schema_graph().compile())),
+    )
+    _add_schema_stages(builder, "postprocess")
+    builder.add_node("postprocess", _node("postprocess", postprocess))
+    # Single-pass variant: one call yields summary, hints and rows; the heuristic
+    # symbol pass then reads the returned summary.
+    builder.add_node(
+        "single_pass_extract",
+        _node(
+            "single_pass_extract",
+            RunnableLambda(
+                single_pass_extract, afunc=asingle_pass_extract, name="single_pass_extract"
+            ),
+        ),
+    )
+    builder.add_node("single_pass_symbols", _node("single_pass_symbols", symbol_agent))
+
+    builder.set_conditional_entry_point(
+        pass_router,
+        {
+            "two_pass": "file_understanding",
+            "single_pass": "single_pass_extract",
+        },
+    )
+    builder.add_conditional_edges(
+        "single_pass_extract",
+        symbol_router,
+        {
+            "symbol_needed": "single_pass_symbols",
+            "skip": "postprocess",
+        },
+    )
+    builder.add_edge("single_pass_symbols", "postprocess")
+    builder.add_conditional_edges(
+        "file_understanding",
+        schema_router,
+        {
+            "single": "prompt_builder",
+            "multi": "schema_fanout",
+        },
+    )
+    builder.add_edge("schema_fanout", "postprocess")
     builder.add_edge("postprocess", END)
     return builder
 
@@ -45,4 +181,4 @@ def compile_graph() -> any:
     return builder.compile()
 
 
-__all__ = ["build_graph", "compile_graph"]
+__all__ = ["build_graph", "build_schema_graph", "compile_graph"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from xtractor.config.settings import ModelTier, Settings
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.pipeline.state import DXState
+
+DEFAULT_TIER = "default"
+SUMMARY_TIER = "summary"
+
+
+def _with_model(settings: Settings, model: str, reasoning_effort: str | None) -> Settings:
+    update = {}
+    if model != settings.mm_model:
+        update["mm_model"] = model
+    if reasoning_effort is not None and reasoning_effort != settings.reasoning_effort:
+        update["reasoning_effort"] = reasoning_effort
+    return settings.model_copy(update=update) if update else settings
+
+
+def summary_settings(settings: Settings) -> tuple[str, Settings]:
+    """The tier and settings for file_understanding calls."""
+
+    if not settings.summary_model and settings.summary_reasoning_effort is None:
+        return DEFAULT_TIER, settings
+    model = settings.summary_model or settings.mm_model
+    return SUMMARY_TIER, _with_model(settings, model, settings.summary_reasoning_effort)
+
+
+def match_extract_tier(
+    tiers: Sequence[ModelTier], page_count: int, file_size: int
+) -> ModelTier | None:
+    """The first tier whose bounds the document fits in.
+
+    A document without a known page count only fits tiers without ``max_pages``,
+    so unknown sizes never land on a small-document model.
+    """
+
+    for tier in tiers:
+        if tier.max_pages is not None and not 0 < page_count <= tier.max_pages:
+            continue
+        if tier.max_bytes is not None and file_size > tier.max_bytes:
+            continue
+        return tier
+    return None
+
+
+def extract_settings(settings: Settings, page_count: int, file_size: int) -> tuple[str, Settings]:
+    """The tier and settings for extraction calls on a document of this size."""
+
+    tier = match_extract_tier(settings.extract_model_tiers, page_count, file_size)
+    if tier is None:
+        return DEFAULT_TIER, settings
+    return tier.name, _with_model(settings, tier.model, tier.reasoning_effort)
+
+
+def record_model_tier(state: DXState, node: str, tier: str, settings: Settings) -> None:
+    """Note the tier, model and reasoning effort ``node`` called as ``metrics.model_tiers``."""
+
+    tiers = state.setdefault("metrics", {}).setdefault("model_tiers", {})
+    tiers[node] = {
+        "tier": tier,
+        "model": settings.mm_model,
+        "reasoning_effort": settings.reasoning_effort or None,
+    }
+    get_metrics_registry().inc(
+        "dx_model_tier_total", help="Model tiers chosen per node", node=node, tier=tier
+    )
+
+
+__all__ = [
+    "DEFAULT_TIER",
+    "SUMMARY_TIER",
+    "extract_settings",
+    "match_extract_tier",
+    "record_model_tier",
+    "summary_settings",
+]
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, List, Mapping, Sequence
+
+from xtractor.adapters.document import DocumentHandle
+from xtractor.adapters.llm import MissingLLMProviderError, build_multimodal_model
+from xtractor.config.settings import Settings, get_settings
+from xtractor.extractors import get_text_layer
+from xtractor.pipeline.nodes.common import (
+    record_fallback,
+    record_latency,
+    record_recovery,
+    record_token_usage,
+    start_timer,
+)
+from xtractor.pipeline.nodes.multimodal_extract import (
+    ainvoke_rows,
+    build_extract_messages,
+    extract_response_format,
+    extraction_settings,
+    fallback_rows,
+    invoke_rows,
+    require_inputs,
+)
+from xtractor.pipeline.state import DXSchema, DXState, ExtractionResult
+from xtractor.pipeline.streaming import active_stream
+
+
+def page_windows(page_count: int, size: int, overlap: int = 0) -> List[List[int]]:
+    """Split ``1..page_count`` into windows of ``size`` pages sharing ``overlap`` pages."""
+
+    step = max(1, size - max(0, overlap))
+    windows: List[List[int]] = []
+    first = 1
+    while first <= page_count:
+        last = min(page_count, first + size - 1)
+        windows.append(list(range(first, last + 1)))
+        if last == page_count:
+            break
+        first += step
+    return windows
+
+
+def _dedupe_fields(schema: DXSchema, settings: Settings) -> List[str]:
+    """Fields identifying a row: configured names first, else fields described as unique."""
+
+    names = [field["name"] for field in schema["fields"]]
+    configured = [name for name in settings.extract_dedupe_fields if name in names]
+    if configured:
+        return configured
+    return [
+        field["name"]
+        for field in schema["fields"]
+        if "unique" in f"{field['name']} {field.get('description', '')}".lower()
+    ]
+
+
+def _identity(row: Mapping[str, Any], fields: Sequence[str]) -> tuple | None:
+    values = tuple(row.get(name) for name in fields)
+    if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+        return None
+    return tuple(
+        " ".join(value.split()).upper() if isinstance(value, str) else value for value in values
+    )
+
+
+def merge_rows(
+    chunks: Sequence[Sequence[Mapping[str, Any]]], key_fields: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """Concatenate chunk rows in page order, folding duplicates into the first occurrence.
+
+    Rows sharing ``key_fields`` values (whitespace/case-insensitive) are merged,
+    filling fields the first occurrence left empty. Rows without key values are
+    only dropped when an identical row was already kept.
+    """
+
+    merged: List[Dict[str, Any]] = []
+    by_key: Dict[tuple, Dict[str, Any]] = {}
+    seen_rows: set = set()
+    for rows in chunks:
+        for row in rows:
+            if not isinstance(row, Mapping):
+                continue
+            key = _identity(row, key_fields) if key_fields else None
+            if key is not None and key in by_key:
+                kept = by_key[key]
+                for name, value in row.items():
+                    if kept.get(name) in (None, "") and value not in (None, ""):
+                        kept[name] = value
+                continue
+            if key is None:
+                fingerprint = repr(sorted(row.items(), key=lambda item: item[0]))
+                if fingerprint in seen_rows:
+                    continue
+                seen_rows.add(fingerprint)
+            copy = dict(row)
+            merged.append(copy)
+            if key is not None:
+                by_key[key] = copy
+    return merged
+
+
+def _windows(state: DXState, document: DocumentHandle, settings: Settings) -> List[List[int]]:
+    layer = get_text_layer(document, state.get("mime", ""))
+    page_count = layer.page_count if layer is not None else 0
+    return page_windows(
+        page_count, settings.extract_chunk_pages, settings.extract_chunk_overlap_pages
+    )
+
+
+def _chunk_report(
+    window: List[int], elapsed_ms: int, extract_input: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "pages": [window[0], window[-1]],
+        "ms": elapsed_ms,
+        "mode": extract_input.get("mode"),
+        "payload_bytes": extract_input.get("payload_bytes"),
+    }
+
+
+def _outcome(
+    rows: List[Any],
+    report: Dict[str, Any],
+    raws: List[Any],
+    warnings: List[str],
+    recovery: Counter,
+) -> Dict[str, Any]:
+    return {
+        "rows": rows,
+        "report": report,
+        "raws": raws,
+        "warnings": warnings,
+        "recovery": recovery,
+    }
+
+
+def _run_chunk(
+    state: DXState,
+    final_prompt: str,
+    document: DocumentHandle,
+    settings: Settings,
+    window: List[int],
+) -> Dict[str, Any]:
+    start = start_timer()
+    warnings: List[str] = []
+    recovery: Counter = Counter()
+    report: Dict[str, Any] = {"pages": [window[0], window[-1]]}
+    try:
+        messages, extract_input = build_extract_messages(
+            state, final_prompt, document, settings, warnings, window
+        )
+        # Retries stay within this window: only the failed portion is asked again.
+        _, rows, raws = invoke_rows(
+            build_multimodal_model(settings),
+            messages,
+            extract_response_format(state, settings),
+            settings.extract_output_retries,
+            recovery,
+        )
+        report = _chunk_report(window, int((start_timer() - start) * 1000), extract_input)
+        return _outcome(rows, report, raws, warnings, recovery)
+    except MissingLLMProviderError:
+        raise
+    except Exception as exc:  # pragma: no cover - one window failing must not sink the rest
+        report["ms"] = int((start_timer() - start) * 1000)
+        report["error"] = str(exc)
+        return _outcome([], report, [], warnings, recovery)
+
+
+async def _arun_chunk(
+    state: DXState,
+    final_prompt: str,
+    document: DocumentHandle,
+    settings: Settings,
+    window: List[int],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    async with semaphore:
+        start = start_timer()
+        warnings: List[str] = []
+        recovery: Counter = Counter()
+        report: Dict[str, Any] = {"pages": [window[0], window[-1]]}
+        try:
+            messages, extract_input = await asyncio.to_thread(
+                build_extract_messages, state, final_prompt, document, settings, warnings, window
+            )
+            _, rows, raws = await ainvoke_rows(
+                build_multimodal_model(settings),
+                messages,
+                extract_response_format(state, settings),
+                settings.extract_output_retries,
+                recovery,
+            )
+            report = _chunk_report(window, int((start_timer() - start) * 1000), extract_input)
+            return _outcome(rows, report, raws, warnings, recovery)
+        except MissingLLMProviderError:
+            raise
+        except Exception as exc:  # pragma: no cover - one window failing must not sink the rest
+            report["ms"] = int((start_timer() - start) * 1000)
+            report["error"] = str(exc)
+            return _outcome([], report, [], warnings, recovery)
+
+
+def _apply_chunks(
+    state: DXState,
+    schema: DXSchema,
+    settings: Settings,
+    outcomes: List[Dict[str, Any]],
+    warnings: List[str],
+    start: float,
+) -> DXState:
+    reports = [outcome["report"] for outcome in outcomes]
+    failed = [report for report in reports if "error" in report]
+    recovery: Counter = Counter()
+    for outcome in outcomes:
+        warnings.extend(outcome["warnings"])
+        recovery.update(outcome["recovery"])
+        for raw in outcome["raws"]:
+            record_token_usage(state, "chunked_extract", raw)
+    for report in failed:
+        pages = report["pages"]
+        warnings.append(f"chunked_extract pages {pages[0]}-{pages[1]} failed: {report['error']}")
+    recovery["fallback"] += len(failed)
+    record_recovery(state, recovery)
+
+    rows = merge_rows([outcome["rows"] for outcome in outcomes], _dedupe_fields(schema, settings))
+    if failed:
+        # Partial answers are served but never cached.
+        record_fallback(state, "chunked_extract")
+    if not rows and len(failed) == len(outcomes):
+        rows = fallback_rows(schema["fields"])
+
+    result: ExtractionResult = {"key": schema["key"], "rows": rows}
+    state["extraction_result"] = result
+    state["warnings"] = warnings
+    state.setdefault("metrics", {})["chunks"] = reports
+    record_latency(state, "chunked_extract", start)
+    return state
+
+
+def _fallback(
+    state: DXState, schema: DXSchema, warnings: List[str], exc: Exception, start: float
+) -> DXState:
+    record_fallback(state, "chunked_extract")
+    warnings.append(str(exc))
+    state["extraction_result"] = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+    state["warnings"] = warnings
+    record_latency(state, "chunked_extract", start)
+    return state
+
+
+def chunked_extract(state: DXState) -> DXState:
+    """Map-reduce extraction: one model call per page window, then merge and de-duplicate."""
+
+    start = start_timer()
+    schema, final_prompt, document = require_inputs(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    windows = _windows(state, document, settings)
+
+    try:
+        settings = extraction_settings(state, document, settings, final_prompt, "chunked_extract")
+        build_multimodal_model(settings)
+        with ThreadPoolExecutor(max_workers=settings.extract_chunk_concurrency) as pool:
+            futures = [
+                pool.submit(
+                    copy_context().run, _run_chunk, state, final_prompt, document, settings, window
+                )
+                for window in windows
+            ]
+            outcomes = [future.result() for future in futures]
+    except MissingLLMProviderError as exc:
+        return _fallback(state, schema, warnings, exc, start)
+    return _apply_chunks(state, schema, settings, outcomes, warnings, start)
+
+
+async def achunked_extract(state: DXState) -> DXState:
+    """Async variant of :func:`chunked_extract` bounding in-flight windows with a semaphore."""
+
+    start = start_timer()
+    schema, final_prompt, document = require_inputs(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    windows = await asyncio.to_thread(_windows, state, document, settings)
+    stream = active_stream()
+    if stream is not None:
+        # Rows are only final once the windows are merged; the summary can go now.
+        stream.summary(state)
+    semaphore = asyncio.Semaphore(settings.extract_chunk_concurrency)
+
+    try:
+        settings = await asyncio.to_thread(
+            extraction_settings, state, document, settings, final_prompt, "chunked_extract"
+        )
+        build_multimodal_model(settings)
+        outcomes = await asyncio.gather(
+            *(
+                _arun_chunk(state, final_prompt, document, settings, window, semaphore)
+                for window in windows
+            )
+        )
+    except MissingLLMProviderError as exc:
+        return _fallback(state, schema, warnings, exc, start)
+    return _apply_chunks(state, schema, settings, list(outcomes), warnings, start)
+
+
+__all__ = ["achunked_extract", "chunked_extract", "merge_rows", "page_windows"]
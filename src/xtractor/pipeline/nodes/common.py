@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 from time import perf_counter
-from typing import MutableMapping
+from typing import Any, Mapping, MutableMapping
 
+from xtractor.adapters.llm import TokenUsage
+from xtractor.config.settings import get_settings
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.observability.resources import current_rss_bytes
+from xtractor.observability.tracing import current_span
 from xtractor.pipeline.state import DXState
 
+# Per-node token ledger entries (see ``record_token_usage``).
+TOKEN_KEYS = ("input", "output", "cached", "reasoning", "cost_usd")
+
 
 def start_timer() -> float:
     return perf_counter()
@@ -17,6 +25,124 @@ def record_latency(state: MutableMapping[str, object], node_name: str, start_tim
         timings = metrics.setdefault("timings_ms", {})  # type: ignore[assignment]
         if isinstance(timings, dict):
             timings[node_name] = elapsed_ms
+        record_rss(metrics)
+
+
+def record_node(state: MutableMapping[str, object], node_name: str) -> None:
+    """Append ``node_name`` to ``metrics.nodes_path``, the graph nodes in the order they ran."""
+
+    metrics = state.setdefault("metrics", {})  # type: ignore[assignment]
+    if isinstance(metrics, dict):
+        metrics.setdefault("nodes_path", []).append(node_name)
+
+
+def record_rss(metrics: MutableMapping[str, object]) -> None:
+    """Track the highest RSS observed at node boundaries during this run."""
+
+    rss = current_rss_bytes()
+    peak = metrics.get("peak_rss_bytes")
+    if not isinstance(peak, int) or rss > peak:
+        metrics["peak_rss_bytes"] = rss
+
+
+def record_cache_event(state: MutableMapping[str, object], cache_name: str, outcome: str) -> None:
+    metrics = state.setdefault("metrics", {})  # type: ignore[assignment]
+    if isinstance(metrics, dict):
+        events = metrics.setdefault("cache", {})  # type: ignore[assignment]
+        if isinstance(events, dict):
+            events[cache_name] = outcome
+    span = current_span()
+    if span is not None:
+        span.set(f"cache_{cache_name}", outcome)
+    get_metrics_registry().inc(
+        "dx_cache_events_total", help="Cache lookups by outcome", cache=cache_name, outcome=outcome
+    )
+
+
+def record_fallback(state: MutableMapping[str, object], node_name: str) -> None:
+    """Flag that ``node_name`` degraded to its heuristic fallback for this run."""
+
+    metrics = state.setdefault("metrics", {})  # type: ignore[assignment]
+    if isinstance(metrics, dict):
+        fallbacks = metrics.setdefault("fallbacks", [])  # type: ignore[assignment]
+        if isinstance(fallbacks, list) and node_name not in fallbacks:
+            fallbacks.append(node_name)
+    get_metrics_registry().inc(
+        "dx_node_fallbacks_total", help="Nodes degraded to their fallback", node=node_name
+    )
+
+
+def record_recovery(
+    state: MutableMapping[str, object], counts: Mapping[str, int] | None
+) -> None:
+    """Add structured-output recovery events (``repaired``, ``retried``, ``fallback``)."""
+
+    if not counts or not any(counts.values()):
+        return
+    metrics = state.setdefault("metrics", {})  # type: ignore[assignment]
+    if isinstance(metrics, dict):
+        recovery = metrics.setdefault(
+            "output_recovery", {"repaired": 0, "retried": 0, "fallback": 0}
+        )
+        if isinstance(recovery, dict):
+            for event, count in counts.items():
+                recovery[event] = recovery.get(event, 0) + count
+    for event, count in counts.items():
+        if count:
+            get_metrics_registry().inc(
+                "dx_output_recovery_total",
+                count,
+                help="Structured-output recovery events",
+                event=event,
+            )
+
+
+def record_token_usage(state: MutableMapping[str, object], node_name: str, raw: Any) -> None:
+    """Add the token counts and cost the provider reported for one of ``node_name``'s calls.
+
+    ``cost_usd`` stays ``None`` unless ``DX_MODEL_PRICES`` prices the model.
+    """
+
+    usage = TokenUsage.from_message(raw)
+    if usage is None:
+        return
+    metrics = state.setdefault("metrics", {})  # type: ignore[assignment]
+    if isinstance(metrics, dict):
+        tokens = metrics.setdefault("tokens", {})  # type: ignore[assignment]
+        if isinstance(tokens, dict):
+            counts = tokens.setdefault(node_name, dict.fromkeys(TOKEN_KEYS))
+            reported_counts = (
+                ("input", usage.input),
+                ("output", usage.output),
+                # Prompt tokens the provider served from its prefix cache.
+                ("cached", usage.cached),
+                # Output tokens spent on hidden reasoning.
+                ("reasoning", usage.reasoning),
+                ("cost_usd", usage.cost(get_settings().model_prices)),
+            )
+            for key, value in reported_counts:
+                if isinstance(value, (int, float)):
+                    counts[key] = (counts.get(key) or 0) + value
+
+
+def tokens_spent(metrics: Mapping[str, Any]) -> int:
+    """Input plus output tokens reported so far in ``metrics``' token ledger."""
+
+    ledger = metrics.get("tokens") or {}
+    return sum(
+        (counts.get("input") or 0) + (counts.get("output") or 0) for counts in ledger.values()
+    )
 
 
-__all__ = ["record_latency", "start_timer"]
+__all__ = [
+    "TOKEN_KEYS",
+    "record_cache_event",
+    "record_fallback",
+    "record_latency",
+    "record_node",
+    "record_recovery",
+    "record_rss",
+    "record_token_usage",
+    "start_timer",
+    "tokens_spent",
+]
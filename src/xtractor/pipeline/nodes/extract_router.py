@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from xtractor.config.settings import get_settings
+from xtractor.extractors import PDF_MIME
+from xtractor.pipeline.nodes.common import record_latency, start_timer
+from xtractor.pipeline.state import DXState
+
+
+def extract_router(state: DXState) -> str:
+    """Send large documents to the page-chunked branch, everything else to one call.
+
+    Chunking needs pages to cut along: PDFs (sliced into page subsets or text
+    windows) and documents with a text layer qualify; anything else stays single.
+    Routers run inline on the event loop under ``ainvoke``, so this one only reads
+    the ``page_count`` and ``has_text_layer`` the runner recorded before the graph.
+    """
+
+    start = start_timer()
+    settings = get_settings()
+    decision = "single"
+    if settings.chunked_extract_enabled:
+        page_count = int(state.get("page_count") or 0)
+        splittable = state.get("mime") == PDF_MIME or bool(state.get("has_text_layer"))
+        large = page_count >= settings.extract_chunk_min_pages or (
+            state.get("file_size", 0) >= settings.extract_chunk_min_bytes
+        )
+        if splittable and large and page_count > settings.extract_chunk_pages:
+            decision = "chunked"
+    record_latency(state, "extract_router", start)
+    # Routers cannot return state updates; the metrics dict is shared with the
+    # graph state, so record the decision in place.
+    state.setdefault("metrics", {})["extract_branch"] = decision
+    return decision
+
+
+__all__ = ["extract_router"]
@@ -1,14 +1,36 @@
 from __future__ import annotations
 
-import base64
-from pathlib import Path
+import asyncio
+import hashlib
+from functools import lru_cache
 from typing import Any, List
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from xtractor.adapters.llm import MissingLLMProviderError, build_multimodal_model, invoke_json
-from xtractor.config.settings import get_settings
-from xtractor.pipeline.nodes.common import record_latency, start_timer
+from xtractor.adapters.cache import TieredCache, build_tiered_cache
+from xtractor.adapters.document import DocumentHandle, open_document
+from xtractor.adapters.llm import (
+    MissingLLMProviderError,
+    ModelInvocationResult,
+    ainvoke_json,
+    build_multimodal_model,
+    invoke_json,
+)
+from xtractor.config.settings import Settings, get_settings
+from xtractor.extractors import (
+    TextLayer,
+    get_text_layer,
+    summarize_text_layer,
+    text_layer_sufficient,
+)
+from xtractor.pipeline.model_tiers import record_model_tier, summary_settings
+from xtractor.pipeline.nodes.common import (
+    record_cache_event,
+    record_fallback,
+    record_latency,
+    record_token_usage,
+    start_timer,
+)
 from xtractor.pipeline.state import DXState
 
 SYSTEM_INSTRUCTIONS = (
@@ -25,73 +47,259 @@ HUMAN_INSTRUCTIONS = (
     " Respond with JSON only."
 )
 
+# Bumped automatically whenever the prompts change so stale summaries are never reused.
+INSTRUCTIONS_VERSION = hashlib.sha256(
+    (SYSTEM_INSTRUCTIONS + "\x00" + HUMAN_INSTRUCTIONS).encode("utf-8")
+).hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def get_summary_cache() -> TieredCache:
+    """Return the process-wide summary cache configured from settings."""
+
+    settings = get_settings()
+    return build_tiered_cache(
+        max_entries=settings.summary_cache_max_entries,
+        ttl_seconds=settings.summary_cache_ttl_seconds or None,
+        disk_path=(
+            settings.temp_dir / "cache" / "summaries.sqlite" if settings.summary_cache_disk else None
+        ),
+        disk_max_entries=settings.summary_cache_disk_max_entries,
+    )
+
+
+def _summary_cache_key(state: DXState, settings: Settings) -> str | None:
+    if not settings.summary_cache_enabled:
+        return None
+    digest = state.get("file_sha256")
+    if not digest:
+        return None
+    return f"file_understanding:{INSTRUCTIONS_VERSION}:{settings.mm_model}:{digest}"
+
+
+def _cached_summary(value: Any) -> tuple[str, List[str]] | None:
+    if not isinstance(value, dict) or not value.get("concise_summary"):
+        return None
+    return str(value["concise_summary"]), list(value.get("hints") or [])
+
+
+def record_text_layer(state: DXState, document: DocumentHandle) -> TextLayer | None:
+    """The document's text layer, noting ``page_count`` and ``has_text_layer`` in state."""
+
+    layer = get_text_layer(document, state.get("mime", ""))
+    if layer is not None:
+        state["page_count"] = layer.page_count
+        state["has_text_layer"] = layer.char_count > 0
+        metrics = state.setdefault("metrics", {})
+        metrics["text_layer"] = {
+            "source": layer.source,
+            "pages": layer.page_count,
+            "chars": layer.char_count,
+            "page_coverage": round(layer.page_coverage(min_chars=20), 3),
+        }
+    return layer
+
+
+def _local_summary(
+    state: DXState, document: DocumentHandle, settings: Settings
+) -> tuple[str, List[str]] | None:
+    """Routing policy: summarize from the text layer instead of calling the model.
 
-def _load_base64(path: Path) -> str:
-    return base64.b64encode(path.read_bytes()).decode("utf-8")
+    ``auto`` uses the text layer only when it passes the quality thresholds,
+    ``local`` whenever it has any text, and ``llm`` never.
+    """
 
+    if settings.file_understanding_mode == "llm":
+        return None
+    layer = record_text_layer(state, document)
+    if layer is None or not layer.char_count:
+        return None
+    if settings.file_understanding_mode == "auto" and not text_layer_sufficient(
+        layer,
+        min_chars_per_page=settings.local_text_min_chars_per_page,
+        min_page_coverage=settings.local_text_min_page_coverage,
+        min_printable_ratio=settings.local_text_min_printable_ratio,
+    ):
+        return None
+    return summarize_text_layer(layer)
 
-def _fallback_summary(path: Path) -> tuple[str, List[str]]:
-    raw = path.read_bytes()
-    if not raw:
+
+def fallback_summary(state: DXState, document: DocumentHandle) -> tuple[str, List[str]]:
+    if not document.size:
         return ("Document appears empty; unable to summarize.", [])
-    preview = raw.decode("utf-8", errors="ignore")
-    preview = " ".join(preview.split())[:600]
+    layer = record_text_layer(state, document)
+    if layer is not None and layer.char_count:
+        return summarize_text_layer(layer)
+    preview = document.preview_text(600)
     if not preview:
         return ("Unable to extract textual preview from document.", [])
     return (f"Heuristic summary: {preview}", [])
 
 
-def file_understanding(state: DXState) -> DXState:
-    start = start_timer()
+def _document(state: DXState) -> DocumentHandle:
     file_ref = state.get("file_ref")
     if not file_ref:
         raise ValueError("Pipeline state must include file_ref before file_understanding")
+    return open_document(file_ref)
 
-    document_path = Path(file_ref)
-    settings = get_settings()
+
+def _build_messages(state: DXState, document: DocumentHandle, encoded: str) -> List[Any]:
+    return [
+        SystemMessage(content=SYSTEM_INSTRUCTIONS),
+        HumanMessage(
+            content=[
+                {"type": "text", "text": HUMAN_INSTRUCTIONS},
+                {
+                    "type": "file",
+                    "source_type": "base64",
+                    "mime_type": state.get("mime", "application/pdf"),
+                    "data": encoded,
+                    "filename": document.path.name,
+                },
+            ]
+        ),
+    ]
+
+
+def _parse_summary(result: ModelInvocationResult) -> tuple[str, List[str]]:
+    parsed = result.parsed
+    concise_summary = str(parsed.get("concise_summary") or parsed.get("summary") or "").strip()
+    hints = parsed.get("hints") or []
+    if not concise_summary:
+        raise ValueError("Model returned empty summary")
+    return concise_summary, hints
+
+
+def _apply_summary(
+    state: DXState,
+    concise_summary: str,
+    hints: List[str],
+    warnings: List[str],
+    start: float,
+    source: str,
+) -> DXState:
+    state.setdefault("metrics", {})["summary_source"] = source
+    state["concise_summary"] = concise_summary
+    if hints:
+        state["hints"] = list(hints)
+    state["warnings"] = warnings
+    record_latency(state, "file_understanding", start)
+    return state
+
+
+def file_understanding(state: DXState) -> DXState:
+    start = start_timer()
+    document = _document(state)
+    tier, settings = summary_settings(get_settings())
     warnings = list(state.get("warnings") or [])
 
+    cache_key = _summary_cache_key(state, settings)
+    if cache_key is not None:
+        cached, cache_tier = get_summary_cache().lookup(cache_key)
+        record_cache_event(
+            state, "file_understanding", f"hit:{cache_tier}" if cache_tier else "miss"
+        )
+        hit = _cached_summary(cached)
+        if hit is not None:
+            return _apply_summary(state, hit[0], hit[1], warnings, start, "cache")
+
+    local = _local_summary(state, document, settings)
+    if local is not None:
+        return _apply_summary(state, local[0], local[1], warnings, start, "local")
+    if settings.file_understanding_mode == "local":
+        concise_summary, hints = fallback_summary(state, document)
+        return _apply_summary(state, concise_summary, hints, warnings, start, "fallback")
+
+    source = "llm"
     try:
+        record_model_tier(state, "file_understanding", tier, settings)
         model = build_multimodal_model(settings)
-        encoded = _load_base64(document_path)
-        messages = [
-            SystemMessage(content=SYSTEM_INSTRUCTIONS),
-            HumanMessage(
-                content=[
-                    {"type": "text", "text": HUMAN_INSTRUCTIONS},
-                    {
-                        "type": "file",
-                        "source_type": "base64",
-                        "mime_type": state.get("mime", "application/pdf"),
-                        "data": encoded,
-                        "filename": document_path.name,
-                    },
-                ]
-            ),
-        ]
+        encoded = document.base64()
         result = invoke_json(
             model,
-            messages,
+            _build_messages(state, document, encoded),
             response_format={"type": "json_object"},
         )
-        parsed = result.parsed
-        concise_summary = str(parsed.get("concise_summary") or parsed.get("summary") or "").strip()
-        hints = parsed.get("hints") or []
-        if not concise_summary:
-            raise ValueError("Model returned empty summary")
+        record_token_usage(state, "file_understanding", result.raw)
+        concise_summary, hints = _parse_summary(result)
+        if cache_key is not None:
+            get_summary_cache().set(
+                cache_key, {"concise_summary": concise_summary, "hints": list(hints)}
+            )
     except MissingLLMProviderError as exc:
-        concise_summary, hints = _fallback_summary(document_path)
+        record_fallback(state, "file_understanding")
+        source = "fallback"
+        concise_summary, hints = fallback_summary(state, document)
         warnings.append(str(exc))
     except Exception as exc:  # pragma: no cover - degrade gracefully
-        concise_summary, hints = _fallback_summary(document_path)
+        record_fallback(state, "file_understanding")
+        source = "fallback"
+        concise_summary, hints = fallback_summary(state, document)
         warnings.append(f"file_understanding fallback: {exc}")
 
-    state["concise_summary"] = concise_summary
-    if hints:
-        state["hints"] = list(hints)
-    state["warnings"] = warnings
-    record_latency(state, "file_understanding", start)
-    return state
+    return _apply_summary(state, concise_summary, hints, warnings, start, source)
+
+
+async def afile_understanding(state: DXState) -> DXState:
+    """Async variant of :func:`file_understanding` awaiting the model's ``ainvoke``."""
+
+    start = start_timer()
+    document = _document(state)
+    tier, settings = summary_settings(get_settings())
+    warnings = list(state.get("warnings") or [])
+
+    cache_key = _summary_cache_key(state, settings)
+    if cache_key is not None:
+        cached, cache_tier = await get_summary_cache().alookup(cache_key)
+        record_cache_event(
+            state, "file_understanding", f"hit:{cache_tier}" if cache_tier else "miss"
+        )
+        hit = _cached_summary(cached)
+        if hit is not None:
+            return _apply_summary(state, hit[0], hit[1], warnings, start, "cache")
+
+    local = await asyncio.to_thread(_local_summary, state, document, settings)
+    if local is not None:
+        return _apply_summary(state, local[0], local[1], warnings, start, "local")
+    if settings.file_understanding_mode == "local":
+        concise_summary, hints = await asyncio.to_thread(fallback_summary, state, document)
+        return _apply_summary(state, concise_summary, hints, warnings, start, "fallback")
+
+    source = "llm"
+    try:
+        record_model_tier(state, "file_understanding", tier, settings)
+        model = build_multimodal_model(settings)
+        encoded = await document.abase64()
+        result = await ainvoke_json(
+            model,
+            _build_messages(state, document, encoded),
+            response_format={"type": "json_object"},
+        )
+        record_token_usage(state, "file_understanding", result.raw)
+        concise_summary, hints = _parse_summary(result)
+        if cache_key is not None:
+            await get_summary_cache().aset(
+                cache_key, {"concise_summary": concise_summary, "hints": list(hints)}
+            )
+    except MissingLLMProviderError as exc:
+        record_fallback(state, "file_understanding")
+        source = "fallback"
+        concise_summary, hints = await asyncio.to_thread(fallback_summary, state, document)
+        warnings.append(str(exc))
+    except Exception as exc:  # pragma: no cover - degrade gracefully
+        record_fallback(state, "file_understanding")
+        source = "fallback"
+        concise_summary, hints = await asyncio.to_thread(fallback_summary, state, document)
+        warnings.append(f"file_understanding fallback: {exc}")
+
+    return _apply_summary(state, concise_summary, hints, warnings, start, source)
 
 
-__all__ = ["file_understanding"]
+__all__ = [
+    "INSTRUCTIONS_VERSION",
+    "afile_understanding",
+    "fallback_summary",
+    "file_understanding",
+    "get_summary_cache",
+    "record_text_layer",
+]
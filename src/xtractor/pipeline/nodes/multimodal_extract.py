@@ -1,27 +1,76 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-from pathlib import Path
-from typing import Any, Dict, List
+import json
+from collections import Counter
+from typing import Any, Callable, Dict, List, Mapping, Sequence
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from xtractor.adapters.llm import MissingLLMProviderError, build_multimodal_model, invoke_json
-from xtractor.config.settings import get_settings
-from xtractor.pipeline.nodes.common import record_latency, start_timer
-from xtractor.pipeline.state import DXField, DXState, ExtractionResult
+from xtractor.adapters.document import DocumentHandle, open_document
+from xtractor.adapters.llm import (
+    MissingLLMProviderError,
+    ModelInvocationResult,
+    ainvoke_json,
+    astream_json,
+    build_multimodal_model,
+    invoke_json,
+)
+from xtractor.config.settings import Settings, get_settings
+from xtractor.extractors import (
+    PDF_MIME,
+    TextLayer,
+    get_text_layer,
+    parse_pdf,
+    text_layer_sufficient,
+    write_pdf_subset,
+)
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.pipeline.model_tiers import extract_settings, record_model_tier
+from xtractor.pipeline.nodes.common import (
+    record_fallback,
+    record_latency,
+    record_recovery,
+    record_token_usage,
+    start_timer,
+    tokens_spent,
+)
+from xtractor.pipeline.nodes.postprocess import normalize_row
+from xtractor.pipeline.schema_registry import compiled_schema
+from xtractor.pipeline.state import DXField, DXSchema, DXState, ExtractionResult
+from xtractor.pipeline.streaming import active_stream
+from xtractor.utils.json_repair import TRUNCATED
 
 PROMPT_SUFFIX = (
     "Use the attached document to populate rows. Respond in JSON with keys {key, rows}."
     " Each row must include every schema field; use null when not found."
 )
+TEXT_PROMPT_SUFFIX = (
+    "Use the document text below, recovered from its text layer page by page, to populate"
+    " rows. Respond in JSON with keys {key, rows}."
+    " Each row must include every schema field; use null when not found."
+)
+HYBRID_PROMPT_SUFFIX = (
+    "Use the document text below, recovered from its text layer page by page, together with"
+    " the attached drawing pages to populate rows. Respond in JSON with keys {key, rows}."
+    " Each row must include every schema field; use null when not found."
+)
+CONTINUE_PROMPT = (
+    "Your previous answer was cut off after {count} complete rows. The last complete row"
+    " was:\n{last}\nRespond in JSON with keys {{key, rows}} holding only the rows that"
+    " follow it."
+)
+# In auto mode, documents that are mostly drawings are sent whole: the page
+# subset would save little and the text adds tokens on top of it.
+HYBRID_MAX_DRAWING_SHARE = 0.5
+# Token estimates for budget checks: text at ~4 characters per token, attached
+# PDF pages at roughly what providers bill for a rendered page plus its text.
+CHARS_PER_TOKEN = 4
+FILE_PAGE_TOKENS = 1500
 
 
-def _load_document(path: Path) -> str:
-    return base64.b64encode(path.read_bytes()).decode("utf-8")
-
-
-def _fallback_rows(fields: List[DXField]) -> List[Dict[str, Any]]:
+def fallback_rows(fields: List[DXField]) -> List[Dict[str, Any]]:
     row: Dict[str, Any] = {}
     for field in fields:
         value = field.get("value")
@@ -29,8 +78,7 @@ def _fallback_rows(fields: List[DXField]) -> List[Dict[str, Any]]:
     return [row]
 
 
-def multimodal_extract(state: DXState) -> DXState:
-    start = start_timer()
+def require_inputs(state: DXState) -> tuple[DXSchema, str, DocumentHandle]:
     schema = state.get("schema")
     final_prompt = state.get("system_prompt_final")
     if not schema or not final_prompt:
@@ -39,65 +87,548 @@ def multimodal_extract(state: DXState) -> DXState:
     file_ref = state.get("file_ref")
     if not file_ref:
         raise ValueError("file reference missing before multimodal_extract")
+    return schema, final_prompt, open_document(file_ref)
 
-    doc_path = Path(file_ref)
-    warnings = list(state.get("warnings") or [])
-    settings = get_settings()
 
-    try:
-        model = build_multimodal_model(settings)
-        encoded = _load_document(doc_path)
-        example_json = state.get("fewshot_example")
-        human_content: List[Dict[str, Any]] = [
+def resolve_input_mode(
+    state: DXState, document: DocumentHandle, settings: Settings
+) -> tuple[str, TextLayer | None]:
+    """Pick what to send the model: the file, its text layer, or text plus drawing pages."""
+
+    mode = settings.extract_input_mode
+    if mode == "file":
+        return "file", None
+    layer = get_text_layer(document, state.get("mime", ""))
+    if layer is None or not layer.char_count:
+        return "file", layer
+    if mode == "auto":
+        if not text_layer_sufficient(
+            layer,
+            min_chars_per_page=settings.local_text_min_chars_per_page,
+            min_page_coverage=settings.local_text_min_page_coverage,
+            min_printable_ratio=settings.local_text_min_printable_ratio,
+        ):
+            return "file", layer
+        if len(layer.drawing_pages) > layer.page_count * HYBRID_MAX_DRAWING_SHARE:
+            return "file", layer
+        mode = "hybrid"
+    if mode == "hybrid" and not layer.drawing_pages:
+        mode = "text"
+    return mode, layer
+
+
+def estimate_input_tokens(
+    state: DXState, prompt: str, mode: str, layer: TextLayer | None
+) -> int:
+    """Rough prompt-token count of an extraction request sent in ``mode``."""
+
+    chars = len(prompt) + len(str(state.get("fewshot_example") or ""))
+    pages = 0
+    if mode in ("text", "hybrid") and layer is not None:
+        chars += layer.char_count
+        if mode == "hybrid":
+            pages = len(layer.drawing_pages)
+    elif layer is not None and layer.page_count:
+        pages = layer.page_count
+    else:
+        # Unknown page count (no text layer): fall back to the file size.
+        chars += int(state.get("file_size") or 0)
+    return chars // CHARS_PER_TOKEN + pages * FILE_PAGE_TOKENS
+
+
+def _budget_decision(
+    state: DXState, document: DocumentHandle, settings: Settings, prompt: str, budget: int
+) -> Dict[str, Any]:
+    spent = tokens_spent(state.get("metrics") or {})
+    remaining = budget - spent
+    mode, layer = resolve_input_mode(state, document, settings)
+    # File mode skips the text layer; the estimate and the text fallback need it.
+    layer = layer or get_text_layer(document, state.get("mime", ""))
+    estimate = estimate_input_tokens(state, prompt, mode, layer)
+    actions: List[str] = []
+    if estimate > remaining and mode != "text" and layer is not None and layer.char_count:
+        mode = "text"
+        estimate = estimate_input_tokens(state, prompt, mode, layer)
+        actions.append("text")
+    model = settings.token_budget_model
+    if estimate > remaining and model and model != settings.mm_model:
+        actions.append("model")
+    else:
+        model = None
+    for action in actions:
+        get_metrics_registry().inc(
+            "dx_token_budget_actions_total", help="Cheaper paths taken for budgets", action=action
+        )
+    return {
+        "budget": budget,
+        "spent": spent,
+        "estimate": estimate,
+        "actions": actions,
+        "input_mode": mode if "text" in actions else None,
+        "model": model,
+        "exceeded": estimate > remaining,
+    }
+
+
+def apply_token_budget(
+    state: DXState, document: DocumentHandle, settings: Settings, prompt: str
+) -> Settings:
+    """Settings for this run's extraction, switched to a cheaper path if over its token budget.
+
+    The request's input is estimated in the mode it would be sent in. Over the
+    budget left after earlier calls, extraction falls back to the text layer
+    (when there is one), then to ``DX_TOKEN_BUDGET_MODEL``. The decision is
+    made once per run and recorded as ``metrics.token_budget``.
+    """
+
+    budget = state.get("token_budget")
+    if not budget:
+        return settings
+    metrics = state.setdefault("metrics", {})
+    decision = metrics.get("token_budget")
+    if decision is None:
+        decision = _budget_decision(state, document, settings, prompt, budget)
+        metrics["token_budget"] = decision
+    update: Dict[str, Any] = {}
+    if decision.get("input_mode"):
+        update["extract_input_mode"] = decision["input_mode"]
+    if decision.get("model"):
+        update["mm_model"] = decision["model"]
+    return settings.model_copy(update=update) if update else settings
+
+
+def extraction_settings(
+    state: DXState, document: DocumentHandle, settings: Settings, prompt: str, node: str
+) -> Settings:
+    """Settings for ``node``'s extraction calls: the document's model tier, then its budget.
+
+    The tier is picked by page count and file size; a token budget may still
+    switch to ``DX_TOKEN_BUDGET_MODEL``. The outcome is recorded as
+    ``metrics.model_tiers[node]``.
+    """
+
+    layer = get_text_layer(document, state.get("mime", ""))
+    page_count = layer.page_count if layer is not None else 0
+    tier, settings = extract_settings(settings, page_count, int(state.get("file_size") or 0))
+    settings = apply_token_budget(state, document, settings, prompt)
+    record_model_tier(state, node, tier, settings)
+    return settings
+
+
+def _layer_text(layer: TextLayer, window: Sequence[int] | None = None) -> str:
+    numbers = window or range(1, layer.page_count + 1)
+    return "\n\n".join(
+        f"[Page {number}]\n{layer.pages[number - 1]}"
+        for number in numbers
+        if 1 <= number <= layer.page_count
+    )
+
+
+def _file_part(state: DXState, filename: str, encoded: str) -> Dict[str, Any]:
+    return {
+        "type": "file",
+        "source_type": "base64",
+        "mime_type": state.get("mime", "application/pdf"),
+        "data": encoded,
+        "filename": filename,
+    }
+
+
+def _subset_part(
+    state: DXState, document: DocumentHandle, pages: List[int], label: str
+) -> Dict[str, Any]:
+    """Attach ``pages`` of a PDF as a standalone page subset (memoized per run)."""
+
+    if state.get("mime") != PDF_MIME:
+        raise ValueError("page subsets are only supported for PDF documents")
+    # Parse once per run; the chunked branch cuts one subset per page window.
+    parsed = document.derived("pdf_objects", lambda handle: parse_pdf(handle.path))
+    if parsed is None:
+        raise ValueError("empty PDF")
+    encoded = base64.b64encode(write_pdf_subset(parsed, pages)).decode("ascii")
+    return _file_part(state, f"{document.path.stem}-{label}.pdf", encoded)
+
+
+def _drawing_part(
+    state: DXState, document: DocumentHandle, pages: List[int], warnings: List[str]
+) -> tuple[Dict[str, Any], List[int] | None]:
+    """Attach only the drawing pages for PDFs; other formats cannot be split and go whole."""
+
+    if state.get("mime") == PDF_MIME:
+        try:
+            return _subset_part(state, document, pages, "drawings"), pages
+        except Exception as exc:  # pragma: no cover - unusual PDF structures
+            warnings.append(f"multimodal_extract: sending full file, page subset failed: {exc}")
+    return _file_part(state, document.path.name, document.base64()), None
+
+
+def build_extract_messages(
+    state: DXState,
+    final_prompt: str,
+    document: DocumentHandle,
+    settings: Settings,
+    warnings: List[str],
+    window: Sequence[int] | None = None,
+) -> tuple[List[Any], Dict[str, Any]]:
+    """Assemble an extraction request and describe its input (mode, payload size, pages).
+
+    ``window`` restricts the request to those 1-based pages, as the chunked branch
+    does; file-mode windows require a PDF so the pages can be cut out. Runs in a
+    worker thread from the async nodes: text extraction, page subsetting and
+    base64 encoding are all CPU/disk bound.
+    """
+
+    mode, layer = resolve_input_mode(state, document, settings)
+    if window is not None and mode == "file" and state.get("mime") != PDF_MIME:
+        # Only PDFs can be cut into page subsets; other formats are windowed by text.
+        layer = get_text_layer(document, state.get("mime", ""))
+        mode = "text"
+    suffix = {"file": PROMPT_SUFFIX, "text": TEXT_PROMPT_SUFFIX, "hybrid": HYBRID_PROMPT_SUFFIX}
+    drawings: List[int] = []
+    if mode == "hybrid" and layer is not None:
+        drawings = [page for page in layer.drawing_pages if window is None or page in window]
+        mode = "hybrid" if drawings else "text"
+    human_content: List[Dict[str, Any]] = [
+        {
+            "type": "text",
+            "text": suffix[mode],
+        }
+    ]
+    example_json = state.get("fewshot_example")
+    if example_json:
+        human_content.append(
             {
                 "type": "text",
-                "text": PROMPT_SUFFIX,
+                "text": "Example output JSON:\n" + str(example_json),
             }
-        ]
-        if example_json:
-            human_content.append(
-                {
-                    "type": "text",
-                    "text": "Example output JSON:\n" + str(example_json),
-                }
-            )
+        )
+    if window is not None:
         human_content.append(
             {
-                "type": "file",
-                "source_type": "base64",
-                "mime_type": state.get("mime", "application/pdf"),
-                "data": encoded,
-                "filename": doc_path.name,
+                "type": "text",
+                "text": f"This request covers pages {window[0]}-{window[-1]} of the document."
+                " Return only rows that appear on these pages.",
             }
         )
-        messages = [
-            SystemMessage(content=final_prompt),
-            HumanMessage(content=human_content),
-        ]
-        response = invoke_json(
+    attached_pages: List[int] | None = None
+    if mode == "file" or layer is None:
+        if window is None:
+            human_content.append(_file_part(state, document.path.name, document.base64()))
+        else:
+            attached_pages = list(window)
+            label = f"p{window[0]}-{window[-1]}"
+            human_content.append(_subset_part(state, document, attached_pages, label))
+    else:
+        text = _layer_text(layer, window)
+        human_content.append({"type": "text", "text": "Document text:\n" + text})
+        if mode == "hybrid":
+            part, attached_pages = _drawing_part(state, document, drawings, warnings)
+            human_content.append(part)
+
+    payload_bytes = len(final_prompt.encode("utf-8")) + sum(
+        len(part["text"].encode("utf-8")) if part["type"] == "text" else len(part["data"])
+        for part in human_content
+    )
+    messages = [
+        SystemMessage(content=final_prompt),
+        HumanMessage(content=human_content),
+    ]
+    return messages, {
+        "mode": mode,
+        "payload_bytes": payload_bytes,
+        "attached_pages": attached_pages,
+    }
+
+
+def _build_messages(
+    state: DXState,
+    final_prompt: str,
+    document: DocumentHandle,
+    settings: Settings,
+    warnings: List[str],
+) -> List[Any]:
+    messages, extract_input = build_extract_messages(
+        state, final_prompt, document, settings, warnings
+    )
+    state.setdefault("metrics", {})["extract_input"] = extract_input
+    return messages
+
+
+def parse_result(response: ModelInvocationResult, schema: DXSchema) -> ExtractionResult:
+    parsed = response.parsed
+    rows = parsed.get("rows")
+    if not isinstance(rows, list):
+        raise ValueError("Model returned invalid rows payload")
+    return {
+        "key": parsed.get("key") or schema["key"],
+        "rows": rows,
+    }
+
+
+def extract_response_format(state: DXState, settings: Settings) -> Dict[str, Any]:
+    """Strict ``json_schema`` format compiled from the state's schema, unless disabled."""
+
+    if settings.extract_response_format == "json_schema":
+        return compiled_schema(state).response_format
+    return {"type": "json_object"}
+
+
+def _continuation(messages: List[Any], rows: List[Any]) -> List[Any]:
+    """Re-ask for what a truncated answer missed; with no complete row, ask again in full."""
+
+    if not rows:
+        return messages
+    note = CONTINUE_PROMPT.format(
+        count=len(rows), last=json.dumps(rows[-1], ensure_ascii=False, default=str)
+    )
+    return [*messages, HumanMessage(content=note)]
+
+
+def _absorb(response: ModelInvocationResult, rows: List[Any], recovery: Counter) -> bool:
+    """Add a response's rows to ``rows``; return False when it was cut off and needs a follow-up."""
+
+    new_rows = response.parsed.get("rows")
+    if not isinstance(new_rows, list):
+        raise ValueError("Model returned invalid rows payload")
+    if response.repair is not None:
+        recovery["repaired"] += 1
+    if rows and new_rows and new_rows[0] == rows[-1]:
+        # Continuations tend to restate the row they were told to resume after.
+        new_rows = new_rows[1:]
+    rows.extend(new_rows)
+    return response.repair != TRUNCATED
+
+
+def invoke_rows(
+    model: Any,
+    messages: List[Any],
+    response_format: Mapping[str, Any],
+    retries: int,
+    recovery: Counter,
+) -> tuple[Mapping[str, Any], List[Any], List[Any]]:
+    """Invoke an extraction call, repairing its JSON and re-asking only for what is missing.
+
+    Unusable output is re-requested whole; output cut off mid-array keeps its
+    complete rows and the follow-up asks only for the rows after the last one.
+    At most ``retries`` extra calls are made. Returns the first parsed payload,
+    the collected rows and every raw response (for token accounting). Raises
+    ``ValueError`` when no attempt produced usable rows.
+    """
+
+    parsed: Mapping[str, Any] | None = None
+    rows: List[Any] = []
+    raws: List[Any] = []
+    request = messages
+    error: ValueError | None = None
+    for attempt in range(retries + 1):
+        if attempt:
+            recovery["retried"] += 1
+        try:
+            response = invoke_json(model, request, response_format=response_format)
+            raws.append(response.raw)
+            complete = _absorb(response, rows, recovery)
+        except ValueError as exc:
+            error = exc
+            continue
+        parsed = parsed or response.parsed
+        if complete:
+            break
+        request = _continuation(messages, rows)
+    if parsed is None:
+        raise error or ValueError("Model returned no rows")
+    return parsed, rows, raws
+
+
+async def ainvoke_rows(
+    model: Any,
+    messages: List[Any],
+    response_format: Mapping[str, Any],
+    retries: int,
+    recovery: Counter,
+    on_row: Callable[[Any], None] | None = None,
+) -> tuple[Mapping[str, Any], List[Any], List[Any]]:
+    """Async counterpart of :func:`invoke_rows`.
+
+    With ``on_row`` the first attempt is streamed and every row is handed over
+    once, as it completes; rows added by retries follow when those return.
+    Rows already handed over always lead the returned rows: when the streamed
+    attempt cannot be parsed, the follow-up asks only for the rows after them.
+    """
+
+    parsed: Mapping[str, Any] | None = None
+    rows: List[Any] = []
+    raws: List[Any] = []
+    request = messages
+    error: ValueError | None = None
+    published: List[Any] = []
+
+    def publish(row: Any) -> None:
+        published.append(row)
+        if on_row is not None:
+            on_row(row)
+
+    for attempt in range(retries + 1):
+        if attempt:
+            recovery["retried"] += 1
+        response: ModelInvocationResult | None = None
+        try:
+            if on_row is not None and not attempt:
+                response = await astream_json(
+                    model, request, publish, response_format=response_format
+                )
+            else:
+                response = await ainvoke_json(model, request, response_format=response_format)
+            raws.append(response.raw)
+            complete = _absorb(response, rows, recovery)
+        except ValueError as exc:
+            error, response = exc, None
+        finally:
+            # The caller already holds the published rows, whatever the final parse made of them.
+            rows[: len(published)] = published
+            for row in rows[len(published) :]:
+                publish(row)
+        if response is None:
+            request = _continuation(messages, rows)
+            continue
+        parsed = parsed or response.parsed
+        if complete:
+            break
+        request = _continuation(messages, rows)
+    if parsed is None:
+        raise error or ValueError("Model returned no rows")
+    return parsed, rows, raws
+
+
+def _apply_result(
+    state: DXState, result: ExtractionResult, warnings: List[str], start: float
+) -> DXState:
+    state["extraction_result"] = result
+    state["warnings"] = warnings
+    record_latency(state, "multimodal_extract", start)
+    return state
+
+
+def _row_publisher(
+    state: DXState, schema: DXSchema, published: List[Any]
+) -> Callable[[Any], None] | None:
+    """Row callback for a streamed request (publishing the summary first), else ``None``.
+
+    Every row sent to the client is also appended to ``published``.
+    """
+
+    stream = active_stream()
+    if stream is None:
+        return None
+    stream.summary(state)
+    field_names = compiled_schema(state).field_names
+
+    def publish(row: Any) -> None:
+        if isinstance(row, dict):
+            published.append(row)
+            stream.row(schema["key"], normalize_row(field_names, row, []))
+
+    return publish
+
+
+def multimodal_extract(state: DXState) -> DXState:
+    start = start_timer()
+    schema, final_prompt, document = require_inputs(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    recovery: Counter = Counter()
+
+    try:
+        settings = extraction_settings(
+            state, document, settings, final_prompt, "multimodal_extract"
+        )
+        model = build_multimodal_model(settings)
+        messages = _build_messages(state, final_prompt, document, settings, warnings)
+        parsed, rows, raws = invoke_rows(
             model,
             messages,
-            response_format={"type": "json_object"},
+            extract_response_format(state, settings),
+            settings.extract_output_retries,
+            recovery,
         )
-        parsed = response.parsed
-        rows = parsed.get("rows")
-        if not isinstance(rows, list):
-            raise ValueError("Model returned invalid rows payload")
-        result: ExtractionResult = {
-            "key": parsed.get("key") or schema["key"],
-            "rows": rows,
-        }
+        for raw in raws:
+            record_token_usage(state, "multimodal_extract", raw)
+        result = {"key": parsed.get("key") or schema["key"], "rows": rows}
     except MissingLLMProviderError as exc:
+        record_fallback(state, "multimodal_extract")
         warnings.append(str(exc))
-        result = {"key": schema["key"], "rows": _fallback_rows(schema["fields"])}
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
     except Exception as exc:  # pragma: no cover - degrade gracefully
+        record_fallback(state, "multimodal_extract")
+        recovery["fallback"] += 1
         warnings.append(f"multimodal_extract fallback: {exc}")
-        result = {"key": schema["key"], "rows": _fallback_rows(schema["fields"])}
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
 
-    state["extraction_result"] = result
-    state["warnings"] = warnings
-    record_latency(state, "multimodal_extract", start)
-    return state
+    record_recovery(state, recovery)
+    return _apply_result(state, result, warnings, start)
+
+
+async def amultimodal_extract(state: DXState) -> DXState:
+    """Async variant of :func:`multimodal_extract` awaiting the model's ``ainvoke``."""
+
+    start = start_timer()
+    schema, final_prompt, document = require_inputs(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    recovery: Counter = Counter()
+    streamed: List[Any] = []
+
+    try:
+        settings = await asyncio.to_thread(
+            extraction_settings, state, document, settings, final_prompt, "multimodal_extract"
+        )
+        model = build_multimodal_model(settings)
+        messages = await asyncio.to_thread(
+            _build_messages, state, final_prompt, document, settings, warnings
+        )
+        parsed, rows, raws = await ainvoke_rows(
+            model,
+            messages,
+            extract_response_format(state, settings),
+            settings.extract_output_retries,
+            recovery,
+            _row_publisher(state, schema, streamed),
+        )
+        for raw in raws:
+            record_token_usage(state, "multimodal_extract", raw)
+        result = {"key": parsed.get("key") or schema["key"], "rows": rows}
+    except MissingLLMProviderError as exc:
+        record_fallback(state, "multimodal_extract")
+        warnings.append(str(exc))
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+    except Exception as exc:  # pragma: no cover - degrade gracefully
+        record_fallback(state, "multimodal_extract")
+        recovery["fallback"] += 1
+        if streamed:
+            # The client already holds these rows; the result must not contradict them.
+            warnings.append(
+                f"multimodal_extract kept {len(streamed)} streamed rows after a failure: {exc}"
+            )
+            result = {"key": schema["key"], "rows": streamed}
+        else:
+            warnings.append(f"multimodal_extract fallback: {exc}")
+            result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+
+    record_recovery(state, recovery)
+    return _apply_result(state, result, warnings, start)
 
 
-__all__ = ["multimodal_extract"]
+__all__ = [
+    "ainvoke_rows",
+    "amultimodal_extract",
+    "apply_token_budget",
+    "build_extract_messages",
+    "estimate_input_tokens",
+    "extract_response_format",
+    "extraction_settings",
+    "fallback_rows",
+    "invoke_rows",
+    "multimodal_extract",
+    "parse_result",
+    "require_inputs",
+    "resolve_input_mode",
+]
@@ -1,26 +1,20 @@
 from __future__ import annotations
 
 from collections import OrderedDict
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 from uuid import uuid4
 
-from xtractor.pipeline.nodes.common import record_latency, start_timer
-from xtractor.pipeline.state import AuditInfo, DXField, DXSchema, DXState, ExtractionResult
+from xtractor.adapters.document import release_document
+from xtractor.pipeline.nodes.common import TOKEN_KEYS, record_latency, record_rss, start_timer
+from xtractor.pipeline.schema_registry import CompiledSchema, compiled_schema, get_schema_registry
+from xtractor.pipeline.state import AuditInfo, DXSchema, DXState, ExtractionResult
 
-NODE_SEQUENCE = [
-    "file_understanding",
-    "prompt_builder",
-    "symbol_agent",
-    "prompt_merge",
-    "multimodal_extract",
-    "postprocess",
-]
 
-
-def _normalize_row(schema_fields: List[DXField], row: Dict[str, Any], warnings: List[str]) -> Dict[str, Any]:
+def normalize_row(
+    field_names: Sequence[str], row: Dict[str, Any], warnings: List[str]
+) -> Dict[str, Any]:
     normalized: "OrderedDict[str, Any]" = OrderedDict()
-    for field in schema_fields:
-        name = field["name"]
+    for name in field_names:
         value = row.get(name)
         if isinstance(value, str) and not value.strip():
             warnings.append(f"Empty string normalized to null for field '{name}'")
@@ -29,44 +23,135 @@ def _normalize_row(schema_fields: List[DXField], row: Dict[str, Any], warnings:
     return dict(normalized)
 
 
-def postprocess(state: DXState) -> DXState:
-    start = start_timer()
-    schema: DXSchema | None = state.get("schema")
-    result: ExtractionResult | None = state.get("extraction_result")
-    if not schema or not result:
-        raise ValueError("multimodal_extract must populate schema and extraction result")
-
-    warnings = list(state.get("warnings") or [])
-
+def _clean_result(
+    compiled: CompiledSchema, result: ExtractionResult, warnings: List[str]
+) -> ExtractionResult:
     rows = result.get("rows") or []
     normalized_rows: List[Dict[str, Any]] = []
     for row in rows:
         if not isinstance(row, dict):
             warnings.append("Dropping non-object row from extraction result")
             continue
-        normalized_rows.append(_normalize_row(schema["fields"], row, warnings))
+        normalized_rows.append(normalize_row(compiled.field_names, row, warnings))
 
     if not normalized_rows:
-        normalized_rows.append(_normalize_row(schema["fields"], {}, warnings))
+        normalized_rows.append(normalize_row(compiled.field_names, {}, warnings))
+    return {"key": compiled.schema["key"], "rows": normalized_rows}
+
+
+def _schema_audits(metrics: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    audits: Dict[str, Dict[str, Any]] = {}
+    for key, schema_metrics in (metrics.get("schemas") or {}).items():
+        audits[key] = dict(schema_metrics)
+    return audits
+
+
+def _prompt_cache(metrics: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Prompt tokens sent vs. served from the provider's prefix cache, over every call."""
+
+    ledgers = [metrics.get("tokens") or {}]
+    ledgers += [entry.get("tokens") or {} for entry in (metrics.get("schemas") or {}).values()]
+    sent = cached = 0
+    reported = False
+    for ledger in ledgers:
+        for counts in ledger.values():
+            sent += counts.get("input") or 0
+            if counts.get("cached") is not None:
+                reported = True
+                cached += counts["cached"]
+    if not sent or not reported:
+        return None
+    return {"input_tokens": sent, "cached_tokens": cached, "hit_ratio": round(cached / sent, 3)}
+
+
+def _usage(metrics: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Token and cost totals over every model call of the run, schema runs included."""
+
+    ledgers = [metrics.get("tokens") or {}]
+    ledgers += [entry.get("tokens") or {} for entry in (metrics.get("schemas") or {}).values()]
+    totals: Dict[str, Any] = dict.fromkeys(TOKEN_KEYS)
+    for ledger in ledgers:
+        for counts in ledger.values():
+            for key in TOKEN_KEYS:
+                if counts.get(key) is not None:
+                    totals[key] = (totals[key] or 0) + counts[key]
+    if all(value is None for value in totals.values()):
+        return None
+    if totals["cost_usd"] is not None:
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals
+
+
+def postprocess(state: DXState) -> DXState:
+    start = start_timer()
+    warnings = list(state.get("warnings") or [])
+    schemas: List[DXSchema] | None = state.get("schemas")
+    if schemas:
+        results = state.get("extraction_results")
+        if not results:
+            raise ValueError("schema_fanout must populate extraction results")
+        registry = get_schema_registry()
+        state["extraction_results"] = [
+            _clean_result(registry.compiled(schema), result, warnings)
+            for schema, result in zip(schemas, results, strict=True)
+        ]
+    else:
+        schema: DXSchema | None = state.get("schema")
+        result: ExtractionResult | None = state.get("extraction_result")
+        if not schema or not result:
+            raise ValueError("multimodal_extract must populate schema and extraction result")
+        state["extraction_result"] = _clean_result(compiled_schema(state), result, warnings)
 
-    cleaned_result = {"key": schema["key"], "rows": normalized_rows}
     metrics = dict(state.get("metrics") or {})
+    record_rss(metrics)
     timings_obj = metrics.get("timings_ms")
     timings = dict(timings_obj) if isinstance(timings_obj, dict) else {}
     audit: AuditInfo = {
         "graph_run_id": metrics.get("graph_run_id"),
-        "nodes_path": NODE_SEQUENCE,
+        # The graph nodes that ran, in order (recorded by the graph builder's wrapper).
+        "nodes_path": list(metrics.get("nodes_path") or []),
         "timings_ms": timings,
+        "peak_rss_bytes": metrics["peak_rss_bytes"],
     }
+    if schemas:
+        audit["schemas"] = _schema_audits(metrics)
+    cache_events = metrics.get("cache")
+    if isinstance(cache_events, dict) and cache_events:
+        audit["cache"] = dict(cache_events)
+    extract_input = metrics.get("extract_input")
+    if isinstance(extract_input, dict):
+        audit["extract_input"] = dict(extract_input)
+    chunks = metrics.get("chunks")
+    if isinstance(chunks, list):
+        audit["chunks"] = [dict(chunk) for chunk in chunks]
+    tokens = metrics.get("tokens")
+    if isinstance(tokens, dict) and tokens:
+        audit["tokens"] = {node: dict(counts) for node, counts in tokens.items()}
+    usage = _usage(metrics)
+    if usage is not None:
+        audit["usage"] = usage
+    token_budget = metrics.get("token_budget")
+    if isinstance(token_budget, dict):
+        audit["token_budget"] = dict(token_budget)
+    model_tiers = metrics.get("model_tiers")
+    if model_tiers:
+        audit["model_tiers"] = {node: dict(tier) for node, tier in model_tiers.items()}
+    prompt_cache = _prompt_cache(metrics)
+    if prompt_cache is not None:
+        audit["prompt_cache"] = prompt_cache
+    recovery = metrics.get("output_recovery")
+    if isinstance(recovery, dict) and recovery:
+        audit["output_recovery"] = dict(recovery)
     if not audit.get("graph_run_id"):
         audit["graph_run_id"] = f"run_{uuid4().hex[:12]}"
 
-    state["extraction_result"] = cleaned_result
     state["warnings"] = warnings
     state["audit"] = audit
     state["metrics"] = metrics
     record_latency(state, "postprocess", start)
+    # Last consumer of the document: free the mapping and cached base64 copy.
+    release_document(state.get("file_ref"))
     return state
 
 
-__all__ = ["postprocess"]
+__all__ = ["normalize_row", "postprocess"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.runnables import RunnableLambda
+
+from xtractor.pipeline.nodes.common import (
+    record_fallback,
+    record_latency,
+    record_recovery,
+    start_timer,
+    tokens_spent,
+)
+from xtractor.pipeline.nodes.multimodal_extract import fallback_rows
+from xtractor.pipeline.schema_registry import get_schema_registry
+from xtractor.pipeline.state import DXSchema, DXState, ExtractionResult
+
+# Metrics a schema run records for itself; they are reported per schema key in
+# ``audit.schemas`` instead of being merged into the document-level metrics.
+SCHEMA_METRICS = (
+    "nodes_path",
+    "timings_ms",
+    "extract_input",
+    "chunks",
+    "tokens",
+    "extract_branch",
+    "fallbacks",
+    "output_recovery",
+    "token_budget",
+    "model_tiers",
+)
+# Document-level keys the schema runs must not see or overwrite.
+_PARENT_ONLY = ("schemas", "schema_id", "metrics", "warnings", "extraction_results")
+
+
+def schema_router(state: DXState) -> str:
+    """Multi-schema payloads fan out after file understanding; single ones run inline."""
+
+    return "multi" if state.get("schemas") else "single"
+
+
+def _child_state(state: DXState, schema: DXSchema) -> DXState:
+    child: Dict[str, Any] = {key: value for key, value in state.items() if key not in _PARENT_ONLY}
+    metrics = state.get("metrics") or {}
+    child.update(
+        schema=schema,
+        schema_id=get_schema_registry().compiled(schema).id,
+        warnings=[],
+        metrics={"graph_run_id": metrics.get("graph_run_id"), "timings_ms": {}},
+    )
+    budget = state.get("token_budget")
+    if budget:
+        # Each schema run gets an equal share of what the summary left over.
+        remaining = max(0, budget - tokens_spent(metrics))
+        child["token_budget"] = max(1, remaining // max(1, len(state.get("schemas") or ())))
+    return child  # type: ignore[return-value]
+
+
+def _apply_children(
+    state: DXState, schemas: Sequence[DXSchema], children: Sequence[Any], start: float
+) -> DXState:
+    warnings = list(state.get("warnings") or [])
+    metrics = state.setdefault("metrics", {})
+    results: List[ExtractionResult] = []
+    per_schema: Dict[str, Dict[str, Any]] = {}
+    for schema, child in zip(schemas, children, strict=True):
+        key = schema["key"]
+        if isinstance(child, BaseException):
+            record_fallback(state, "schema_fanout")
+            warnings.append(f"[{key}] extraction failed: {child}")
+            results.append({"key": key, "rows": fallback_rows(schema["fields"])})
+            per_schema[key] = {"error": str(child)}
+            continue
+        result = child.get("extraction_result")
+        results.append(result or {"key": key, "rows": fallback_rows(schema["fields"])})
+        warnings.extend(f"[{key}] {warning}" for warning in child.get("warnings") or [])
+        # The symbol pass only reads the shared summary, so any schema's legend will do.
+        state["symbol_context"] = child.get("symbol_context") or state.get("symbol_context")
+        child_metrics = child.get("metrics") or {}
+        per_schema[key] = {
+            name: child_metrics[name] for name in SCHEMA_METRICS if name in child_metrics
+        }
+        for node in child_metrics.get("fallbacks") or []:
+            record_fallback(state, node)
+        # Recovery events are also totalled for the document.
+        record_recovery(state, child_metrics.get("output_recovery"))
+        peak = child_metrics.get("peak_rss_bytes")
+        if isinstance(peak, int) and peak > metrics.get("peak_rss_bytes", 0):
+            metrics["peak_rss_bytes"] = peak
+
+    state["extraction_results"] = results
+    state["warnings"] = warnings
+    metrics["schemas"] = per_schema
+    record_latency(state, "schema_fanout", start)
+    return state
+
+
+def build_schema_fanout(schema_graph: Any) -> RunnableLambda:
+    """Wrap ``schema_graph`` (prompt_builder .. extraction) as a node run once per schema.
+
+    The document is ingested and summarized once; every schema then gets its own
+    prompt, symbol pass and extraction, all in flight together, sharing the run's
+    document handle (and so its text layer and base64 encoding).
+    """
+
+    def schema_fanout(state: DXState) -> DXState:
+        start = start_timer()
+        schemas = state.get("schemas") or []
+        with ThreadPoolExecutor(max_workers=max(1, len(schemas))) as pool:
+            # Each schema run carries a copy of the caller's context so its
+            # node and model-call spans nest under this one.
+            futures = [
+                pool.submit(copy_context().run, schema_graph.invoke, _child_state(state, schema))
+                for schema in schemas
+            ]
+            children: List[Any] = []
+            for future in futures:
+                try:
+                    children.append(future.result())
+                except Exception as exc:  # pragma: no cover - degrade per schema
+                    children.append(exc)
+        return _apply_children(state, schemas, children, start)
+
+    async def aschema_fanout(state: DXState) -> DXState:
+        start = start_timer()
+        schemas = state.get("schemas") or []
+        children = await asyncio.gather(
+            *(schema_graph.ainvoke(_child_state(state, schema)) for schema in schemas),
+            return_exceptions=True,
+        )
+        return _apply_children(state, schemas, children, start)
+
+    return RunnableLambda(schema_fanout, afunc=aschema_fanout, name="schema_fanout")
+
+
+__all__ = ["SCHEMA_METRICS", "build_schema_fanout", "schema_router"]
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Any, Dict, List, Mapping
+
+from xtractor.adapters.document import DocumentHandle, open_document
+from xtractor.adapters.llm import MissingLLMProviderError, build_multimodal_model
+from xtractor.config.settings import Settings, get_settings
+from xtractor.pipeline.nodes.common import (
+    record_fallback,
+    record_latency,
+    record_recovery,
+    record_token_usage,
+    start_timer,
+)
+from xtractor.pipeline.nodes.extract_router import extract_router
+from xtractor.pipeline.nodes.file_understanding import fallback_summary
+from xtractor.pipeline.nodes.multimodal_extract import (
+    ainvoke_rows,
+    build_extract_messages,
+    extraction_settings,
+    fallback_rows,
+    invoke_rows,
+)
+from xtractor.pipeline.nodes.prompt_builder import FORMAT_RULES
+from xtractor.pipeline.schema_registry import CompiledSchema, compiled_schema
+from xtractor.pipeline.state import DXSchema, DXState, ExtractionResult
+
+HEADER = (
+    "You are a Document Extraction Model. In one pass, summarize the document and extract"
+    " rows. Output JSON ONLY with keys: {concise_summary, hints, key, rows}."
+)
+SUMMARY_RULES = (
+    "- concise_summary: 3-10 sentences; mention tables/legends and approximate pages.\n"
+    "- hints: 3-5 short strings (salient asset identifiers, where tables sit).\n"
+    "- If the document carries a symbol legend, use it to interpret symbols in rows."
+)
+SUMMARY_SUFFIX = "Also return concise_summary and hints as described in the system prompt."
+
+
+def pass_router(state: DXState) -> str:
+    """Entry router: take the single-pass path when requested and the document fits one call.
+
+    Multi-schema payloads share one summary anyway, and documents the chunked
+    branch would split need the two-pass graph, so both stay on ``two_pass``.
+    """
+
+    metrics = state.setdefault("metrics", {})
+    decision = "two_pass"
+    if state.get("pipeline_mode") == "single_pass" and not state.get("schemas"):
+        if extract_router(state) == "single":
+            decision = "single_pass"
+    # Routers cannot return state updates; record the decision in the shared dict.
+    metrics["pipeline_mode"] = decision
+    return decision
+
+
+def build_single_pass_prompt(compiled: CompiledSchema) -> str:
+    sections = [HEADER, "\n[SCHEMA]\n" + compiled.schema_block]
+    if compiled.example_block:
+        sections.append("\n[EXAMPLE OUTPUT]\n" + compiled.example_block)
+    sections.append("\n[SUMMARY RULES]\n" + SUMMARY_RULES)
+    sections.append("\n[FORMAT RULES]\n" + FORMAT_RULES)
+    return "\n".join(sections).strip()
+
+
+def single_pass_response_format(compiled: CompiledSchema) -> Dict[str, Any]:
+    """The schema's strict format with ``concise_summary`` and ``hints`` ahead of the rows.
+
+    Summary first, so a response cut off inside ``rows`` still carries it.
+    """
+
+    spec = compiled.response_format["json_schema"]
+    body = spec["schema"]
+    summary = {
+        "concise_summary": {"type": "string"},
+        "hints": {"type": "array", "items": {"type": "string"}},
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            **spec,
+            "schema": {
+                **body,
+                "properties": {**summary, **body["properties"]},
+                "required": [*summary, *body["required"]],
+            },
+        },
+    }
+
+
+def _response_format(state: DXState, settings: Settings) -> Dict[str, Any]:
+    if settings.extract_response_format == "json_schema":
+        return single_pass_response_format(compiled_schema(state))
+    return {"type": "json_object"}
+
+
+def _prepare(state: DXState) -> tuple[DXSchema, str, DocumentHandle]:
+    schema = state.get("schema")
+    file_ref = state.get("file_ref")
+    if not schema or not file_ref:
+        raise ValueError("single_pass_extract requires schema and file_ref")
+    compiled = compiled_schema(state)
+    prompt = build_single_pass_prompt(compiled)
+    # symbol_router scans the draft plus the summary for legend keywords; give it
+    # the schema alone, as the summary rules above would always match.
+    state["system_prompt_draft"] = compiled.schema_block
+    state["system_prompt_final"] = prompt
+    if compiled.example_block:
+        state["fewshot_example"] = compiled.example_block
+    return schema, prompt, open_document(file_ref)
+
+
+def _build_messages(
+    state: DXState,
+    prompt: str,
+    document: DocumentHandle,
+    settings: Settings,
+    warnings: List[str],
+) -> List[Any]:
+    messages, extract_input = build_extract_messages(state, prompt, document, settings, warnings)
+    messages[-1].content.insert(1, {"type": "text", "text": SUMMARY_SUFFIX})
+    state.setdefault("metrics", {})["extract_input"] = extract_input
+    return messages
+
+
+def _parse(
+    parsed: Mapping[str, Any], rows: List[Any], schema: DXSchema
+) -> tuple[ExtractionResult, str, List[str]]:
+    result: ExtractionResult = {"key": parsed.get("key") or schema["key"], "rows": rows}
+    concise_summary = str(parsed.get("concise_summary") or parsed.get("summary") or "").strip()
+    hints = parsed.get("hints") or []
+    return result, concise_summary, [str(hint) for hint in hints if hint]
+
+
+def _apply(
+    state: DXState,
+    document: DocumentHandle,
+    result: ExtractionResult,
+    concise_summary: str,
+    hints: List[str],
+    warnings: List[str],
+    start: float,
+) -> DXState:
+    source = "single_pass"
+    if not concise_summary:
+        concise_summary, hints = fallback_summary(state, document)
+        source = "fallback"
+    state.setdefault("metrics", {})["summary_source"] = source
+    state["concise_summary"] = concise_summary
+    if hints:
+        state["hints"] = list(hints)
+    state["extraction_result"] = result
+    state["warnings"] = warnings
+    record_latency(state, "single_pass_extract", start)
+    return state
+
+
+def single_pass_extract(state: DXState) -> DXState:
+    """One model call returning the summary, hints and rows (replaces two sequential calls)."""
+
+    start = start_timer()
+    schema, prompt, document = _prepare(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    concise_summary, hints = "", []
+    recovery: Counter = Counter()
+
+    try:
+        settings = extraction_settings(state, document, settings, prompt, "single_pass_extract")
+        model = build_multimodal_model(settings)
+        messages = _build_messages(state, prompt, document, settings, warnings)
+        parsed, rows, raws = invoke_rows(
+            model,
+            messages,
+            _response_format(state, settings),
+            settings.extract_output_retries,
+            recovery,
+        )
+        for raw in raws:
+            record_token_usage(state, "single_pass_extract", raw)
+        result, concise_summary, hints = _parse(parsed, rows, schema)
+    except MissingLLMProviderError as exc:
+        record_fallback(state, "single_pass_extract")
+        warnings.append(str(exc))
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+    except Exception as exc:  # pragma: no cover - degrade gracefully
+        record_fallback(state, "single_pass_extract")
+        recovery["fallback"] += 1
+        warnings.append(f"single_pass_extract fallback: {exc}")
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+
+    record_recovery(state, recovery)
+    return _apply(state, document, result, concise_summary, hints, warnings, start)
+
+
+async def asingle_pass_extract(state: DXState) -> DXState:
+    """Async variant of :func:`single_pass_extract` awaiting the model's ``ainvoke``."""
+
+    start = start_timer()
+    schema, prompt, document = _prepare(state)
+    warnings = list(state.get("warnings") or [])
+    settings = get_settings()
+    concise_summary, hints = "", []
+    recovery: Counter = Counter()
+
+    try:
+        settings = await asyncio.to_thread(
+            extraction_settings, state, document, settings, prompt, "single_pass_extract"
+        )
+        model = build_multimodal_model(settings)
+        messages = await asyncio.to_thread(
+            _build_messages, state, prompt, document, settings, warnings
+        )
+        parsed, rows, raws = await ainvoke_rows(
+            model,
+            messages,
+            _response_format(state, settings),
+            settings.extract_output_retries,
+            recovery,
+        )
+        for raw in raws:
+            record_token_usage(state, "single_pass_extract", raw)
+        result, concise_summary, hints = _parse(parsed, rows, schema)
+    except MissingLLMProviderError as exc:
+        record_fallback(state, "single_pass_extract")
+        warnings.append(str(exc))
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+    except Exception as exc:  # pragma: no cover - degrade gracefully
+        record_fallback(state, "single_pass_extract")
+        recovery["fallback"] += 1
+        warnings.append(f"single_pass_extract fallback: {exc}")
+        result = {"key": schema["key"], "rows": fallback_rows(schema["fields"])}
+
+    record_recovery(state, recovery)
+    return _apply(state, document, result, concise_summary, hints, warnings, start)
+
+
+__all__ = [
+    "asingle_pass_extract",
+    "build_single_pass_prompt",
+    "pass_router",
+    "single_pass_extract",
+    "single_pass_response_format",
+]
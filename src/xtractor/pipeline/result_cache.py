@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Mapping
+
+from xtractor.adapters.cache import ByteLRUCache
+from xtractor.config.settings import Settings, get_settings
+from xtractor.pipeline.state import DXSchema, DXState
+
+# Keys of the final state that make up a servable answer; everything else
+# (file_ref, prompts, raw payload) is run-specific and never replayed.
+CACHED_STATE_KEYS = (
+    "concise_summary",
+    "hints",
+    "schema",
+    "schemas",
+    "symbol_context",
+    "extraction_result",
+    "extraction_results",
+    "warnings",
+    "audit",
+)
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_COALESCED = "coalesced"
+
+
+# Settings that change what a run returns. Operational settings (timeouts, pools,
+# cache sizes, paths, observability) are left out so they never split the cache.
+RESULT_SETTINGS = (
+    "mm_model",
+    "reasoning_effort",
+    "summary_model",
+    "summary_reasoning_effort",
+    "summary_max_tokens",
+    "extract_model_tiers",
+    "fallback_model",
+    "fallback_reasoning_effort",
+    "openai_base_url",
+    "enable_symbol_agent",
+    "file_understanding_mode",
+    "local_text_min_chars_per_page",
+    "local_text_min_page_coverage",
+    "local_text_min_printable_ratio",
+    "extract_input_mode",
+    "extract_response_format",
+    "extract_output_retries",
+    "chunked_extract_enabled",
+    "extract_chunk_min_pages",
+    "extract_chunk_min_bytes",
+    "extract_chunk_pages",
+    "extract_chunk_overlap_pages",
+    "extract_dedupe_fields",
+    "token_budget_model",
+)
+
+
+def result_cache_key(
+    digest: str,
+    schema: DXSchema | List[DXSchema],
+    settings: Settings,
+    *,
+    pipeline_mode: str = "two_pass",
+    token_budget: int | None = None,
+) -> str:
+    """Derive the cache key from the document hash, the schema(s) and ``RESULT_SETTINGS``.
+
+    ``outputFormat`` is left out: it only changes how the cached state is serialized.
+    """
+
+    material = {
+        "digest": digest,
+        "schema": schema,
+        "pipeline_mode": pipeline_mode,
+        "token_budget": token_budget,
+        "settings": settings.model_dump(mode="json", include=set(RESULT_SETTINGS)),
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable(state: Mapping[str, Any]) -> bool:
+    metrics = state.get("metrics") or {}
+    return not metrics.get("fallbacks")
+
+
+def _snapshot(state: Mapping[str, Any]) -> tuple[Dict[str, Any], int]:
+    snapshot = {key: copy.deepcopy(state[key]) for key in CACHED_STATE_KEYS if key in state}
+    size = len(json.dumps(snapshot, ensure_ascii=False, default=str).encode("utf-8"))
+    return snapshot, size
+
+
+def _mark(state: Mapping[str, Any], outcome: str, *, deep: bool = False) -> DXState:
+    # Cached snapshots are deep-copied so callers can never mutate the stored entry;
+    # live states only get a fresh audit section.
+    marked: Dict[str, Any] = copy.deepcopy(dict(state)) if deep else dict(state)
+    audit = dict(marked.get("audit") or {})
+    cache_events = dict(audit.get("cache") or {})
+    cache_events["result"] = outcome
+    audit["cache"] = cache_events
+    marked["audit"] = audit
+    return marked  # type: ignore[return-value]
+
+
+class ResultCache:
+    """Byte-bounded cache of final pipeline states with in-flight coalescing.
+
+    Concurrent callers presenting the same key share one pipeline run: the first
+    caller executes it while the rest wait on its outcome. Failures propagate to
+    every waiter and are never stored.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._store = ByteLRUCache(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future[DXState]] = {}
+        self._ainflight: Dict[str, asyncio.Task[DXState]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _remember(self, key: str, state: DXState) -> None:
+        if not _is_cacheable(state):
+            return
+        snapshot, size = _snapshot(state)
+        self._store.set(key, snapshot, size)
+
+    def _cached(self, key: str) -> DXState | None:
+        cached = self._store.get(key)
+        if cached is None:
+            return None
+        self.hits += 1
+        return _mark(cached, CACHE_HIT, deep=True)
+
+    def run(self, key: str, execute: Callable[[], DXState]) -> DXState:
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._inflight[key] = pending
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return _mark(pending.result(), CACHE_COALESCED)
+
+        try:
+            state = execute()
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        else:
+            self._remember(key, state)
+            pending.set_result(state)
+            return _mark(state, CACHE_MISS)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def arun(self, key: str, execute: Callable[[], Awaitable[DXState]]) -> DXState:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        task = self._ainflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return _mark(await asyncio.shield(task), CACHE_COALESCED)
+
+        self.misses += 1
+
+        async def _lead() -> DXState:
+            try:
+                state = await execute()
+                self._remember(key, state)
+                return state
+            finally:
+                self._ainflight.pop(key, None)
+
+        task = asyncio.ensure_future(_lead())
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._ainflight[key] = task
+        # Shield so a disconnecting leader does not cancel the run its followers await.
+        return _mark(await asyncio.shield(task), CACHE_MISS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._store),
+            "bytes": self._store.total_bytes,
+            "evictions": self._store.evictions,
+        }
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache configured from settings."""
+
+    return ResultCache(max_bytes=get_settings().result_cache_max_bytes)
+
+
+__all__ = [
+    "CACHE_COALESCED",
+    "CACHE_HIT",
+    "CACHE_MISS",
+    "RESULT_SETTINGS",
+    "ResultCache",
+    "get_result_cache",
+    "result_cache_key",
+]
@@ -1,17 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import AbstractContextManager
 from pathlib import Path
-from typing import Mapping
+from typing import Any, Dict, Mapping
 from uuid import uuid4
 
-from xtractor.adapters.io import ensure_allowed_mime, persist_temp_file, sniff_mime
+from xtractor.adapters.document import open_document, release_document
+from xtractor.adapters.io import StoredUpload, ensure_allowed_mime, persist_stream, sniff_mime
+from xtractor.adapters.resilience import request_deadline
 from xtractor.config.settings import get_settings
+from xtractor.observability.metrics import get_metrics_registry
+from xtractor.observability.profiling import current_profile, profile_request, profile_section
+from xtractor.observability.resources import current_rss_bytes
+from xtractor.observability.tracing import Span, trace
 from xtractor.pipeline import compile_graph
+from xtractor.pipeline.nodes.file_understanding import record_text_layer
+from xtractor.pipeline.result_cache import get_result_cache, result_cache_key
+from xtractor.pipeline.schema_registry import get_schema_registry
 from xtractor.pipeline.state import DXState
 from xtractor.utils.validators import (
     PayloadValidationError,
     SchemaValidationError,
+    ensure_multi_payload,
     ensure_payload,
+    is_multi_schema,
+    validate_output_format,
+    validate_pipeline_mode,
+    validate_token_budget,
 )
 
 _COMPILED_GRAPH = None
@@ -24,54 +40,266 @@ def _graph():
     return _COMPILED_GRAPH
 
 
-def run_pipeline(*, file_bytes: bytes, filename: str, payload: Mapping[str, object]) -> DXState:
-    state: DXState = {
-        "file_bytes": bytes(file_bytes),
+def _initial_state(
+    upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    # Only the reference, digest and size travel through the graph; the bytes
+    # themselves stay on disk.
+    return {
+        "file_ref": str(upload.path),
+        "file_sha256": upload.sha256,
+        "file_size": upload.size,
         "filename": filename,
         "payload": payload,
-        "metrics": {"graph_run_id": f"thread_{uuid4().hex[:8]}"},
+        "metrics": {
+            "graph_run_id": f"thread_{uuid4().hex[:8]}",
+            "rss_start_bytes": current_rss_bytes(),
+        },
     }
-    _prepare_ingress(state)
-    graph = _graph()
-    result: DXState = graph.invoke(state)
+
+
+def _record_page_facts(state: DXState) -> None:
+    """Note ``page_count`` and ``has_text_layer`` before the graph starts.
+
+    The entry router and extract_router decide on them, and routers only read
+    state. The text layer is memoized on the run's document, so nodes reuse it.
+    """
+
+    record_text_layer(state, open_document(state["file_ref"]))
+
+
+def _cache_key(state: DXState, upload: StoredUpload) -> str:
+    schema = state.get("schemas") or state["schema"]
+    return result_cache_key(
+        upload.sha256,
+        schema,
+        get_settings(),
+        pipeline_mode=state["pipeline_mode"],
+        token_budget=state.get("token_budget"),
+    )
+
+
+def _discard_upload(upload: StoredUpload) -> None:
+    upload.path.unlink(missing_ok=True)
+
+
+def _trace(state: DXState) -> AbstractContextManager[Span | None]:
+    return trace(
+        "pipeline",
+        trace_id=state["metrics"]["graph_run_id"],
+        pipeline_mode=state.get("pipeline_mode"),
+    )
+
+
+def _record_outcome(root: Span | None, result: DXState) -> None:
+    outcome = ((result.get("audit") or {}).get("cache") or {}).get("result")
+    if outcome is not None:
+        get_metrics_registry().inc(
+            "dx_cache_events_total",
+            help="Cache lookups by outcome",
+            cache="result",
+            outcome=outcome,
+        )
+    if root is not None:
+        root.set("result_cache", outcome or "off")
+    profile = current_profile()
+    if profile is not None:
+        profile.meta["result_cache"] = outcome or "off"
+
+
+def _prepared_state(
+    upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    state = _initial_state(upload, filename, payload)
+    try:
+        with profile_section("ingress"):
+            _prepare_ingress(state)
+    except (PayloadValidationError, SchemaValidationError):
+        _discard_upload(upload)
+        raise
+    profile = current_profile()
+    if profile is not None:
+        profile.meta.update(
+            graph_run_id=state["metrics"]["graph_run_id"],
+            filename=filename,
+            file_size=upload.size,
+            pipeline_mode=state.get("pipeline_mode"),
+        )
+    return state
+
+
+def validate_stored_upload(
+    *, upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> None:
+    """Run the ingress checks without executing the graph (the upload is removed on failure)."""
+
+    _prepared_state(upload, filename, payload)
+
+
+def run_stored_pipeline(
+    *, upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    """Run the pipeline over an upload that has already been persisted to ``temp_dir``.
+
+    The run is profiled when ``DX_PROFILING_ENABLED`` samples it, unless the
+    caller already decided inside its own :func:`profile_request`.
+    """
+
+    with profile_request():
+        return _run_stored_pipeline(upload=upload, filename=filename, payload=payload)
+
+
+def _run_stored_pipeline(
+    *, upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    settings = get_settings()
+    state = _prepared_state(upload, filename, payload)
+    executed = False
+
+    def execute() -> DXState:
+        nonlocal executed
+        executed = True
+        graph = _graph()
+        try:
+            _record_page_facts(state)
+            with request_deadline(settings.request_deadline_seconds):
+                result: DXState = graph.invoke(state)
+        finally:
+            release_document(state.get("file_ref"))
+        return result
+
+    with _trace(state) as root:
+        if not settings.result_cache_enabled:
+            result = execute()
+        else:
+            key = _cache_key(state, upload)
+            try:
+                result = get_result_cache().run(key, execute)
+            finally:
+                if not executed:
+                    _discard_upload(upload)
+        _record_outcome(root, result)
     return result
 
 
-def _prepare_ingress(state: DXState) -> None:
+async def run_stored_pipeline_async(
+    *, upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    """Async counterpart of :func:`run_stored_pipeline` driven by ``graph.ainvoke``."""
+
+    with profile_request():
+        return await _run_stored_pipeline_async(upload=upload, filename=filename, payload=payload)
+
+
+async def _run_stored_pipeline_async(
+    *, upload: StoredUpload, filename: str, payload: Mapping[str, object]
+) -> DXState:
     settings = get_settings()
+    state = _prepared_state(upload, filename, payload)
+    executed = False
+
+    async def execute() -> DXState:
+        nonlocal executed
+        executed = True
+        graph = _graph()
+        try:
+            await asyncio.to_thread(_record_page_facts, state)
+            with request_deadline(settings.request_deadline_seconds):
+                result: DXState = await graph.ainvoke(state)
+        finally:
+            release_document(state.get("file_ref"))
+        return result
+
+    with _trace(state) as root:
+        if not settings.result_cache_enabled:
+            result = await execute()
+        else:
+            key = _cache_key(state, upload)
+            try:
+                result = await get_result_cache().arun(key, execute)
+            finally:
+                if not executed:
+                    _discard_upload(upload)
+        _record_outcome(root, result)
+    return result
+
+
+def run_pipeline(*, file_bytes: bytes, filename: str, payload: Mapping[str, object]) -> DXState:
+    upload = persist_stream([file_bytes], filename, get_settings().temp_dir)
+    return run_stored_pipeline(upload=upload, filename=filename, payload=payload)
+
+
+async def run_pipeline_async(
+    *, file_bytes: bytes, filename: str, payload: Mapping[str, object]
+) -> DXState:
+    """Run the pipeline via ``graph.ainvoke`` so LLM waits do not block the event loop."""
+
+    upload = await asyncio.to_thread(
+        persist_stream, [file_bytes], filename, get_settings().temp_dir
+    )
+    return await run_stored_pipeline_async(upload=upload, filename=filename, payload=payload)
+
+
+def _registered_schema(payload: Mapping[str, Any]) -> Dict[str, Any]:
+    """Resolve ``payload.schemaId``; the schema was validated and compiled at registration."""
+
+    if payload.get("schema") is not None:
+        raise PayloadValidationError("payload accepts either 'schema' or 'schemaId', not both")
+    compiled = get_schema_registry().get(str(payload["schemaId"]))
+    if compiled is None:
+        raise SchemaValidationError(f"Unknown schemaId '{payload['schemaId']}'")
+    return {"schema": compiled.schema, "schema_id": compiled.id}
+
+
+def _prepare_ingress(state: DXState) -> None:
     payload = state.get("payload")
     if payload is None:
         raise PayloadValidationError("State missing request payload for pipeline execution")
 
     try:
-        output_format, schema = ensure_payload(payload)
+        if is_multi_schema(payload):
+            # Several schemas share one ingest and summary; see schema_fanout.
+            output_format, schemas = ensure_multi_payload(payload)
+            selected: Dict[str, Any] = {"schemas": schemas}
+        elif payload.get("schemaId") is not None:
+            output_format = validate_output_format(str(payload.get("outputFormat") or ""))
+            selected = _registered_schema(payload)
+        else:
+            output_format, schema = ensure_payload(payload)
+            selected = {"schema": schema, "schema_id": get_schema_registry().compiled(schema).id}
     except (SchemaValidationError, PayloadValidationError):
         raise
+    settings = get_settings()
+    limit = settings.max_schemas_per_request
+    if len(selected.get("schemas", ())) > limit:
+        raise PayloadValidationError(f"payload.schemas accepts at most {limit} schemas")
+    pipeline_mode = validate_pipeline_mode(payload.get("pipelineMode") or settings.pipeline_mode)
+    token_budget = validate_token_budget(payload.get("tokenBudget")) or settings.token_budget
 
-    file_bytes = state.get("file_bytes")
-    if not isinstance(file_bytes, (bytes, bytearray)):
-        raise PayloadValidationError("State missing file_bytes for pipeline execution")
+    file_ref = state.get("file_ref")
+    if not file_ref:
+        raise PayloadValidationError("State missing file_ref for pipeline execution")
 
-    filename = state.get("filename") or "uploaded.bin"
-    temp_path = persist_temp_file(bytes(file_bytes), str(filename), settings.temp_dir)
-    mime = sniff_mime(Path(temp_path))
+    mime = sniff_mime(Path(file_ref))
     try:
         ensure_allowed_mime(mime)
     except ValueError as exc:
         raise PayloadValidationError(str(exc)) from exc
 
+    filename = state.get("filename") or "uploaded.bin"
     metrics = dict(state.get("metrics") or {})
     metrics.update({
-        "file_size_bytes": len(file_bytes),
+        "file_size_bytes": state.get("file_size", 0),
         "filename": str(filename),
     })
 
     state.update(
         {
-            "file_ref": str(temp_path),
             "mime": mime,
-            "schema": schema,
+            **selected,
             "output_format": output_format,
+            "pipeline_mode": pipeline_mode,
+            "token_budget": token_budget,
             "warnings": list(state.get("warnings") or []),
             "errors": list(state.get("errors") or []),
             "metrics": metrics,
@@ -79,4 +307,10 @@ def _prepare_ingress(state: DXState) -> None:
     )
 
 
-__all__ = ["run_pipeline"]
+__all__ = [
+    "run_pipeline",
+    "run_pipeline_async",
+    "run_stored_pipeline",
+    "run_stored_pipeline_async",
+    "validate_stored_upload",
+]
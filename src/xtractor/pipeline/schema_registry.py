@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Tuple
+
+from xtractor.adapters.cache import LRUCache, SQLiteCache
+from xtractor.config.settings import get_settings
+from xtractor.pipeline.state import DXField, DXSchema
+
+# JSON types a cell may take; strict structured output needs them spelled out.
+_CELL_TYPES = ["string", "number", "boolean", "null"]
+
+
+def _format_field(field: DXField) -> str:
+    description = field.get("description") or ""
+    example = field.get("value")
+    pieces: List[str] = [f"{field['name']}: {description}".strip()]
+    if example is not None:
+        pieces.append(f"example: {example}")
+    return " (".join(pieces) + (")" if example is not None else "")
+
+
+def render_schema(schema: DXSchema) -> str:
+    field_lines = "\n".join(f"- {_format_field(field)}" for field in schema["fields"])
+    return f"key: {schema['key']}\nfields:\n{field_lines}"
+
+
+def render_example(schema: DXSchema) -> str | None:
+    fields = schema.get("fields", [])
+    example_row = {}
+    has_value = False
+    for field in fields:
+        value = field.get("value")
+        if value not in (None, ""):
+            has_value = True
+        example_row[field["name"]] = value if value not in (None, "") else None
+    if not has_value:
+        return None
+    payload = {"key": schema["key"], "rows": [example_row]}
+    return json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+def response_format_for(schema: DXSchema) -> Dict[str, Any]:
+    """OpenAI-style ``json_schema`` response format pinning rows to the schema's fields."""
+
+    names = [field["name"] for field in schema["fields"]]
+    row = {
+        "type": "object",
+        "properties": {name: {"type": list(_CELL_TYPES)} for name in names},
+        "required": names,
+        "additionalProperties": False,
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": re.sub(r"[^A-Za-z0-9_-]", "_", schema["key"])[:64] or "extraction",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"key": {"type": "string"}, "rows": {"type": "array", "items": row}},
+                "required": ["key", "rows"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def schema_id(schema: Mapping[str, Any]) -> str:
+    """Content hash of the normalized schema: equal schemas share an id."""
+
+    canonical = json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return "sch_" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    """A validated schema with everything the pipeline derives from it rendered once."""
+
+    id: str
+    schema: DXSchema
+    schema_block: str
+    example_block: str | None
+    field_names: Tuple[str, ...]
+    response_format: Dict[str, Any]
+
+
+def compile_schema(schema: DXSchema) -> CompiledSchema:
+    return CompiledSchema(
+        id=schema_id(schema),
+        schema=schema,
+        schema_block=render_schema(schema),
+        example_block=render_example(schema),
+        field_names=tuple(field["name"] for field in schema["fields"]),
+        response_format=response_format_for(schema),
+    )
+
+
+class SchemaRegistry:
+    """Compiled schemas by content-hash id, in memory with an optional SQLite store.
+
+    Registered schemas are persisted (as their validated JSON; artifacts are
+    recompiled on first use after a restart). Inline request schemas are only
+    memoized in memory, so repeated inline schemas are compiled once as well.
+    """
+
+    def __init__(self, max_entries: int, store: SQLiteCache | None = None) -> None:
+        self._memory = LRUCache(max_entries=max_entries)
+        self._store = store
+
+    def register(self, schema: DXSchema) -> CompiledSchema:
+        compiled = self.compiled(schema)
+        if self._store is not None:
+            self._store.set(compiled.id, compiled.schema)
+        return compiled
+
+    def get(self, schema_id: str) -> CompiledSchema | None:
+        compiled = self._memory.get(schema_id)
+        if compiled is None and self._store is not None:
+            stored = self._store.get(schema_id)
+            if stored is not None:
+                compiled = compile_schema(stored)
+                self._memory.set(schema_id, compiled)
+        return compiled
+
+    def compiled(self, schema: DXSchema) -> CompiledSchema:
+        key = schema_id(schema)
+        compiled = self._memory.get(key)
+        if compiled is None:
+            compiled = compile_schema(schema)
+            self._memory.set(key, compiled)
+        return compiled
+
+
+@lru_cache(maxsize=1)
+def get_schema_registry() -> SchemaRegistry:
+    """Return the process-wide schema registry configured from settings."""
+
+    settings = get_settings()
+    store = None
+    if settings.schema_registry_persist:
+        path = settings.schema_registry_path or settings.temp_dir / "schemas" / "schemas.sqlite"
+        store = SQLiteCache(path, max_entries=settings.schema_registry_max_entries)
+    return SchemaRegistry(settings.schema_registry_max_entries, store)
+
+
+def compiled_schema(state: Mapping[str, Any]) -> CompiledSchema:
+    """Compiled form of the state's schema, looked up by ``schema_id`` when the runner set it."""
+
+    registry = get_schema_registry()
+    if state.get("schema_id"):
+        compiled = registry.get(state["schema_id"])
+        if compiled is not None:
+            return compiled
+    schema = state.get("schema")
+    if not schema:
+        raise ValueError("Pipeline state has no schema")
+    return registry.compiled(schema)
+
+
+__all__ = [
+    "CompiledSchema",
+    "SchemaRegistry",
+    "compile_schema",
+    "compiled_schema",
+    "get_schema_registry",
+    "render_example",
+    "render_schema",
+    "response_format_for",
+    "schema_id",
+]
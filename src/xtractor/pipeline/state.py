@@ -43,21 +43,39 @@ class AuditInfo(TypedDict, total=False):
     graph_run_id: str
     nodes_path: List[str]
     timings_ms: Dict[str, int]
+    cache: Dict[str, str]
+    peak_rss_bytes: int
+    extract_input: Dict[str, Any]
+    chunks: List[Dict[str, Any]]
+    tokens: Dict[str, Dict[str, Optional[float]]]
+    usage: Dict[str, Optional[float]]
+    token_budget: Dict[str, Any]
+    model_tiers: Dict[str, Dict[str, Any]]
+    schemas: Dict[str, Dict[str, Any]]
+    prompt_cache: Dict[str, Any]
+    output_recovery: Dict[str, int]
 
 
 class DXState(TypedDict, total=False):
     """Shared LangGraph state for the pipeline."""
 
-    # ingestion inputs
-    file_bytes: bytes
+    # ingestion inputs (the upload itself stays on disk at file_ref)
     filename: str
     payload: Mapping[str, Any]
 
     # derived input data
     file_ref: str
+    file_sha256: str
+    file_size: int
+    page_count: int
+    has_text_layer: bool
     mime: str
     schema: DXSchema
-    output_format: Literal["json"]
+    schema_id: str
+    schemas: List[DXSchema]
+    output_format: Literal["json", "columns", "ndjson", "csv"]
+    pipeline_mode: Literal["two_pass", "single_pass"]
+    token_budget: Optional[int]
 
     # agent outputs
     concise_summary: str
@@ -67,6 +85,7 @@ class DXState(TypedDict, total=False):
     symbol_context: Optional[SymbolContext]
     system_prompt_final: str
     extraction_result: ExtractionResult
+    extraction_results: List[ExtractionResult]
 
     # pipeline metadata
     warnings: List[str]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Mapping
+
+_ACTIVE: ContextVar["RowStream | None"] = ContextVar("xtractor_row_stream", default=None)
+
+
+class RowStream:
+    """Channel extraction nodes publish to while a streamed request's graph runs.
+
+    Nodes find it through :func:`active_stream` (a context variable, so runs
+    without a stream pay nothing). Events are plain dicts: one ``summary``,
+    then ``row`` events as rows complete; the endpoint consuming :meth:`events`
+    adds whatever the final state holds beyond them. Publishing is safe from
+    worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[Dict[str, Any] | None] = asyncio.Queue()
+        self._lock = threading.Lock()
+        self._summary_sent = False
+
+    def _put(self, event: Dict[str, Any] | None) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    def summary(self, state: Mapping[str, Any]) -> None:
+        """Publish the document summary once, however many schema runs reach extraction."""
+
+        with self._lock:
+            if self._summary_sent:
+                return
+            self._summary_sent = True
+        self._put(
+            {
+                "event": "summary",
+                "concise_summary": state.get("concise_summary") or "",
+                "hints": list(state.get("hints") or []),
+            }
+        )
+
+    def row(self, key: str, row: Mapping[str, Any]) -> None:
+        self._put({"event": "row", "key": key, "row": dict(row)})
+
+    def close(self) -> None:
+        self._put(None)
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self._queue.get()
+            if event is None:
+                return
+            yield event
+
+
+def active_stream() -> RowStream | None:
+    """The stream of the request this graph run serves, if it was started streamed."""
+
+    return _ACTIVE.get()
+
+
+async def run_streamed(stream: RowStream, runner: Any, /, **kwargs: Any) -> Any:
+    """Await ``runner(**kwargs)`` with ``stream`` active, closing it when the run ends."""
+
+    token = _ACTIVE.set(stream)
+    try:
+        return await runner(**kwargs)
+    finally:
+        _ACTIVE.reset(token)
+        stream.close()
+
+
+__all__ = ["RowStream", "active_stream", "run_streamed"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Tuple
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+_CLOSERS = {"{": "}", "[": "]"}
+
+REPAIRED = "repaired"
+TRUNCATED = "truncated"
+
+
+def _strip_wrapping(text: str) -> str:
+    text = _FENCE_RE.sub("", text.strip())
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=0)
+    return text[start:]
+
+
+def _element_ends(text: str) -> List[Tuple[int, List[str]]]:
+    """Offsets just past each container that closes inside a top-level array value.
+
+    Returns ``(offset, open_stack)`` pairs for containers closing at depth 2, i.e.
+    the complete elements of an array held by the top-level object, such as the
+    rows of ``{"key": ..., "rows": [...]}``.
+    """
+
+    stack: List[str] = []
+    ends: List[Tuple[int, List[str]]] = []
+    in_string = escaped = False
+    for offset, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]" and stack:
+            stack.pop()
+            if len(stack) == 2 and stack[-1] == "[":
+                ends.append((offset + 1, list(stack)))
+    return ends
+
+
+def parse_json_lenient(text: str) -> Tuple[Any, str | None]:
+    """Parse model output, repairing common damage.
+
+    Returns ``(value, repair)`` where ``repair`` is ``None`` for valid JSON,
+    ``"repaired"`` after stripping code fences or trailing commas, and
+    ``"truncated"`` when the output was cut off and only the complete elements
+    of its array (the finished rows) were kept. Raises ``ValueError`` when
+    nothing can be recovered.
+    """
+
+    try:
+        return json.loads(text), None
+    except json.JSONDecodeError:
+        pass
+    cleaned = _TRAILING_COMMA_RE.sub(r"\1", _strip_wrapping(text))
+    try:
+        return json.loads(cleaned), REPAIRED
+    except json.JSONDecodeError:
+        pass
+    for offset, stack in reversed(_element_ends(cleaned)):
+        closing = "".join(_CLOSERS[opener] for opener in reversed(stack))
+        try:
+            return json.loads(cleaned[:offset] + closing), TRUNCATED
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Model returned invalid JSON that could not be repaired")
+
+
+__all__ = ["REPAIRED", "TRUNCATED", "parse_json_lenient"]
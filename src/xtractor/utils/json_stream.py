@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List
+
+# Only these characters change the scanner's state; everything else is skipped.
+_SPECIAL_RE = re.compile(r'[\\"{}\[\]]')
+
+
+class RowStreamParser:
+    """Incremental scanner returning each object element of a top-level array as it closes.
+
+    Feed it the model's output piece by piece; for ``{"key": ..., "rows": [{...}, ...]}``
+    every finished row comes back as soon as its closing brace arrives. Only the
+    text of the row being assembled is kept.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[str] = []
+        self._in_string = False
+        self._skip = -1
+        self._consumed = 0
+        self._capturing = False
+        self._carry = ""
+
+    def feed(self, text: str) -> List[Any]:
+        rows: List[Any] = []
+        start = 0
+        for match in _SPECIAL_RE.finditer(text):
+            position = self._consumed + match.start()
+            if position == self._skip:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == "\\":
+                    self._skip = position + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+                if char == "{" and self._stack[:2] == ["{", "["] and len(self._stack) == 3:
+                    self._capturing, self._carry, start = True, "", match.start()
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if self._capturing and len(self._stack) == 2:
+                    element = self._carry + text[start : match.end()]
+                    self._capturing, self._carry = False, ""
+                    try:
+                        rows.append(json.loads(element))
+                    except json.JSONDecodeError:
+                        pass
+        if self._capturing:
+            self._carry += text[start:]
+        self._consumed += len(text)
+        return rows
+
+
+__all__ = ["RowStreamParser"]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, Mapping
+from typing import Any, Iterable, List, Mapping
 
 from xtractor.pipeline.state import DXField, DXSchema
 
@@ -13,11 +13,35 @@ class PayloadValidationError(ValueError):
     """Raised when request payload cannot be parsed."""
 
 
+OUTPUT_FORMATS = ("json", "columns", "ndjson", "csv")
+
+
 def validate_output_format(value: str) -> str:
     target = value.lower().strip()
-    if target != "json":
-        raise PayloadValidationError("Only outputFormat='json' is supported")
-    return "json"
+    if target not in OUTPUT_FORMATS:
+        raise PayloadValidationError(
+            f"payload.outputFormat must be one of: {', '.join(OUTPUT_FORMATS)}"
+        )
+    return target
+
+
+PIPELINE_MODES = ("two_pass", "single_pass")
+
+
+def validate_pipeline_mode(value: Any) -> str:
+    if value not in PIPELINE_MODES:
+        raise PayloadValidationError(
+            f"payload.pipelineMode must be one of: {', '.join(PIPELINE_MODES)}"
+        )
+    return str(value)
+
+
+def validate_token_budget(value: Any) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise PayloadValidationError("payload.tokenBudget must be a positive integer")
+    return value
 
 
 def validate_field(field: Mapping[str, Any], index: int) -> DXField:
@@ -57,6 +81,28 @@ def extract_schema_from_payload(payload: Mapping[str, Any]) -> DXSchema:
     return validate_schema(schema)
 
 
+def extract_schemas_from_payload(payload: Mapping[str, Any]) -> List[DXSchema]:
+    """Return the schemas of a multi-schema payload (``payload.schemas``) in request order."""
+
+    raw_schemas = payload.get("schemas")
+    if not isinstance(raw_schemas, list) or not raw_schemas:
+        raise PayloadValidationError("payload.schemas must be a non-empty array")
+    schemas: List[DXSchema] = []
+    for idx, schema in enumerate(raw_schemas):
+        if not isinstance(schema, Mapping):
+            raise PayloadValidationError(f"payload.schemas[{idx}] must be an object")
+        schemas.append(validate_schema(schema))
+    keys = [schema["key"] for schema in schemas]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise SchemaValidationError(f"Schema keys must be unique: {', '.join(duplicates)}")
+    return schemas
+
+
+def is_multi_schema(payload: Mapping[str, Any]) -> bool:
+    return payload.get("schemas") is not None
+
+
 def ensure_payload(payload: Mapping[str, Any]) -> tuple[str, DXSchema]:
     if "outputFormat" not in payload:
         raise PayloadValidationError("payload.outputFormat is required")
@@ -65,11 +111,30 @@ def ensure_payload(payload: Mapping[str, Any]) -> tuple[str, DXSchema]:
     return output_format, schema
 
 
+def ensure_multi_payload(payload: Mapping[str, Any]) -> tuple[str, List[DXSchema]]:
+    if "outputFormat" not in payload:
+        raise PayloadValidationError("payload.outputFormat is required")
+    if payload.get("schema") is not None or payload.get("schemaId") is not None:
+        raise PayloadValidationError("payload.schemas cannot be combined with schema/schemaId")
+    output_format = validate_output_format(str(payload["outputFormat"]))
+    if output_format == "csv":
+        raise PayloadValidationError(
+            "outputFormat 'csv' holds one table; use 'columns' or 'ndjson' with schemas"
+        )
+    return output_format, extract_schemas_from_payload(payload)
+
+
 __all__ = [
+    "OUTPUT_FORMATS",
     "PayloadValidationError",
     "SchemaValidationError",
+    "ensure_multi_payload",
     "ensure_payload",
     "extract_schema_from_payload",
+    "extract_schemas_from_payload",
+    "is_multi_schema",
     "validate_output_format",
+    "validate_pipeline_mode",
     "validate_schema",
+    "validate_token_budget",
 ]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, AsyncIterator, Dict, List, Mapping, Sequence
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from xtractor.adapters import cassette, llm, resilience
+from xtractor.config import settings as settings_module
+from xtractor.jobs import store as job_store
+from xtractor.observability import exporters, metrics, profiling
+from xtractor.pipeline import result_cache, runner, schema_registry
+from xtractor.pipeline.nodes import file_understanding
+
+SCHEMA = {
+    "key": "asset_register",
+    "fields": [
+        {"name": "UNIQUE KKS", "description": "Unique identifier"},
+        {"name": "DESCRIPTION", "description": "Equipment description"},
+        {"name": "LOCATION", "description": "Building and room"},
+    ],
+}
+PAYLOAD = {"outputFormat": "json", "schema": SCHEMA}
+
+_SINGLETONS = (
+    settings_module.get_settings,
+    metrics.get_metrics_registry,
+    profiling.get_profile_store,
+    exporters.get_span_exporter,
+    schema_registry.get_schema_registry,
+    file_understanding.get_summary_cache,
+    result_cache.get_result_cache,
+    cassette.get_cassette_store,
+    resilience.get_resilience,
+    job_store.get_job_store,
+)
+
+
+def make_pdf(pages: int, tag: str = "x", rows: int = 30) -> bytes:
+    """A text-layer PDF with ``pages`` pages of register lines, distinct per ``tag``."""
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # the page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [f"Asset register {tag} page {page + 1}"] + [
+            f"10LAB{page:03d}AA{row:03d} Pump motor {row} Building {page % 7} Room {row}"
+            for row in range(rows)
+        ]
+        text = " T* ".join(f"({line}) Tj" for line in lines)
+        stream = f"BT /F1 9 Tf 12 TL 40 800 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 3 0 R >> >> >>" % (len(objects))
+        )
+    refs = " ".join(f"{kid} 0 R" for kid in kids)
+    objects[1] = f"<< /Type /Pages /Kids [{refs}] /Count {pages} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+class FakeChatModel:
+    """In-process chat model answering like ``benchmarks/stub_llm_server.py``.
+
+    File-understanding prompts get a summary; every other prompt gets ``rows``
+    rows for the fields of the requested ``json_schema``, with ids derived from
+    the prompt so page windows yield distinct rows. Set ``error`` to raise it
+    from every call, or ``replies`` to serve those contents in order first.
+    ``stream_cut`` ends streams after that many characters, raising
+    ``stream_error`` there when it is set.
+    """
+
+    def __init__(self, model_name: str = "fake-model", rows: int = 3) -> None:
+        self.model_name = model_name
+        self.rows = rows
+        self.calls: List[Dict[str, Any]] = []
+        self.replies: List[str] = []
+        self.error: BaseException | None = None
+        self.stream_cut: int | None = None
+        self.stream_error: BaseException | None = None
+
+    def _content(self, messages: Sequence[Any], kwargs: Mapping[str, Any]) -> str:
+        self.calls.append({"messages": list(messages), "kwargs": dict(kwargs)})
+        if self.error is not None:
+            raise self.error
+        if self.replies:
+            return self.replies.pop(0)
+        system = str(getattr(messages[0], "content", ""))
+        summary = {"concise_summary": "Fake asset register.", "hints": []}
+        if "FILE UNDERSTANDING" in system:
+            return json.dumps(summary)
+        spec = (kwargs.get("response_format") or {}).get("json_schema") or {}
+        properties = (spec.get("schema") or {}).get("properties") or {}
+        row_spec = properties.get("rows", {}).get("items", {}).get("properties") or {}
+        fields = list(row_spec) or ["UNIQUE KKS", "DESCRIPTION", "LOCATION"]
+        prompt = json.dumps([getattr(m, "content", m) for m in messages[1:]], default=str)
+        digest = hashlib.sha1(prompt.encode()).hexdigest()[:8]
+        rows = [
+            {field: f"{field[:3].upper()}-{digest}-{index:04d}" for field in fields}
+            for index in range(self.rows)
+        ]
+        reply: Dict[str, Any] = {"key": spec.get("name") or "fake", "rows": rows}
+        if "concise_summary" in properties:
+            reply = {**summary, **reply}
+        return json.dumps(reply)
+
+    def _message(self, content: str) -> AIMessage:
+        return AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+            response_metadata={"model_name": self.model_name},
+        )
+
+    def invoke(self, messages: Sequence[Any], **kwargs: Any) -> AIMessage:
+        return self._message(self._content(messages, kwargs))
+
+    async def ainvoke(self, messages: Sequence[Any], **kwargs: Any) -> AIMessage:
+        return self._message(self._content(messages, kwargs))
+
+    async def astream(self, messages: Sequence[Any], **kwargs: Any) -> AsyncIterator[Any]:
+        content = self._content(messages, kwargs)[: self.stream_cut]
+        for start in range(0, len(content), 16):
+            yield AIMessageChunk(content=content[start : start + 16])
+        if self.stream_error is not None:
+            raise self.stream_error
+        message = self._message("")
+        yield AIMessageChunk(
+            content="",
+            usage_metadata=message.usage_metadata,
+            response_metadata=message.response_metadata,
+        )
+
+
+def _clear_singletons() -> None:
+    for getter in _SINGLETONS:
+        getter.cache_clear()
+    runner._COMPILED_GRAPH = None
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    """Fresh settings and singletons per test, with every file under ``tmp_path``."""
+
+    monkeypatch.setenv("DX_TEMP_DIR", str(tmp_path))
+    monkeypatch.setenv("DX_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("DX_JOBS_ENABLED", "false")
+    _clear_singletons()
+    yield settings_module.get_settings
+    _clear_singletons()
+
+
+@pytest.fixture
+def configure(monkeypatch: pytest.MonkeyPatch):
+    """Set ``DX_*`` settings for the test: ``configure(result_cache_enabled=False)``."""
+
+    def apply(**values: Any) -> settings_module.Settings:
+        for name, value in values.items():
+            text = value if isinstance(value, str) else json.dumps(value)
+            monkeypatch.setenv(f"DX_{name.upper()}", text)
+        _clear_singletons()
+        return settings_module.get_settings()
+
+    return apply
+
+
+@pytest.fixture
+def fake_model(monkeypatch: pytest.MonkeyPatch) -> FakeChatModel:
+    """Serve every model lookup from one :class:`FakeChatModel`."""
+
+    model = FakeChatModel()
+    monkeypatch.setattr(llm._REGISTRY, "get", lambda settings: model)
+    return model
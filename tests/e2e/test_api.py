@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from tests.conftest import PAYLOAD, SCHEMA, make_pdf
+from xtractor.api.app import create_app
+
+
+def _extract(client: TestClient, document: bytes, payload: dict) -> dict:
+    response = client.post(
+        "/v1/extract",
+        files={"file": ("a.pdf", document, "application/pdf")},
+        data={"payload": json.dumps(payload)},
+    )
+    return {"status": response.status_code, "body": response.json()}
+
+
+def test_extract_endpoint_returns_model_rows(fake_model):
+    with TestClient(create_app()) as client:
+        response = _extract(client, make_pdf(2), PAYLOAD)
+
+    assert response["status"] == 200
+    assert len(response["body"]["result"]["rows"]) == fake_model.rows
+
+
+def test_extract_endpoint_rejects_invalid_payload(fake_model):
+    with TestClient(create_app()) as client:
+        response = _extract(client, make_pdf(1), {"outputFormat": "json"})
+
+    assert response["status"] == 400
+    assert fake_model.calls == []
+
+
+def _stream_events(client: TestClient, document: bytes, payload: dict) -> list:
+    response = client.post(
+        "/v1/extract/stream",
+        files={"file": ("a.pdf", document, "application/pdf")},
+        data={"payload": json.dumps(payload)},
+    )
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_endpoint_sends_summary_rows_then_done(fake_model):
+    with TestClient(create_app()) as client:
+        events = _stream_events(client, make_pdf(2), PAYLOAD)
+
+    kinds = [event["event"] for event in events]
+    assert kinds == ["summary", *["row"] * fake_model.rows, "done"]
+
+
+def test_stream_failure_after_rows_keeps_the_streamed_rows(fake_model):
+    # Enough of the reply for one complete row, then the connection drops.
+    fake_model.stream_cut = 200
+    fake_model.stream_error = RuntimeError("connection reset")
+
+    with TestClient(create_app()) as client:
+        events = _stream_events(client, make_pdf(2), PAYLOAD)
+
+    rows = [event["row"] for event in events if event["event"] == "row"]
+    assert len(rows) == 1
+    assert [event["event"] for event in events][-1] == "done"
+    assert "reset" not in [event["event"] for event in events]
+    assert any("kept 1 streamed rows" in warning for warning in events[-1]["warnings"])
+
+
+def test_extract_endpoint_refuses_oversized_uploads(fake_model, configure):
+    configure(max_upload_bytes=1024)
+
+    with TestClient(create_app()) as client:
+        response = _extract(client, make_pdf(2), PAYLOAD)
+
+    assert response["status"] == 413
+    assert response["body"]["detail"]["code"] == "FILE_TOO_LARGE"
+    assert fake_model.calls == []
+
+
+def test_registered_schema_is_served_and_resolves_schema_id_payloads(fake_model):
+    with TestClient(create_app()) as client:
+        created = client.post("/v1/schemas", json=SCHEMA)
+        schema_id = created.json()["schema_id"]
+        fetched = client.get(f"/v1/schemas/{schema_id}")
+        again = client.post("/v1/schemas", json=SCHEMA)
+        missing = client.get("/v1/schemas/sch_unknown")
+        invalid = client.post("/v1/schemas", json={"key": "k", "fields": []})
+        extracted = _extract(client, make_pdf(2), {"outputFormat": "json", "schemaId": schema_id})
+        unknown = _extract(client, make_pdf(2), {"outputFormat": "json", "schemaId": "sch_x"})
+
+    names = [field["name"] for field in SCHEMA["fields"]]
+    assert created.status_code == 201
+    assert (fetched.status_code, fetched.json()) == (200, created.json())
+    assert fetched.json()["field_names"] == names
+    assert again.json()["schema_id"] == schema_id  # ids are content hashes
+    assert missing.status_code == 404
+    assert missing.json()["detail"]["code"] == "SCHEMA_NOT_FOUND"
+    assert invalid.status_code == 400
+    assert extracted["status"] == 200
+    assert [list(row) for row in extracted["body"]["result"]["rows"]] == [names] * fake_model.rows
+    assert unknown["status"] == 400
+
+
+def test_columns_output_holds_one_array_per_field(fake_model):
+    second = {"key": "parts", "fields": [{"name": "PART", "description": "Part number"}]}
+    with TestClient(create_app()) as client:
+        rows = _extract(client, make_pdf(2), PAYLOAD)["body"]["result"]["rows"]
+        single = _extract(client, make_pdf(2), {**PAYLOAD, "outputFormat": "columns"})
+        multi = _extract(
+            client, make_pdf(2), {"outputFormat": "columns", "schemas": [SCHEMA, second]}
+        )
+
+    names = [field["name"] for field in SCHEMA["fields"]]
+    assert single["body"]["result"] == {
+        "key": "asset_register",
+        "fields": names,
+        "columns": [[row[name] for row in rows] for name in names],
+        "row_count": fake_model.rows,
+    }
+    blocks = multi["body"]["results"]
+    assert [(block["key"], block["fields"]) for block in blocks] == [
+        ("asset_register", names),
+        ("parts", ["PART"]),
+    ]
+    assert all(len(column) == fake_model.rows for block in blocks for column in block["columns"])
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from tests.conftest import PAYLOAD, FakeChatModel, make_pdf
+from xtractor.adapters import llm
+from xtractor.adapters.resilience import CLOSED, OPEN, get_resilience
+from xtractor.extractors import text_layer
+from xtractor.pipeline.runner import run_pipeline, run_pipeline_async
+from xtractor.utils.validators import PayloadValidationError
+
+
+def test_run_pipeline_extracts_rows_from_the_model(fake_model):
+    state = run_pipeline(file_bytes=make_pdf(2), filename="a.pdf", payload=PAYLOAD)
+
+    rows = state["extraction_result"]["rows"]
+    assert len(rows) == fake_model.rows
+    assert set(rows[0]) == {"UNIQUE KKS", "DESCRIPTION", "LOCATION"}
+    assert state["warnings"] == []
+    assert state["audit"]["nodes_path"][-1] == "postprocess"
+
+
+def test_async_run_matches_sync_run(fake_model, configure):
+    configure(result_cache_enabled=False)
+    document = make_pdf(2)
+
+    sync_state = run_pipeline(file_bytes=document, filename="a.pdf", payload=PAYLOAD)
+    async_state = asyncio.run(
+        run_pipeline_async(file_bytes=document, filename="a.pdf", payload=PAYLOAD)
+    )
+
+    assert async_state["extraction_result"] == sync_state["extraction_result"]
+    assert async_state["audit"]["nodes_path"] == sync_state["audit"]["nodes_path"]
+
+
+def test_invalid_payload_is_rejected_before_the_graph(fake_model):
+    with pytest.raises(PayloadValidationError):
+        run_pipeline(file_bytes=make_pdf(1), filename="a.pdf", payload={"outputFormat": "json"})
+
+    assert fake_model.calls == []
+
+
+def test_async_run_parses_the_document_off_the_event_loop(fake_model, configure, monkeypatch):
+    configure(file_understanding_mode="llm", extract_chunk_min_pages=6, extract_chunk_pages=3)
+    parsed_on = []
+    extract = text_layer.extract_text_layer
+
+    def recording_extract(path, mime):
+        parsed_on.append(threading.current_thread() is threading.main_thread())
+        return extract(path, mime)
+
+    monkeypatch.setattr(text_layer, "extract_text_layer", recording_extract)
+
+    state = asyncio.run(
+        run_pipeline_async(file_bytes=make_pdf(7), filename="a.pdf", payload=PAYLOAD)
+    )
+
+    assert state["metrics"]["extract_branch"] == "chunked"
+    assert state["page_count"] == 7
+    assert parsed_on == [False]
+    assert len(state["extraction_result"]["rows"]) == 3 * fake_model.rows
+
+
+def _run(runner, document: bytes, payload: dict = PAYLOAD) -> dict:
+    if runner is run_pipeline_async:
+        return asyncio.run(runner(file_bytes=document, filename="a.pdf", payload=payload))
+    return runner(file_bytes=document, filename="a.pdf", payload=payload)
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_summary_call_records_its_model_tier(fake_model, configure, runner):
+    configure(
+        file_understanding_mode="llm", summary_model="summary-model", result_cache_enabled=False
+    )
+
+    first = _run(runner, make_pdf(2))
+    second = _run(runner, make_pdf(2))
+
+    assert first["audit"]["cache"]["file_understanding"] == "miss"
+    tier = first["audit"]["model_tiers"]["file_understanding"]
+    assert (tier["tier"], tier["model"]) == ("summary", "summary-model")
+    # A summary served from the cache calls no model, so it records no tier.
+    assert second["audit"]["cache"]["file_understanding"].startswith("hit:")
+    assert "file_understanding" not in second["audit"]["model_tiers"]
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_summary_tier_timeout_is_charged_to_the_tier_model(configure, monkeypatch, runner):
+    settings = configure(
+        file_understanding_mode="llm",
+        summary_model="summary-model",
+        fallback_model="fallback-model",
+        llm_breaker_failure_threshold=1,
+    )
+    built = []
+
+    def chat(settings, model, reasoning_effort):
+        built.append(FakeChatModel(model))
+        if model == "summary-model":
+            built[-1].error = APITimeoutError(request=httpx.Request("POST", "http://llm/chat"))
+        return built[-1]
+
+    registry = llm.ModelRegistry()
+    monkeypatch.setattr(registry, "_chat", chat)
+    monkeypatch.setattr(llm, "_REGISTRY", registry)
+
+    state = _run(runner, make_pdf(2))
+
+    assert state["metrics"]["summary_source"] == "llm"
+    calls = {model.model_name: len(model.calls) for model in built if model.calls}
+    # The summary falls back once; the extraction answers on the default model.
+    assert calls == {"summary-model": 1, "fallback-model": 1, settings.mm_model: 1}
+    resilience = get_resilience()
+    assert resilience.breaker("summary-model").state == OPEN
+    assert resilience.breaker("fallback-model").state == CLOSED
+    assert resilience.breaker(settings.mm_model).state == CLOSED
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_single_pass_leaves_chunk_sized_documents_on_two_pass(fake_model, configure, runner):
+    configure(extract_chunk_min_pages=6, extract_chunk_pages=3)
+
+    state = _run(runner, make_pdf(12), {**PAYLOAD, "pipelineMode": "single_pass"})
+
+    assert state["metrics"]["pipeline_mode"] == "two_pass"
+    assert state["metrics"]["extract_branch"] == "chunked"
+    assert len(state["extraction_result"]["rows"]) == 4 * fake_model.rows
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_nodes_path_lists_the_nodes_that_ran(fake_model, configure, runner):
+    configure(extract_chunk_min_pages=6, extract_chunk_pages=3, result_cache_enabled=False)
+    single = {**PAYLOAD, "pipelineMode": "single_pass"}
+
+    small = _run(runner, make_pdf(2), single)
+    large = _run(runner, make_pdf(12), single)
+
+    # No symbol keywords in the summary, so the symbol pass is skipped.
+    assert small["metrics"]["pipeline_mode"] == "single_pass"
+    assert small["audit"]["nodes_path"] == ["single_pass_extract", "postprocess"]
+    assert large["audit"]["nodes_path"] == [
+        "file_understanding",
+        "prompt_builder",
+        "prompt_merge",
+        "chunked_extract",
+        "postprocess",
+    ]
+
+
+def test_single_pass_symbol_pass_is_reported_under_its_node_name(fake_model):
+    fake_model.replies = [
+        json.dumps(
+            {
+                "concise_summary": "P&ID sheet with a symbol legend.",
+                "hints": [],
+                "key": "asset_register",
+                "rows": [{"UNIQUE KKS": "10LAB01", "DESCRIPTION": "Pump", "LOCATION": "B1"}],
+            }
+        )
+    ]
+
+    state = run_pipeline(
+        file_bytes=make_pdf(2),
+        filename="a.pdf",
+        payload={**PAYLOAD, "pipelineMode": "single_pass"},
+    )
+
+    assert state["audit"]["nodes_path"] == [
+        "single_pass_extract",
+        "single_pass_symbols",
+        "postprocess",
+    ]
+
+
+class SlowFirstSchema(FakeChatModel):
+    """Answers the ``first`` schema last, so completion order differs from request order."""
+
+    def _delay(self, kwargs) -> float:
+        name = (kwargs.get("response_format") or {}).get("json_schema", {}).get("name")
+        return 0.2 if name == "first" else 0.0
+
+    def invoke(self, messages, **kwargs):
+        threading.Event().wait(self._delay(kwargs))
+        return super().invoke(messages, **kwargs)
+
+    async def ainvoke(self, messages, **kwargs):
+        await asyncio.sleep(self._delay(kwargs))
+        return await super().ainvoke(messages, **kwargs)
+
+
+def _schema(key: str, *fields: str) -> dict:
+    return {"key": key, "fields": [{"name": name, "description": name} for name in fields]}
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_schema_fanout_returns_results_in_request_order(monkeypatch, runner):
+    model = SlowFirstSchema()
+    monkeypatch.setattr(llm._REGISTRY, "get", lambda settings: model)
+    schemas = [_schema("first", "TAG"), _schema("second", "KKS", "NAME"), _schema("third", "ID")]
+
+    state = _run(runner, make_pdf(2), {"outputFormat": "json", "schemas": schemas})
+
+    results = state["extraction_results"]
+    assert [result["key"] for result in results] == ["first", "second", "third"]
+    for schema, result in zip(schemas, results, strict=True):
+        names = [field["name"] for field in schema["fields"]]
+        assert [list(row) for row in result["rows"]] == [names] * model.rows
+    assert list(state["audit"]["schemas"]) == ["first", "second", "third"]
+
+
+@pytest.mark.parametrize("runner", [run_pipeline, run_pipeline_async])
+def test_token_budget_switches_to_the_text_layer_then_a_cheaper_model(
+    fake_model, configure, runner
+):
+    configure(extract_input_mode="file", token_budget_model="cheap-model")
+
+    roomy = _run(runner, make_pdf(2), {**PAYLOAD, "tokenBudget": 1_000_000})
+    tight = _run(runner, make_pdf(2), {**PAYLOAD, "tokenBudget": 100})
+
+    assert roomy["audit"]["token_budget"]["actions"] == []
+    assert roomy["audit"]["extract_input"]["mode"] == "file"
+    assert roomy["audit"]["model_tiers"]["multimodal_extract"]["model"] != "cheap-model"
+    decision = tight["audit"]["token_budget"]
+    assert decision["actions"] == ["text", "model"]
+    assert decision["exceeded"]
+    assert tight["audit"]["extract_input"]["mode"] == "text"
+    assert tight["audit"]["model_tiers"]["multimodal_extract"]["model"] == "cheap-model"
+    assert len(tight["extraction_result"]["rows"]) == fake_model.rows
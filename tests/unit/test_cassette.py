@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from tests.conftest import FakeChatModel
+from xtractor.adapters.cassette import CassetteMissError, get_cassette_store
+from xtractor.adapters.llm import astream_json, invoke_json
+
+MESSAGES = [SystemMessage(content="extract"), HumanMessage(content="page 1")]
+FORMAT = {"type": "json_object"}
+
+
+def _replaying(configure, model: FakeChatModel) -> None:
+    configure(llm_cassette_mode="replay", llm_cassette_time_scale=0)
+    model.error = AssertionError("replay must not call the model")
+
+
+def test_recorded_response_is_replayed_without_calling_the_model(configure):
+    configure(llm_cassette_mode="record")
+    model = FakeChatModel()
+    recorded = invoke_json(model, MESSAGES, response_format=FORMAT)
+    _replaying(configure, model)
+
+    replayed = invoke_json(model, MESSAGES, response_format=FORMAT)
+
+    assert replayed.parsed == recorded.parsed
+    assert replayed.usage == recorded.usage
+    assert len(model.calls) == 1
+    assert get_cassette_store().snapshot() == {
+        "mode": "replay",
+        "recorded": 0,
+        "replayed": 1,
+        "misses": 0,
+    }
+
+
+def test_replayed_stream_hands_over_the_recorded_rows(configure):
+    configure(llm_cassette_mode="record")
+    model = FakeChatModel()
+    recorded = invoke_json(model, MESSAGES, response_format=FORMAT)
+    _replaying(configure, model)
+    rows: list = []
+
+    # Streaming adds only transport options, so it replays the invoked recording.
+    replayed = asyncio.run(astream_json(model, MESSAGES, rows.append, response_format=FORMAT))
+
+    assert replayed.parsed == recorded.parsed
+    assert rows == recorded.parsed["rows"]
+
+
+def test_unrecorded_request_misses_in_replay(configure):
+    configure(llm_cassette_mode="record")
+    model = FakeChatModel()
+    invoke_json(model, MESSAGES, response_format=FORMAT)
+    _replaying(configure, model)
+
+    with pytest.raises(CassetteMissError):
+        invoke_json(model, [*MESSAGES[:1], HumanMessage(content="page 2")], response_format=FORMAT)
+    assert get_cassette_store().snapshot()["misses"] == 1
+    assert len(model.calls) == 1
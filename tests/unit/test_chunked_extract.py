@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+
+from xtractor.extractors import PDF_MIME
+from xtractor.pipeline.nodes.chunked_extract import merge_rows, page_windows
+from xtractor.pipeline.nodes.extract_router import extract_router
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@pytest.mark.parametrize(
+    ("pages", "size", "overlap", "expected"),
+    [
+        (5, 2, 0, [[1, 2], [3, 4], [5]]),
+        (5, 3, 1, [[1, 2, 3], [3, 4, 5]]),
+        (2, 5, 0, [[1, 2]]),
+        (0, 5, 0, []),
+        (3, 1, 4, [[1], [2], [3]]),
+    ],
+)
+def test_page_windows(pages, size, overlap, expected):
+    assert page_windows(pages, size, overlap) == expected
+
+
+def test_merge_rows_folds_duplicates_by_key():
+    chunks = [
+        [{"KKS": "10LAB01", "DESC": "Pump", "LOC": ""}, {"KKS": "10LAB02", "DESC": "Valve"}],
+        [{"KKS": " 10lab01 ", "DESC": "Pump motor", "LOC": "B1"}, {"KKS": "10LAB03"}],
+    ]
+
+    merged = merge_rows(chunks, ["KKS"])
+
+    assert merged == [
+        {"KKS": "10LAB01", "DESC": "Pump", "LOC": "B1"},
+        {"KKS": "10LAB02", "DESC": "Valve"},
+        {"KKS": "10LAB03"},
+    ]
+
+
+def test_merge_rows_without_keys_drops_only_identical_rows():
+    chunks = [
+        [{"KKS": "", "DESC": "Note"}, {"KKS": None, "DESC": "Other"}],
+        [{"DESC": "Note", "KKS": ""}, {"KKS": "", "DESC": "Note 2"}, "not a row"],
+    ]
+
+    merged = merge_rows(chunks, ["KKS"])
+
+    assert [row["DESC"] for row in merged] == ["Note", "Other", "Note 2"]
+
+
+def test_merge_rows_does_not_alias_chunk_rows():
+    first = {"KKS": "A", "LOC": None}
+    merge_rows([[first], [{"KKS": "A", "LOC": "B1"}]], ["KKS"])
+
+    assert first["LOC"] is None
+
+
+def _route(**state) -> str:
+    state.setdefault("metrics", {})
+    return extract_router(state)
+
+
+def test_router_reads_page_facts_from_state(configure):
+    configure(extract_chunk_min_pages=10, extract_chunk_pages=4)
+
+    assert _route(mime=PDF_MIME, page_count=12, file_size=1) == "chunked"
+    assert _route(mime=PDF_MIME, page_count=8, file_size=1) == "single"
+    assert _route(mime=DOCX_MIME, page_count=12, has_text_layer=True) == "chunked"
+    assert _route(mime=DOCX_MIME, page_count=12, has_text_layer=False) == "single"
+    assert _route(mime="image/png", file_size=10**9) == "single"
+
+
+def test_router_records_the_branch(configure):
+    configure(chunked_extract_enabled=False)
+    state = {"mime": PDF_MIME, "page_count": 500, "metrics": {}}
+
+    assert extract_router(state) == "single"
+    assert state["metrics"]["extract_branch"] == "single"
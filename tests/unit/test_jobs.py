@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from xtractor.jobs import store as store_module
+from xtractor.jobs.store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from xtractor.jobs.worker import JobFailedError, JobWorkerPool
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(store_module, "time", clock)
+    return clock
+
+
+def _store(path: Path, owner: str, **kwargs) -> JobStore:
+    kwargs.setdefault("max_pending", 10)
+    kwargs.setdefault("lease_seconds", 30.0)
+    return JobStore(path / "jobs.sqlite", owner=owner, **kwargs)
+
+
+def _enqueue(store: JobStore, name: str = "a.pdf"):
+    return store.enqueue(
+        filename=name,
+        upload_path=Path("/tmp") / name,
+        sha256="0" * 64,
+        size=1,
+        payload={"outputFormat": "json"},
+    )
+
+
+def test_claim_leases_the_job(tmp_path, clock):
+    store = _store(tmp_path, "a")
+    job = _enqueue(store)
+
+    claimed = store.claim()
+
+    assert claimed.id == job.id
+    assert (claimed.status, claimed.owner, claimed.attempts) == (RUNNING, "a", 1)
+    assert claimed.lease_until == clock.now + 30
+    assert store.claim() is None
+
+
+def test_recover_leaves_live_leases_of_other_processes(tmp_path, clock):
+    first, second = _store(tmp_path, "a"), _store(tmp_path, "b")
+    job = _enqueue(first)
+    first.claim()
+
+    clock.now += 29
+    assert second.recover() == (0, [])
+    assert second.get(job.id).status == RUNNING
+
+    clock.now += 2
+    requeued, abandoned = second.recover()
+
+    assert (requeued, abandoned) == (1, [])
+    recovered = second.get(job.id)
+    assert (recovered.status, recovered.owner, recovered.lease_until) == (QUEUED, None, None)
+
+
+def test_renewed_lease_survives_recovery(tmp_path, clock):
+    first, second = _store(tmp_path, "a"), _store(tmp_path, "b")
+    job = _enqueue(first)
+    first.claim()
+
+    clock.now += 20
+    assert first.renew(job.id)
+    clock.now += 20
+
+    assert second.recover() == (0, [])
+    assert not second.renew(job.id)
+
+
+def test_stale_owner_cannot_finish_a_taken_over_job(tmp_path, clock):
+    first, second = _store(tmp_path, "a"), _store(tmp_path, "b")
+    job = _enqueue(first)
+    first.claim()
+    clock.now += 31
+    second.recover()
+    second.claim()
+
+    assert not first.complete(job.id, {"rows": ["stale"]})
+    assert not first.renew(job.id)
+    assert second.complete(job.id, {"rows": ["fresh"]})
+    finished = second.get(job.id)
+    assert (finished.status, finished.result) == (SUCCEEDED, {"rows": ["fresh"]})
+    assert finished.lease_until is None
+
+
+def test_exhausted_jobs_are_failed(tmp_path, clock):
+    store = _store(tmp_path, "a", max_attempts=2)
+    job = _enqueue(store)
+    for _ in range(2):
+        store.claim()
+        clock.now += 31
+        requeued, abandoned = store.recover()
+
+    assert requeued == 0
+    assert [found.id for found in abandoned] == [job.id]
+    failed = store.get(job.id)
+    assert failed.status == FAILED
+    assert failed.error["code"] == "JOB_ABANDONED"
+
+
+def test_release_requeues_own_jobs_without_counting_the_attempt(tmp_path, clock):
+    first, second = _store(tmp_path, "a"), _store(tmp_path, "b")
+    mine, theirs = _enqueue(first, "a.pdf"), _enqueue(second, "b.pdf")
+    first.claim()
+    second.claim()
+
+    assert first.release() == 1
+    assert first.get(mine.id).status == QUEUED
+    assert first.get(mine.id).attempts == 0
+    assert first.get(theirs.id).status == RUNNING
+
+
+def test_purge_drops_only_old_finished_jobs(tmp_path, clock):
+    store = _store(tmp_path, "a")
+    old, recent, queued = (_enqueue(store, name) for name in ("1.pdf", "2.pdf", "3.pdf"))
+    store.claim()
+    store.complete(old.id, {})
+    clock.now += 100
+    store.claim()
+    store.fail(recent.id, {"code": "X"})
+
+    assert store.purge(50) == 1
+    assert store.get(old.id) is None
+    assert store.get(recent.id).status == FAILED
+    assert store.get(queued.id).status == QUEUED
+
+
+def test_existing_queue_files_gain_lease_columns(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL,"
+        " upload_path TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL,"
+        " payload TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+        " created_at REAL NOT NULL, started_at REAL, finished_at REAL,"
+        " result TEXT, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO jobs VALUES ('old', 'running', 'a.pdf', '/tmp/a.pdf', 'x', 1, '{}', 1,"
+        " 1.0, 1.0, NULL, NULL, NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path, max_pending=10, owner="a")
+
+    assert store.get("old").lease_until is None
+    # Rows from before leases existed count as expired.
+    assert store.recover() == (1, [])
+
+
+def _pool(store: JobStore, execute, finished: list, **kwargs) -> JobWorkerPool:
+    return JobWorkerPool(
+        store, execute, workers=1, poll_interval=0.01, on_finished=finished.append, **kwargs
+    )
+
+
+async def _until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_pool_runs_jobs_and_records_outcomes(tmp_path):
+    store = _store(tmp_path, "a")
+    ok, bad = _enqueue(store, "ok.pdf"), _enqueue(store, "bad.pdf")
+    finished: list = []
+
+    async def execute(job):
+        if job.filename == "bad.pdf":
+            raise JobFailedError({"status": "error", "code": "SCHEMA_INVALID", "message": "x"})
+        return {"rows": [job.filename]}
+
+    async def main():
+        pool = _pool(store, execute, finished)
+        await pool.start()
+        await _until(lambda: len(finished) == 2)
+        await pool.stop()
+
+    asyncio.run(main())
+
+    assert store.get(ok.id).result == {"rows": ["ok.pdf"]}
+    assert store.get(bad.id).error["code"] == "SCHEMA_INVALID"
+
+
+def test_pool_renews_the_lease_of_a_long_job(tmp_path):
+    store = _store(tmp_path, "a", lease_seconds=0.1)
+    other = _store(tmp_path, "b", lease_seconds=0.1)
+    job = _enqueue(store)
+    finished: list = []
+
+    async def execute(job):
+        for _ in range(5):
+            await asyncio.sleep(0.08)
+            other.recover()
+        return {"rows": []}
+
+    async def main():
+        pool = _pool(store, execute, finished)
+        await pool.start()
+        await _until(lambda: finished)
+        await pool.stop()
+
+    asyncio.run(main())
+
+    done = store.get(job.id)
+    assert (done.status, done.attempts) == (SUCCEEDED, 1)
+
+
+def test_pool_housekeeping_runs_while_workers_loop(tmp_path):
+    store = _store(tmp_path, "a", lease_seconds=0.05)
+    crashed = _store(tmp_path, "dead", lease_seconds=0.05)
+    done = _enqueue(store, "done.pdf")
+    orphan = _enqueue(store, "orphan.pdf")
+    crashed.claim()
+    crashed.complete(done.id, {})
+    finished: list = []
+
+    async def execute(job):
+        return {"rows": [job.filename]}
+
+    async def main():
+        crashed.claim()  # claimed by a process that never renews or finishes it
+        pool = _pool(store, execute, finished, retention_seconds=0.0)
+        await pool.start()
+        await _until(lambda: store.get(done.id) is None and len(finished) == 1)
+        await pool.stop()
+
+    asyncio.run(main())
+
+    # The orphan was requeued once its lease expired, run, then purged (retention 0).
+    assert [job.id for job in finished] == [orphan.id]
+    assert store.get(orphan.id) is None or store.get(orphan.id).status == SUCCEEDED
+
+
+def test_pool_stop_requeues_interrupted_jobs(tmp_path):
+    store = _store(tmp_path, "a")
+    job = _enqueue(store)
+
+    async def main():
+        running = asyncio.Event()
+
+        async def execute(job):
+            running.set()
+            await asyncio.sleep(60)
+
+        pool = _pool(store, execute, [])
+        await pool.start()
+        await asyncio.wait_for(running.wait(), 5)
+        await pool.stop()
+
+    asyncio.run(main())
+
+    interrupted = store.get(job.id)
+    assert (interrupted.status, interrupted.attempts, interrupted.owner) == (QUEUED, 0, None)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from tests.conftest import FakeChatModel
+from xtractor.pipeline.nodes.multimodal_extract import invoke_rows
+from xtractor.utils.json_repair import REPAIRED, TRUNCATED, parse_json_lenient
+
+ROWS = [{"KKS": "10LAB01", "DESC": "Pump {main}"}, {"KKS": "10LAB02", "DESC": 'Valve "B"'}]
+REPLY = json.dumps({"key": "asset_register", "rows": ROWS})
+
+
+def test_valid_json_is_not_repaired():
+    assert parse_json_lenient(REPLY) == (json.loads(REPLY), None)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        f"```json\n{REPLY}\n```",
+        REPLY.replace("}]", "},]"),
+        f"Here are the rows you asked for:\n{REPLY}",
+    ],
+)
+def test_wrapping_and_trailing_commas_are_repaired(text):
+    assert parse_json_lenient(text) == (json.loads(REPLY), REPAIRED)
+
+
+def test_truncated_output_keeps_complete_rows():
+    cut = REPLY.index('{"KKS": "10LAB02"') + 20
+
+    value, repair = parse_json_lenient(REPLY[:cut])
+
+    assert repair == TRUNCATED
+    assert value == {"key": "asset_register", "rows": ROWS[:1]}
+
+
+def test_truncation_inside_a_string_with_brackets():
+    text = REPLY[: REPLY.index("Valve") + 3]
+
+    assert parse_json_lenient(text) == ({"key": "asset_register", "rows": ROWS[:1]}, TRUNCATED)
+
+
+@pytest.mark.parametrize("text", ["", "no json here", '{"key": "x", "rows": [{"KKS": "A'])
+def test_unrecoverable_output_raises(text):
+    with pytest.raises(ValueError, match="could not be repaired"):
+        parse_json_lenient(text)
+
+
+MESSAGES = [SystemMessage(content="extract"), HumanMessage(content="page 1")]
+
+
+def _rows(model: FakeChatModel, retries: int = 2):
+    recovery: Counter = Counter()
+    parsed, rows, raws = invoke_rows(model, MESSAGES, {"type": "json_object"}, retries, recovery)
+    return rows, raws, recovery
+
+
+def test_truncated_reply_asks_only_for_the_missing_rows():
+    model = FakeChatModel()
+    model.replies = [
+        REPLY[: REPLY.index('{"KKS": "10LAB02"') + 5],
+        json.dumps({"key": "asset_register", "rows": ROWS}),
+    ]
+
+    rows, raws, recovery = _rows(model)
+
+    assert rows == ROWS  # the restated first row is dropped
+    assert len(raws) == 2
+    assert recovery == Counter(repaired=1, retried=1)
+    follow_up = model.calls[1]["messages"]
+    assert follow_up[: len(MESSAGES)] == MESSAGES
+    assert "10LAB01" in follow_up[-1].content
+
+
+def test_unusable_reply_is_requested_again_in_full():
+    model = FakeChatModel()
+    model.replies = ["not json", REPLY]
+
+    rows, _, recovery = _rows(model)
+
+    assert rows == ROWS
+    assert recovery == Counter(retried=1)
+    assert model.calls[1]["messages"] == MESSAGES
+
+
+def test_retries_are_bounded():
+    model = FakeChatModel()
+    model.replies = ["not json"] * 3
+
+    with pytest.raises(ValueError, match="invalid JSON"):
+        _rows(model, retries=1)
+    assert len(model.calls) == 2
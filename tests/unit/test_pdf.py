@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import io
+import struct
+import zlib
+from pathlib import Path
+from typing import List
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+from tests.conftest import make_pdf
+from xtractor.extractors.pdf import (
+    DRAWING_MIN_PATH_OPS,
+    extract_pdf_text,
+    parse_pdf,
+    write_pdf_subset,
+)
+
+FONT = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+
+def _stream(data: bytes, extra: bytes = b"") -> bytes:
+    return b"<< /Length %d %s>>\nstream\n%s\nendstream" % (len(data), extra, data)
+
+
+def _page(contents: int, resources: bytes = b"/Font << /F1 3 0 R >>") -> bytes:
+    return (
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R"
+        b" /Resources << %s >> >>" % (contents, resources)
+    )
+
+
+def _assemble(objects: List[bytes]) -> bytes:
+    """A classic-xref PDF; object 1 is the catalog and object 2 the page tree."""
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def _single_page(contents: bytes, resources: bytes = b"/Font << /F1 3 0 R >>", extra=()):
+    return _assemble(
+        [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [5 0 R] /Count 1 >>",
+            FONT,
+            _stream(contents),
+            _page(4, resources),
+            *extra,
+        ]
+    )
+
+
+def _write(tmp_path: Path, data: bytes, name: str = "doc.pdf") -> Path:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def _encrypted(user_password: str) -> bytes:
+    writer = PdfWriter(clone_from=io.BytesIO(make_pdf(2)))
+    writer.encrypt(user_password=user_password, owner_password="owner", algorithm="RC4-128")
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _compressed_objects_pdf() -> bytes:
+    """A PDF 1.5 file: objects 1-4 live in an object stream, indexed by an xref stream."""
+
+    content = zlib.compress(b"BT /F1 12 Tf 40 800 Td (Packed 10LAB001AA001 Pump) Tj ET")
+    packed = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 5 0 R"
+        b" /Resources << /Font << /F1 4 0 R >> >> >>",
+        FONT,
+    ]
+    header, body = b"", b""
+    for number, obj in enumerate(packed, start=1):
+        header += b"%d %d " % (number, len(body))
+        body += obj + b"\n"
+    objects = {
+        5: _stream(content, b"/Filter /FlateDecode "),
+        6: _stream(
+            header + body, b"/Type /ObjStm /N %d /First %d " % (len(packed), len(header))
+        ),
+    }
+
+    out = bytearray(b"%PDF-1.5\n")
+    offsets = {}
+    for number, obj in objects.items():
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref_at = len(out)
+    rows = [struct.pack(">BIH", 0, 0, 65535)]
+    rows += [struct.pack(">BIH", 2, 6, index) for index in range(len(packed))]
+    rows += [struct.pack(">BIH", 1, offsets[number], 0) for number in (5, 6)]
+    rows.append(struct.pack(">BIH", 1, xref_at, 0))
+    table = zlib.compress(b"".join(rows))
+    xref = _stream(table, b"/Type /XRef /Size 8 /W [1 4 2] /Root 1 0 R /Filter /FlateDecode ")
+    out += b"7 0 obj\n%s\nendobj\nstartxref\n%d\n%%%%EOF\n" % (xref, xref_at)
+    return bytes(out)
+
+
+def _cmap(mapping: dict[int, str]) -> bytes:
+    entries = b"\n".join(
+        b"<%02X> <%s>" % (code, text.encode("utf-16-be").hex().upper().encode())
+        for code, text in mapping.items()
+    )
+    return (
+        b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+        b"/CMapName /Custom def /CMapType 2 def\n"
+        b"1 begincodespacerange <00> <FF> endcodespacerange\n"
+        b"%d beginbfchar\n%s\nendbfchar\n"
+        b"endcmap CMapName currentdict /CMap defineresource pop end end" % (len(mapping), entries)
+    )
+
+
+def test_text_layer_lines_per_page(tmp_path):
+    layer = extract_pdf_text(_write(tmp_path, make_pdf(3, tag="t", rows=2)))
+
+    assert layer.page_count == 3
+    assert layer.pages[1].splitlines() == [
+        "Asset register t page 2",
+        "10LAB001AA000 Pump motor 0 Building 1 Room 0",
+        "10LAB001AA001 Pump motor 1 Building 1 Room 1",
+    ]
+    assert layer.drawing_pages == []
+    assert layer.warnings == []
+
+
+def test_xref_and_object_streams(tmp_path):
+    layer = extract_pdf_text(_write(tmp_path, _compressed_objects_pdf()))
+
+    assert layer.pages == ["Packed 10LAB001AA001 Pump"]
+
+
+def test_to_unicode_cmap(tmp_path):
+    cmap = _cmap({1: "Ü", 2: "b", 3: "e", 4: "r", 5: "g", 6: "ä", 7: "n"})
+    font = b"<< /Type /Font /Subtype /Type1 /BaseFont /Custom /ToUnicode 6 0 R >>"
+    data = _assemble(
+        [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [5 0 R] /Count 1 >>",
+            font,
+            _stream(b"BT /F1 12 Tf 40 800 Td <0102030405060705> Tj ET"),
+            _page(4),
+            _stream(cmap),
+        ]
+    )
+
+    layer = extract_pdf_text(_write(tmp_path, data))
+
+    assert layer.pages == ["Übergäng"]
+
+
+def test_drawing_pages_from_paths_and_images(tmp_path):
+    paths = b"".join(b"%d 10 m %d 20 l S\n" % (i, i) for i in range(DRAWING_MIN_PATH_OPS))
+    vector = _single_page(paths + b"BT /F1 9 Tf (Sheet) Tj ET")
+    image = _single_page(
+        b"q 500 0 0 500 0 0 cm /Im1 Do Q",
+        b"/XObject << /Im1 6 0 R >>",
+        extra=[
+            _stream(
+                b"\x00" * 16,
+                b"/Type /XObject /Subtype /Image /Width 600 /Height 600"
+                b" /ColorSpace /DeviceGray /BitsPerComponent 8 ",
+            )
+        ],
+    )
+    table = _single_page(b"0 0 100 100 re S BT /F1 9 Tf (Table) Tj ET")
+
+    assert extract_pdf_text(_write(tmp_path, vector, "v.pdf")).drawing_pages == [1]
+    assert extract_pdf_text(_write(tmp_path, image, "i.pdf")).drawing_pages == [1]
+    assert extract_pdf_text(_write(tmp_path, table, "t.pdf")).drawing_pages == []
+
+
+def test_subset_keeps_selected_pages(tmp_path):
+    path = _write(tmp_path, make_pdf(5, tag="s", rows=1))
+
+    subset = PdfReader(io.BytesIO(write_pdf_subset(path, [4, 2, 2, 9])))
+
+    assert [page.extract_text().splitlines()[0] for page in subset.pages] == [
+        "Asset register s page 2",
+        "Asset register s page 4",
+    ]
+    with pytest.raises(ValueError, match="no pages selected"):
+        write_pdf_subset(path, [0, 6])
+
+
+def test_subsets_from_one_parsed_document(tmp_path):
+    document = parse_pdf(_write(tmp_path, make_pdf(4, rows=1)))
+
+    sizes = [len(PdfReader(io.BytesIO(write_pdf_subset(document, [n]))).pages) for n in (1, 3)]
+
+    assert sizes == [1, 1]
+    assert document.page_count == 4
+
+
+def test_empty_file(tmp_path):
+    path = _write(tmp_path, b"")
+
+    assert parse_pdf(path) is None
+    assert extract_pdf_text(path).pages == []
+    with pytest.raises(ValueError, match="empty PDF"):
+        write_pdf_subset(path, [1])
+
+
+def test_truncated_file_keeps_complete_pages(tmp_path):
+    data = make_pdf(3, rows=2)
+    cut = data.index(b"xref")
+
+    layer = extract_pdf_text(_write(tmp_path, data[:cut]))
+
+    assert layer.page_count == 3
+    assert layer.pages[2].startswith("Asset register x page 3")
+    assert layer.warnings == ["truncated PDF: trailer rebuilt"]
+
+
+def test_unreadable_file_yields_no_text(tmp_path):
+    layer = extract_pdf_text(_write(tmp_path, b"%PDF-1.4\n1 0 obj\n<< /Ty"))
+
+    assert layer.pages == []
+    assert layer.warnings and layer.warnings[0].startswith("unreadable PDF")
+
+
+def test_encrypted_with_empty_password_is_read(tmp_path):
+    path = _write(tmp_path, _encrypted(""))
+
+    layer = extract_pdf_text(path)
+    subset = PdfReader(io.BytesIO(write_pdf_subset(path, [2])))
+
+    assert layer.pages[0].startswith("Asset register x page 1")
+    assert not subset.is_encrypted
+    assert subset.pages[0].extract_text().startswith("Asset register x page 2")
+
+
+def test_encrypted_with_password_is_rejected(tmp_path):
+    path = _write(tmp_path, _encrypted("secret"))
+
+    layer = extract_pdf_text(path)
+
+    assert layer.pages == []
+    assert layer.warnings == ["encrypted PDF"]
+    with pytest.raises(ValueError, match="encrypted PDF"):
+        write_pdf_subset(path, [1])
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import cProfile
+import threading
+
+from xtractor.observability.profiling import ProfileSession
+
+
+class BusyProfiler(cProfile.Profile):
+    """A profiler refused like a second one on Python 3.12+ (one per process)."""
+
+    def enable(self, *args, **kwargs) -> None:
+        raise ValueError("Another profiling tool is already active")
+
+
+def _work() -> int:
+    return sum(index * index for index in range(1000))
+
+
+def test_sections_are_profiled_and_timed():
+    session = ProfileSession("header")
+
+    with session.section("node"):
+        _work()
+
+    assert session.sections["node"]["calls"] == 1
+    stats = session.stats()
+    assert any(function == "_work" for _, _, function in stats.stats)
+
+
+def test_section_is_only_timed_when_the_profiler_is_busy():
+    session = ProfileSession("header")
+    with session.section("node"):
+        _work()
+
+    def worker():
+        session._thread_profile().profiler = BusyProfiler()
+        with session.section("worker"), session.section("nested"):
+            _work()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert session.sections["worker"]["calls"] == session.sections["nested"]["calls"] == 1
+    # The busy thread's empty profiler is left out of the merged statistics.
+    assert session.stats() is not None
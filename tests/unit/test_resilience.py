@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+from openai import APITimeoutError
+
+from tests.conftest import FakeChatModel
+from xtractor.adapters import resilience as resilience_module
+from xtractor.adapters.llm import FallbackChatModel, ainvoke_json, invoke_json
+from xtractor.adapters.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    acall_with_resilience,
+    astream_with_resilience,
+    call_with_resilience,
+    get_resilience,
+    request_deadline,
+)
+from xtractor.observability.metrics import get_metrics_registry
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+class Flaky:
+    """A model call failing with a connection error ``failures`` times, then answering."""
+
+    def __init__(self, failures: int = 10**6) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, **timeout) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise httpx.ConnectError("connection refused")
+        return "ok"
+
+
+def test_breaker_opens_after_consecutive_failures(configure):
+    configure(llm_breaker_failure_threshold=3, llm_max_retries=1, llm_retry_backoff_seconds=0.001)
+    call = Flaky()
+
+    with pytest.raises(httpx.ConnectError):
+        call_with_resilience("m", call)  # two failed attempts
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience("m", call)  # the third opens the breaker, failing its retry fast
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience("m", call)
+
+    assert call.calls == 3
+    assert get_resilience().breaker("m").state == OPEN
+    assert get_resilience().breaker("other").state == CLOSED
+
+
+def test_success_resets_the_failure_count(configure):
+    configure(llm_breaker_failure_threshold=2, llm_max_retries=1, llm_retry_backoff_seconds=0.001)
+
+    assert call_with_resilience("m", Flaky(failures=1)) == "ok"
+    assert call_with_resilience("m", Flaky(failures=1)) == "ok"
+
+    assert get_resilience().breaker("m").state == CLOSED
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("m", threshold=1, reset_seconds=10)
+    breaker.failed()
+    assert (breaker.state, breaker.allow()) == (OPEN, False)
+
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one probe at a time
+
+    breaker.succeeded()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker("m", threshold=3, reset_seconds=10)
+    for _ in range(3):
+        breaker.failed()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.failed()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+
+
+def test_released_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker("m", threshold=1, reset_seconds=10)
+    breaker.failed()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.release()  # e.g. the request itself was rejected
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_retries_stop_when_the_budget_is_spent(configure):
+    configure(
+        llm_max_retries=5,
+        llm_retry_backoff_seconds=0.001,
+        llm_retry_budget_ratio=0,
+        llm_retry_budget_burst=1,
+        llm_breaker_failure_threshold=100,
+    )
+    first, second = Flaky(), Flaky()
+
+    with pytest.raises(httpx.ConnectError):
+        call_with_resilience("m", first)
+    with pytest.raises(httpx.ConnectError):
+        call_with_resilience("m", second)
+
+    assert (first.calls, second.calls) == (2, 1)
+    assert 'dx_llm_retry_budget_exhausted_total{model="m"} 2' in (
+        get_metrics_registry().render_prometheus()
+    )
+
+
+def test_retries_stop_at_max_retries(configure):
+    configure(llm_max_retries=2, llm_retry_backoff_seconds=0.001)
+    call = Flaky()
+
+    with pytest.raises(httpx.ConnectError):
+        call_with_resilience("m", call)
+
+    assert call.calls == 3
+
+
+async def _hang(**timeout) -> str:
+    await asyncio.sleep(10)
+    return "late"
+
+
+def test_call_cut_off_by_the_deadline_counts_as_a_failure(configure):
+    configure(llm_breaker_failure_threshold=1)
+
+    async def main():
+        with request_deadline(0.05):
+            await acall_with_resilience("m", _hang)
+
+    with pytest.raises(DeadlineExceededError, match="during the call"):
+        asyncio.run(main())
+    assert get_resilience().breaker("m").state == OPEN
+
+
+def test_stream_cut_off_by_the_deadline_counts_as_a_failure(configure):
+    configure(llm_breaker_failure_threshold=1)
+
+    async def hanging_stream(**timeout):
+        yield "first"
+        await asyncio.sleep(10)
+        yield "never"
+
+    async def main():
+        with request_deadline(0.05):
+            return [chunk async for chunk in astream_with_resilience("m", hanging_stream)]
+
+    with pytest.raises(DeadlineExceededError, match="during the call"):
+        asyncio.run(main())
+    assert get_resilience().breaker("m").state == OPEN
+
+
+def test_deadline_passed_before_the_call_leaves_the_breaker_alone(configure):
+    configure(llm_breaker_failure_threshold=1)
+    calls = []
+
+    async def main():
+        with request_deadline(0.01):
+            await asyncio.sleep(0.02)
+            await acall_with_resilience("m", lambda **timeout: calls.append(1))
+
+    with pytest.raises(DeadlineExceededError, match="before the call"):
+        asyncio.run(main())
+    assert calls == []
+    assert get_resilience().breaker("m").state == CLOSED
+
+
+class SlowTimeout(FakeChatModel):
+    """A primary model that times out after ``seconds`` of the clock."""
+
+    def __init__(self, clock: Clock | None = None, seconds: float = 0.0) -> None:
+        super().__init__("primary")
+        self.clock, self.seconds = clock, seconds
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append({"messages": list(messages), "kwargs": dict(kwargs)})
+        if self.clock is not None:
+            self.clock.now += self.seconds
+        raise APITimeoutError(request=httpx.Request("POST", "http://llm/chat"))
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+
+MESSAGES = [HumanMessage(content="page 1")]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_primary_timeouts_trip_its_breaker_although_the_fallback_answers(configure, mode):
+    configure(llm_breaker_failure_threshold=2, llm_max_retries=2)
+    primary, fallback = SlowTimeout(), FakeChatModel("fallback")
+    model = FallbackChatModel(primary, fallback)
+
+    for _ in range(3):
+        if mode == "sync":
+            result = invoke_json(model, MESSAGES)
+        else:
+            result = asyncio.run(ainvoke_json(model, MESSAGES))
+        assert result.parsed["rows"]
+
+    resilience = get_resilience()
+    assert resilience.breaker("primary").state == OPEN
+    assert resilience.breaker("fallback").state == CLOSED
+    assert len(primary.calls) == 2  # timeouts are not retried; the open breaker skips the third
+    assert len(fallback.calls) == 3
+    metrics = get_metrics_registry().render_prometheus()
+    assert 'dx_llm_fallbacks_total{model="primary"} 3' in metrics
+
+
+def test_fallback_gets_the_time_left_after_the_primary(configure, clock):
+    configure(llm_timeout_seconds=30)
+    primary, fallback = SlowTimeout(clock, seconds=25), FakeChatModel("fallback")
+
+    with request_deadline(40):
+        invoke_json(FallbackChatModel(primary, fallback), MESSAGES)
+
+    assert "timeout" not in primary.calls[0]["kwargs"]
+    assert fallback.calls[0]["kwargs"]["timeout"] == pytest.approx(15)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.conftest import SCHEMA
+from xtractor.config.settings import ModelTier, Settings, get_settings
+from xtractor.pipeline.result_cache import (
+    CACHE_COALESCED,
+    CACHE_HIT,
+    CACHE_MISS,
+    RESULT_SETTINGS,
+    ResultCache,
+    result_cache_key,
+)
+
+# Settings that must not split the result cache.
+OPERATIONAL_SETTINGS = {
+    "environment",
+    "temp_dir",
+    "max_upload_bytes",
+    "upload_chunk_bytes",
+    "pipeline_mode",  # resolved per request and keyed as pipeline_mode
+    "token_budget",  # resolved per request and keyed as token_budget
+    "extract_chunk_concurrency",
+    "schema_registry_persist",
+    "schema_registry_path",
+    "schema_registry_max_entries",
+    "max_schemas_per_request",
+    "summary_cache_enabled",
+    "summary_cache_max_entries",
+    "summary_cache_ttl_seconds",
+    "summary_cache_disk",
+    "summary_cache_disk_max_entries",
+    "result_cache_enabled",
+    "result_cache_max_bytes",
+    "jobs_enabled",
+    "jobs_workers",
+    "jobs_max_pending",
+    "jobs_max_attempts",
+    "jobs_lease_seconds",
+    "jobs_retention_seconds",
+    "jobs_poll_interval_seconds",
+    "jobs_db_path",
+    "log_level",
+    "metrics_enabled",
+    "trace_export_path",
+    "profiling_enabled",
+    "profiling_sample_rate",
+    "profiling_allow_header",
+    "profiling_max_profiles",
+    "openai_api_key",
+    "llm_timeout_seconds",
+    "llm_connect_timeout_seconds",
+    "llm_max_connections",
+    "llm_max_keepalive_connections",
+    "llm_keepalive_expiry_seconds",
+    "request_deadline_seconds",
+    "llm_max_retries",
+    "llm_retry_backoff_seconds",
+    "llm_retry_backoff_max_seconds",
+    "llm_retry_budget_ratio",
+    "llm_retry_budget_burst",
+    "llm_breaker_enabled",
+    "llm_breaker_failure_threshold",
+    "llm_breaker_reset_seconds",
+    "model_prices",
+    "llm_cassette_mode",
+    "llm_cassette_path",
+    "llm_cassette_time_scale",
+}
+
+
+def _key(settings: Settings, **kwargs) -> str:
+    return result_cache_key("digest", SCHEMA, settings, **kwargs)
+
+
+def test_every_setting_is_classified():
+    assert set(RESULT_SETTINGS) | OPERATIONAL_SETTINGS == set(Settings.model_fields)
+    assert not set(RESULT_SETTINGS) & OPERATIONAL_SETTINGS
+
+
+@pytest.mark.parametrize(
+    "update",
+    [
+        {"fallback_model": "gpt-4o"},
+        {"extract_chunk_min_pages": 5},
+        {"extract_chunk_min_bytes": 1024},
+        {"extract_chunk_overlap_pages": 1},
+        {"extract_dedupe_fields": ["DESCRIPTION"]},
+        {"extract_output_retries": 0},
+        {"local_text_min_chars_per_page": 10},
+        {"local_text_min_page_coverage": 0.5},
+        {"local_text_min_printable_ratio": 0.5},
+        {"extract_model_tiers": [ModelTier(name="small", model="gpt-4o", max_pages=2)]},
+    ],
+)
+def test_output_affecting_settings_change_the_key(update):
+    settings = get_settings()
+    assert _key(settings.model_copy(update=update)) != _key(settings)
+
+
+def test_request_options_change_the_key():
+    settings = get_settings()
+    assert _key(settings, pipeline_mode="single_pass") != _key(settings)
+    assert _key(settings, token_budget=1000) != _key(settings)
+    assert result_cache_key("other", SCHEMA, settings) != _key(settings)
+
+
+def test_operational_settings_keep_the_key():
+    settings = get_settings()
+    update = {"llm_timeout_seconds": 1.0, "result_cache_max_bytes": 1, "jobs_workers": 8}
+    assert _key(settings.model_copy(update=update)) == _key(settings)
+
+
+def _state(rows: int = 1, **metrics) -> dict:
+    return {
+        "extraction_result": {"key": "k", "rows": [{"id": index} for index in range(rows)]},
+        "warnings": [],
+        "metrics": metrics,
+        "file_ref": "/tmp/upload",
+    }
+
+
+def test_run_caches_and_serves_copies():
+    cache = ResultCache(max_bytes=1 << 20)
+
+    first = cache.run("k", _state)
+    second = cache.run("k", lambda: pytest.fail("cached result was recomputed"))
+    second["extraction_result"]["rows"].clear()
+    third = cache.run("k", _state)
+
+    assert first["audit"]["cache"]["result"] == CACHE_MISS
+    assert second["audit"]["cache"]["result"] == CACHE_HIT
+    assert len(third["extraction_result"]["rows"]) == 1
+    assert "file_ref" not in third
+    assert cache.snapshot()["hits"] == 2
+
+
+def test_fallback_runs_are_not_cached():
+    cache = ResultCache(max_bytes=1 << 20)
+    calls = []
+
+    def execute():
+        calls.append(1)
+        return _state(fallbacks=["multimodal_extract"])
+
+    cache.run("k", execute)
+    cache.run("k", execute)
+
+    assert len(calls) == 2
+
+
+def test_concurrent_runs_share_one_execution():
+    cache = ResultCache(max_bytes=1 << 20)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def execute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return _state()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(cache.run, "k", execute)
+        started.wait(5)
+        followers = [pool.submit(cache.run, "k", execute) for _ in range(2)]
+        while cache.coalesced < 2:
+            threading.Event().wait(0.01)
+        release.set()
+        outcomes = [future.result()["audit"]["cache"]["result"] for future in [leader, *followers]]
+
+    assert len(calls) == 1
+    assert outcomes == [CACHE_MISS, CACHE_COALESCED, CACHE_COALESCED]
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache(max_bytes=1 << 20)
+    started = threading.Event()
+    release = threading.Event()
+
+    def execute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("model down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(cache.run, "k", execute)
+        started.wait(5)
+        follower = pool.submit(cache.run, "k", execute)
+        while cache.coalesced < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="model down"):
+                future.result()
+
+    assert cache.run("k", _state)["audit"]["cache"]["result"] == CACHE_MISS
+
+
+def test_async_runs_share_one_execution():
+    cache = ResultCache(max_bytes=1 << 20)
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return _state()
+
+    async def main():
+        return await asyncio.gather(*(cache.arun("k", execute) for _ in range(3)))
+
+    states = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert sorted(state["audit"]["cache"]["result"] for state in states) == [
+        CACHE_COALESCED,
+        CACHE_COALESCED,
+        CACHE_MISS,
+    ]
+
+
+def test_async_failures_reach_every_waiter():
+    cache = ResultCache(max_bytes=1 << 20)
+
+    async def execute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model down")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.arun("k", execute) for _ in range(2)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.snapshot()["entries"] == 0
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from tests.conftest import FakeChatModel
+from xtractor.api.formats import row_events
+from xtractor.pipeline.nodes.multimodal_extract import ainvoke_rows
+from xtractor.utils.json_stream import RowStreamParser
+
+ROWS = [
+    {"KKS": "10LAB01", "DESC": 'Pump "A" {main}', "PARTS": [{"n": 1}, {"n": "]"}]},
+    {"KKS": "10LAB02", "DESC": "Valve \\\\ [B]", "PARTS": []},
+    {"KKS": "10LAB03", "DESC": "Fan", "PARTS": None},
+]
+REPLY = json.dumps({"key": "asset_register", "rows": ROWS})
+
+
+def _feed(pieces) -> list:
+    parser = RowStreamParser()
+    return [row for piece in pieces for row in parser.feed(piece)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, len(REPLY)])
+def test_parser_returns_each_row_whatever_the_chunking(size):
+    pieces = [REPLY[start : start + size] for start in range(0, len(REPLY), size)]
+
+    assert _feed(pieces) == ROWS
+
+
+def test_parser_returns_rows_as_they_close():
+    parser = RowStreamParser()
+    cut = REPLY.index('{"KKS": "10LAB02"')
+
+    assert parser.feed(REPLY[: cut - 1]) == ROWS[:1]
+    assert parser.feed(REPLY[cut - 1 : -3]) == ROWS[1:2]
+    assert parser.feed(REPLY[-3:]) == ROWS[2:]
+
+
+def test_parser_ignores_scalars_and_other_top_level_keys():
+    text = '{"key": "k", "note": "[{not a row}]", "rows": [{"A": 1}, "x", 2, {"A": 2}]}'
+
+    assert _feed([text]) == [{"A": 1}, {"A": 2}]
+
+
+MESSAGES = [SystemMessage(content="extract"), HumanMessage(content="page 1")]
+
+
+def _broken(cut: int, error: BaseException | None = None) -> FakeChatModel:
+    model = FakeChatModel()
+    model.stream_cut, model.stream_error = cut, error
+    return model
+
+
+def _stream_rows(model: FakeChatModel, retries: int = 1):
+    published: list = []
+    recovery: Counter = Counter()
+    result = asyncio.run(
+        ainvoke_rows(
+            model, MESSAGES, {"type": "json_object"}, retries, recovery, published.append
+        )
+    )
+    return result, published, recovery
+
+
+def test_cut_off_stream_keeps_streamed_rows_and_asks_for_the_rest():
+    model = _broken(REPLY.index('{"KKS": "10LAB03"') + 5)
+    model.replies = [REPLY, json.dumps({"key": "asset_register", "rows": ROWS[1:]})]
+
+    (_, rows, _), published, recovery = _stream_rows(model)
+
+    assert rows == ROWS
+    assert published == ROWS  # every row handed over exactly once, in result order
+    assert recovery["retried"] == 1
+    assert "10LAB02" in model.calls[1]["messages"][-1].content
+
+
+def test_retry_rows_follow_the_streamed_ones():
+    model = _broken(REPLY.index('{"KKS": "10LAB02"') + 5)
+    # The follow-up answers in full instead of resuming; rows already sent stay first.
+    model.replies = [REPLY, json.dumps({"key": "asset_register", "rows": ROWS[::-1]})]
+
+    (_, rows, _), published, _ = _stream_rows(model)
+
+    assert rows[0] == ROWS[0]
+    assert published == rows
+
+
+def test_stream_failure_after_rows_propagates_with_rows_published():
+    model = _broken(REPLY.index('{"KKS": "10LAB02"'), RuntimeError("reset"))
+    model.replies = [REPLY]
+    published: list = []
+
+    with pytest.raises(RuntimeError, match="reset"):
+        asyncio.run(
+            ainvoke_rows(
+                model, MESSAGES, {"type": "json_object"}, 1, Counter(), published.append
+            )
+        )
+    assert published == ROWS[:1]
+
+
+def _state(rows: list) -> dict:
+    return {"extraction_result": {"key": "k", "rows": rows}}
+
+
+def test_row_events_skip_rows_already_sent():
+    events = list(row_events(_state([{"A": 1}, {"A": 2}]), {"k": [{"A": 1}]}))
+
+    assert events == [{"event": "row", "key": "k", "row": {"A": 2}}]
+
+
+def test_row_events_reset_a_block_that_diverged_from_what_was_sent():
+    events = list(row_events(_state([{"A": 9}, {"A": 2}]), {"k": [{"A": 1}]}))
+
+    assert [event["event"] for event in events] == ["reset", "row", "row"]
+    assert [event["row"] for event in events[1:]] == [{"A": 9}, {"A": 2}]